@@ -0,0 +1,126 @@
+"""Bounded, thread-safe activity log
+
+Any thread can add an entry with ActivityLog.add(); it only appends to a
+deque under a lock. The UI drains the new entries in batches from the main
+loop, so a burst of messages costs one textbox update instead of one per
+message, and memory stays flat however long the session runs: the history
+keeps the last `capacity` entries and entries that pile up faster than the
+UI drains them are dropped (and counted). Those drops only affect the
+textbox: the optional log file gets every entry, written by a background
+listener thread so neither the caller nor the UI waits on the disk.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+DEFAULT_CAPACITY = 500
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+# Sources and event types used by the app
+SOURCE_APP = "app"
+SOURCE_GESTURE = "gesture"
+SOURCE_VOICE = "voice"
+SOURCE_INPUT = "input"
+EVENT_INFO = "info"
+EVENT_COMMAND = "command"
+EVENT_ERROR = "error"
+
+LogEntry = namedtuple("LogEntry", ["timestamp", "source", "event", "message"])
+
+
+def format_entry(entry):
+    """One line for the activity textbox, as the app has always shown it"""
+    return f"[{time.strftime('%H:%M:%S', time.localtime(entry.timestamp))}] {entry.message}\n"
+
+
+def entry_to_json(entry):
+    """One JSON line for the log file"""
+    return json.dumps({
+        "time": datetime.fromtimestamp(entry.timestamp).isoformat(timespec="milliseconds"),
+        "source": entry.source,
+        "event": entry.event,
+        "message": entry.message,
+    })
+
+
+class ActivityLog:
+    """Fixed-capacity ring buffer of LogEntry records
+
+    `path` optionally mirrors every added entry to a JSON-lines file that
+    rotates after `max_bytes`, keeping `backup_count` old files.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None,
+                 max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.capacity = capacity
+        self.history = deque(maxlen=capacity)
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.total = 0
+        self._file_logger = None
+        self._listener = None
+        if path:
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(records, handler)
+            self._listener.start()
+            self._file_logger = logging.getLogger(f"activity.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(logging.handlers.QueueHandler(records))
+
+    def add(self, message, source=SOURCE_APP, event=EVENT_INFO):
+        """Record an entry; safe to call from any thread"""
+        entry = LogEntry(time.time(), source, event, message)
+        with self._lock:
+            self.history.append(entry)
+            self.total += 1
+            if len(self._pending) >= self.capacity:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(entry)
+        if self._file_logger:
+            self._file_logger.info(entry_to_json(entry))
+        return entry
+
+    def drain(self, limit=None):
+        """Take up to `limit` entries added since the last drain, oldest first"""
+        with self._lock:
+            if limit is None or limit >= len(self._pending):
+                batch = list(self._pending)
+                self._pending.clear()
+            else:
+                batch = [self._pending.popleft() for _ in range(limit)]
+        return batch
+
+    def pending(self):
+        """Number of entries waiting to be drained"""
+        with self._lock:
+            return len(self._pending)
+
+    def entries(self, source=None, event=None):
+        """Snapshot of the history, optionally filtered by source and event type"""
+        with self._lock:
+            snapshot = list(self.history)
+        return [e for e in snapshot
+                if (source is None or e.source == source) and (event is None or e.event == event)]
+
+    def close(self):
+        """Write out everything queued for the log file and close it"""
+        if self._file_logger:
+            for handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(handler)
+            self._file_logger = None
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
@@ -0,0 +1,212 @@
+"""Non-blocking mouse and keyboard actuation
+
+The tracking and voice threads hand input events to an InputActuator, which
+exposes the same method names as pyautogui (moveTo, scroll, click, ...) but
+only queues the event and returns. A worker thread applies the events to a
+backend, so slow OS input calls never hold up vision processing.
+
+Pending events are merged until the next button or key event: cursor moves
+collapse to the latest target and scroll deltas add up to one call. Button
+and key events are never merged, reordered or dropped, so press/release/click
+order is kept.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+
+MoveEvent = namedtuple("MoveEvent", ["x", "y"])
+ScrollEvent = namedtuple("ScrollEvent", ["clicks"])
+ButtonEvent = namedtuple("ButtonEvent", ["action"])  # click, rightClick, doubleClick, mouseDown, mouseUp
+KeyEvent = namedtuple("KeyEvent", ["action", "value"])  # write or press
+
+DEFAULT_TICK = 0.008  # Seconds between flushes, so scrolls can accumulate
+DEFAULT_MAX_PENDING = 256
+
+
+class PyAutoGUIBackend:
+    """Applies input events to the real desktop with pyautogui"""
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def execute(self, event):
+        gui = self.pyautogui
+        kind = type(event)
+        # Moves and scrolls skip pyautogui.PAUSE; they are already rate limited by coalescing
+        if kind is MoveEvent:
+            gui.moveTo(event.x, event.y, _pause=False)
+        elif kind is ScrollEvent:
+            gui.scroll(event.clicks, _pause=False)
+        elif kind is ButtonEvent:
+            getattr(gui, event.action)()
+        elif kind is KeyEvent:
+            getattr(gui, event.action)(event.value)
+
+
+class RecordingBackend:
+    """Backend that records executed events with their time instead of acting on them"""
+
+    def __init__(self, delay=0.0):
+        self.events = []
+        self.delay = delay  # Simulated OS input latency per call
+
+    def execute(self, event):
+        if self.delay:
+            time.sleep(self.delay)
+        self.events.append((time.monotonic(), event))
+
+
+class InputActuator:
+    """Queue of input events applied to a backend by a worker thread"""
+
+    def __init__(self, backend=None, tick=DEFAULT_TICK, max_pending=DEFAULT_MAX_PENDING,
+                 on_error=None, metrics=None):
+        self.backend = backend or PyAutoGUIBackend()
+        self.tick = tick
+        self.max_pending = max_pending
+        self.on_error = on_error
+        self.metrics = metrics  # Optional PipelineMetrics for flush timing and counters
+        self.pending = deque()
+        self.enqueued = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    # pyautogui-compatible producer API
+
+    def moveTo(self, x, y):
+        self.submit(MoveEvent(float(x), float(y)))
+
+    def scroll(self, clicks):
+        self.submit(ScrollEvent(int(clicks)))
+
+    def click(self):
+        self.submit(ButtonEvent("click"))
+
+    def rightClick(self):
+        self.submit(ButtonEvent("rightClick"))
+
+    def doubleClick(self):
+        self.submit(ButtonEvent("doubleClick"))
+
+    def mouseDown(self):
+        self.submit(ButtonEvent("mouseDown"))
+
+    def mouseUp(self):
+        self.submit(ButtonEvent("mouseUp"))
+
+    def write(self, text):
+        self.submit(KeyEvent("write", text))
+
+    def press(self, key):
+        self.submit(KeyEvent("press", key))
+
+    def submit(self, event):
+        """Queue an event, merging it with a pending event of the same kind where possible"""
+        with self._cond:
+            self.enqueued += 1
+            if type(event) in (MoveEvent, ScrollEvent) and self._coalesce(event):
+                self.coalesced += 1
+                return
+
+            if len(self.pending) >= self.max_pending:
+                self._drop_one()
+            self.pending.append(event)
+            self._cond.notify()
+
+    def _coalesce(self, event):
+        """Merge a move or scroll into the pending one since the last button or key event"""
+        pending = self.pending
+        kind = type(event)
+        for i in range(len(pending) - 1, -1, -1):
+            other = type(pending[i])
+            if other is ButtonEvent or other is KeyEvent:
+                return False
+            if other is kind:
+                if kind is MoveEvent:
+                    # The cursor target moves to the back so it lands after any scroll
+                    del pending[i]
+                    pending.append(event)
+                else:
+                    pending[i] = ScrollEvent(pending[i].clicks + event.clicks)
+                return True
+        return False
+
+    def _drop_one(self):
+        """Make room by dropping the oldest cursor move, or else the oldest scroll
+
+        Button and key events are never dropped: a lost mouseUp would leave
+        the button held down. With nothing else to drop the queue grows past
+        `max_pending` instead.
+        """
+        for kind in (MoveEvent, ScrollEvent):
+            for i, pending in enumerate(self.pending):
+                if type(pending) is kind:
+                    del self.pending[i]
+                    self.dropped += 1
+                    return
+
+    def start(self):
+        """Start the worker thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Apply any pending events and stop the worker thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        """Apply all pending events on the calling thread"""
+        with self._cond:
+            batch = list(self.pending)
+            self.pending.clear()
+
+        t = self.metrics.now() if self.metrics else 0.0
+        for event in batch:
+            try:
+                self.backend.execute(event)
+                self.executed += 1
+            except Exception as e:
+                self.errors += 1
+                if self.on_error:
+                    self.on_error(event, e)
+
+        if self.metrics and batch:
+            self.metrics.lap("actuate", t)
+            self.metrics.gauges.update(self.stats())
+
+    def stats(self):
+        """Event counters, named for export"""
+        return {
+            "actuator_enqueued_total": self.enqueued,
+            "actuator_executed_total": self.executed,
+            "actuator_coalesced_total": self.coalesced,
+            "actuator_dropped_total": self.dropped,
+            "actuator_errors_total": self.errors,
+            "actuator_pending": len(self.pending),
+        }
+
+    def _run(self):
+        """Worker loop: wait for events, apply them, then give the next batch a tick to build up"""
+        while True:
+            with self._cond:
+                while self._running and not self.pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+            self.flush()
+            if self.tick:
+                time.sleep(self.tick)
@@ -0,0 +1,1402 @@
+"""Microbenchmarks for the gesture pipeline's pure-Python hot paths
+
+Everything runs on synthetic data, so no camera, microphone, display or
+network is needed.
+
+Usage:
+    python benchmark.py fingers [--hands 10000]
+    python benchmark.py filters [--trace trace.csv] [--smoothing 5]
+    python benchmark.py voting [--frames 20000]
+    python benchmark.py governor [--cpu-budget 1.0] [--slo 50]
+    python benchmark.py frames [recording.mp4] [--frames 300]
+    python benchmark.py mapping [--points 100000]
+    python benchmark.py voice [--utterances 6] [--delay 1.0] [--workers 2]
+    python benchmark.py commands [--transcripts 20000]
+    python benchmark.py speech [--messages 20]
+    python benchmark.py events [--events 100000]
+    python benchmark.py startup [--camera 1.0] [--model 1.5]
+    python benchmark.py hands [--frames 2000]
+    python benchmark.py gestures [--trials 50]
+    python benchmark.py cameras [recording.mp4] [--sources 4] [--cost 15] [--mediapipe]
+    python benchmark.py check [--update] [--tolerance 0.3]
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import pickle
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+import filters
+import landmarks
+from capture import IterableSource, open_frame_source
+from eventbus import EventPublisher, encode_event
+from framepool import FramePool
+from governor import DEFAULT_CPU_BUDGET, BudgetGovernor, describe
+from headless import RecordingMouse
+from multicam import HandDetectorPool, mediapipe_hands
+from screenmap import DEFAULT_PROFILE, ScreenMapper
+from synthetic import PINCH, random_walk, synthetic_hand, synthetic_sequence
+from speech import FakeEngine, SpeechWorker
+from startup import Startup
+from temporal import SCROLL_MAX_CLICKS, TemporalGestures, hand_features
+from tracker import GestureTracker
+from voice import TranscriptBackend, VoiceActivityDetector, VoicePipeline, WavFileSource
+from voicecommands import VOICE_COMMANDS, CommandRegistry
+from voting import FingerCountVoter
+
+
+def time_call(fn, number=1000, repeat=5):
+    """Best-of-`repeat` time per call in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e6
+
+
+def print_table(title, rows):
+    """Print (name, microseconds, note) rows"""
+    print(title)
+    for name, us, note in rows:
+        print(f"  {name:<40} {us:10.2f} us  {note}")
+
+
+def legacy_count_fingers(landmarks):
+    """The original tip-above-PIP / thumb +20 px rule on a list of (x, y) ints"""
+    if len(landmarks) < 21:
+        return 0
+    count = 0
+    for tip, pip in zip([8, 12, 16, 20], [6, 10, 14, 18]):
+        if landmarks[tip][1] < landmarks[pip][1]:
+            count += 1
+    if landmarks[4][0] > landmarks[3][0] + 20:
+        count += 1
+    return count
+
+
+def legacy_extract(hand_landmarks, width, height):
+    """The original per-landmark loop building a list of (x, y) ints"""
+    points = []
+    for lm in hand_landmarks.landmark:
+        x, y = int(lm.x * width), int(lm.y * height)
+        points.append((x, y))
+    return points
+
+
+def as_mediapipe_hand(hand, width, height):
+    """Wrap a pixel landmark array in an object shaped like MediaPipe's result"""
+    return SimpleNamespace(landmark=[
+        SimpleNamespace(x=float(x) / width, y=float(y) / height, z=float(z) / width)
+        for x, y, z in hand
+    ])
+
+
+def bench_fingers(args):
+    """Compare the legacy finger counter with the vectorized one"""
+    width, height = 640, 480
+    rng = np.random.default_rng(0)
+    counts = rng.integers(0, 6, args.hands)
+    angles = rng.uniform(-25, 25, args.hands)
+    hands = np.concatenate([
+        synthetic_sequence([c], scale=1.4, angle=a, noise=1.5, seed=i)
+        for i, (c, a) in enumerate(zip(counts, angles))
+    ])
+    points = [[(int(x), int(y)) for x, y, _ in hand] for hand in hands]
+    mp_hand = as_mediapipe_hand(hands[0], width, height)
+    out = landmarks.new_landmark_array()
+
+    legacy = np.array([legacy_count_fingers(p) for p in points])
+    upright = np.array([landmarks.count_fingers_upright(hand) for hand in hands])
+    vectorized = landmarks.count_fingers(hands)
+    sample = range(min(len(hands), 1000))
+
+    rows = [
+        ("extract: list of int tuples (legacy)", time_call(lambda: legacy_extract(mp_hand, width, height), 5000, 7), ""),
+        ("extract: preallocated float32 array", time_call(lambda: landmarks.landmarks_to_array(mp_hand, width, height, out), 5000, 7), ""),
+        ("count: legacy per hand", time_call(lambda: [legacy_count_fingers(points[i]) for i in sample], 5) / len(sample), ""),
+        ("count: upright rule per hand", time_call(lambda: [landmarks.count_fingers_upright(hands[i]) for i in sample], 5) / len(sample), "(one hand)"),
+        ("count: angle rules per hand", time_call(lambda: [landmarks.count_fingers(hands[i]) for i in sample], 5) / len(sample), "(two hands)"),
+        ("count: vectorized batch, per hand", time_call(lambda: landmarks.count_fingers(hands), 5) / len(hands), f"(N={len(hands)})"),
+    ]
+    print_table("Finger classification", rows)
+    print(f"  accuracy vs. ground truth: legacy {np.mean(legacy == counts):.1%}, upright {np.mean(upright == counts):.1%}, "
+          f"angle rules {np.mean(vectorized == counts):.1%} (right hands rotated up to 25 degrees)")
+
+
+def load_trace(path, fps):
+    """Load a cursor trace as (times, points)
+
+    Accepts .npy or .csv files with columns (t, x, y), or just (x, y) in
+    which case frames are assumed to be 1/fps apart.
+    """
+    if path.endswith(".npy"):
+        data = np.load(path)
+    else:
+        data = np.loadtxt(path, delimiter=",", ndmin=2)
+    if data.shape[1] == 2:
+        return np.arange(len(data)) / fps, data
+    return data[:, 0], data[:, 1:3]
+
+
+def bench_filters(args):
+    """Compare cursor filters for jitter, lag and cost on a trace"""
+    if args.trace:
+        times, points = load_trace(args.trace, args.fps)
+        reference = None
+        source = args.trace
+    else:
+        # Synthetic hand path with landmark-like jitter; the clean path is the reference
+        rng = np.random.default_rng(0)
+        reference = random_walk(args.frames, seed=1)
+        points = reference + rng.normal(0.0, args.noise, reference.shape)
+        times = np.arange(args.frames) / args.fps
+        source = f"synthetic random walk, {args.frames} frames, {args.noise} px noise"
+
+    latency = args.latency / 1000.0
+    print(f"Cursor filters at smoothing {args.smoothing}, judged {args.latency:.0f} ms after capture ({source})")
+    print(f"  {'filter':<22} {'jitter px':>10} {'lag ms':>8} {'error px':>9} {'update us':>10}")
+    for name in filters.FILTERS:
+        cursor_filter = filters.make_filter(name, args.smoothing)
+        result = filters.evaluate_filter(cursor_filter, times, points, reference, latency)
+        cost = time_call(lambda: cursor_filter.update(320.0, 240.0, 1.0), 10000)
+        print(f"  {name:<22} {result['jitter_px']:10.2f} {result['lag_ms']:8.1f} "
+              f"{result['error_px']:9.2f} {cost:10.2f}")
+    raw = filters.evaluate_filter(_Passthrough(), times, points, reference, latency)
+    print(f"  {'(unfiltered)':<22} {raw['jitter_px']:10.2f} {raw['lag_ms']:8.1f} {raw['error_px']:9.2f}")
+
+
+class _Passthrough(filters.CursorFilter):
+    """Filter that returns its input, as the unfiltered baseline"""
+
+    def _update(self, x, y, t):
+        return x, y
+
+
+class LegacyVoter:
+    """The original list-based history, most-common count and wall-clock cooldown"""
+
+    def __init__(self, window=5, cooldown=0.5):
+        self.window = window
+        self.cooldown = cooldown
+        self.history = []
+        self.last_finger_count = 0
+        self.last_mode_change_time = None
+
+    def common(self):
+        if not self.history:
+            return 0
+        return max(set(self.history), key=self.history.count)
+
+    def update(self, count, timestamp):
+        self.history.append(count)
+        if len(self.history) > self.window:
+            self.history.pop(0)
+        winner = self.common()  # Called once for the mode actions...
+        common = self.common()  # ...and again for the mode change check
+        if common != self.last_finger_count and (
+                self.last_mode_change_time is None or timestamp - self.last_mode_change_time > self.cooldown):
+            self.last_finger_count = common
+            self.last_mode_change_time = timestamp
+            return common
+        return None
+
+
+def noisy_counts(frames, flicker, seed=0):
+    """Finger counts held for 1-3 s at a time, with a fraction of frames misread"""
+    rng = np.random.default_rng(seed)
+    counts = []
+    while len(counts) < frames:
+        counts += [int(rng.integers(1, 6))] * int(rng.integers(30, 90))
+    counts = np.array(counts[:frames])
+    misread = rng.random(frames) < flicker
+    counts[misread] = rng.integers(0, 6, misread.sum())
+    return counts
+
+
+def bench_voting(args):
+    """Compare the incremental voter with the original finger-count history"""
+    counts = noisy_counts(args.frames, args.flicker).tolist()
+    times = (np.arange(args.frames) / 30.0).tolist()
+    true_changes = sum(1 for a, b in zip(counts, counts[1:]) if a != b)
+
+    def run(voter):
+        transitions = 0
+        for count, t in zip(counts, times):
+            if voter.update(count, t) is not None:
+                transitions += 1
+        return transitions
+
+    print(f"Finger-count voting over {args.frames} frames, {args.flicker:.0%} misread "
+          f"(about {true_changes} raw count changes, most of them noise)")
+    print(f"  {'implementation':<50} {'us/frame':>8} {'transitions':>12}")
+    for window in (5, 15, 30):
+        for name, make in (("legacy list + max(set, count)", lambda: LegacyVoter(window)),
+                           ("incremental voter", lambda: FingerCountVoter(window)),
+                           ("incremental voter, 0.6/0.4 hysteresis",
+                            lambda: FingerCountVoter(window, enter_threshold=0.6, exit_threshold=0.4))):
+            transitions = run(make())
+            cost = time_call(lambda: run(make()), 1, 3) / args.frames
+            print(f"  {name + f' (window {window})':<50} {cost:8.2f} {transitions:12d}")
+
+
+# Synthetic frame cost in ms at each resolution and model complexity, before load
+MODEL_COST_MS = {(640, 1): 16.0, (640, 0): 11.0, (320, 1): 12.0, (320, 0): 7.0}
+PREVIEW_COST_MS = 2.0
+CAMERA_FPS = 30.0
+
+
+def synthetic_frame_cost(rung, load, rng):
+    """Processing time in seconds of one frame at a rung, scaled by background load"""
+    cost = MODEL_COST_MS[(rung.width, rung.model_complexity)] + (PREVIEW_COST_MS if rung.preview else 0.0)
+    return cost * load * rng.lognormal(0.0, 0.15) / 1000.0
+
+
+def bench_governor(args):
+    """Drive the governor with synthetic frame timings under changing background load"""
+    # (seconds, load factor): normal, a heavy background job, a borderline period, back to normal
+    phases = [(30, 1.0), (60, 2.5), (120, 1.6), (60, 1.0)]
+    rng = np.random.default_rng(0)
+    log = []
+    governor = BudgetGovernor(cpu_budget=args.cpu_budget, latency_slo=args.slo / 1000.0 if args.slo else None,
+                              log=lambda message: log.append((t, message)))
+
+    t = 0.0
+    frames = 0
+    time_at_level = Counter()
+    for duration, load in phases:
+        end = t + duration
+        while t < end:
+            rung = governor.rung
+            cost = synthetic_frame_cost(rung, load, rng)
+            # The loop takes the next camera frame, or waits for the FPS cap
+            interval = max(cost, 1.0 / CAMERA_FPS, 1.0 / rung.fps_cap if rung.fps_cap else 0.0)
+            t += interval
+            time_at_level[governor.level] += interval
+            frames += 1
+            governor.observe(cost, t)
+
+    print(f"Governor over {t:.0f} s of synthetic load {[load for _, load in phases]}, "
+          f"CPU budget {args.cpu_budget:.0%}, latency SLO {args.slo:.0f} ms")
+    for when, message in log:
+        print(f"  {when:6.1f} s  {message}")
+    print(f"  {len(governor.steps)} steps over {frames} frames; time at each level:")
+    for level, rung in enumerate(governor.ladder):
+        print(f"    {level}  {describe(rung):<45} {time_at_level[level]:6.1f} s")
+    cost = time_call(lambda: governor.observe(0.01, t), 10000)
+    print(f"  observe(): {cost:.2f} us per frame")
+
+
+class AllocationCounter:
+    """Counts OpenCV calls that had to allocate their output instead of writing to `dst`"""
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+
+    def __call__(self, fn, *args, dst=None, **kwargs):
+        out = fn(*args, dst=dst, **kwargs) if dst is not None else fn(*args, **kwargs)
+        if out is not dst:
+            self.count += 1
+            self.bytes += out.nbytes
+        return out
+
+
+# Hand skeleton drawn as the overlay, standing in for MediaPipe's drawing utilities
+_OVERLAY_EDGES = [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+                  (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (17, 18), (18, 19), (19, 20), (0, 17)]
+
+
+def draw_overlay(image, hand):
+    """Landmarks, connections and finger-count text, as the tracker draws them"""
+    points = [(int(x), int(y)) for x, y, _ in hand]
+    for a, b in _OVERLAY_EDGES:
+        cv2.line(image, points[a], points[b], (255, 255, 255), 2)
+    for point in points:
+        cv2.circle(image, point, 2, (255, 0, 0), 2)
+    cv2.putText(image, "Fingers: 1", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+
+def legacy_frame_path(frame, hand, alloc, max_width=640):
+    """The original per-frame image work: flip, RGB for MediaPipe, draw on BGR, RGB again for Tk"""
+    flipped = alloc(cv2.flip, frame, 1)
+    alloc(cv2.cvtColor, flipped, cv2.COLOR_BGR2RGB)  # MediaPipe input
+    draw_overlay(flipped, hand)
+    preview = alloc(cv2.cvtColor, flipped, cv2.COLOR_BGR2RGB)
+    if preview.shape[1] > max_width:
+        height = int(preview.shape[0] * max_width / preview.shape[1])
+        preview = alloc(cv2.resize, preview, (max_width, height))
+    return preview
+
+
+def pooled_frame_path(frame, hand, alloc, pool, max_width=640, preview=True):
+    """The pooled path: one RGB conversion into a reused buffer, flipped in place, shared with the preview"""
+    rgb = alloc(cv2.cvtColor, frame, cv2.COLOR_BGR2RGB, dst=pool.get("rgb", frame.shape))
+    alloc(cv2.flip, rgb, 1, dst=rgb)
+    if not preview:
+        return rgb
+    draw_overlay(rgb, hand)
+    if rgb.shape[1] > max_width:
+        height = int(rgb.shape[0] * max_width / rgb.shape[1])
+        rgb = alloc(cv2.resize, rgb, (max_width, height), dst=pool.get("preview", (height, max_width, 3)))
+    return rgb
+
+
+def load_frames(source, count, size=(640, 480)):
+    """Up to `count` BGR frames from a recording, or synthetic noise frames without one"""
+    if source is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8) for _ in range(count)]
+    frames = []
+    capture = open_frame_source(source)
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    if hasattr(capture, "release"):
+        capture.release()
+    return frames
+
+
+def bench_frames(args):
+    """Allocations and time per frame for the image work around hand detection"""
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        print(f"No frames in {args.source}")
+        return
+    height, width = frames[0].shape[:2]
+    hand = synthetic_sequence([1], centers=[(width / 2.0, height * 0.7)], scale=height / 480.0)[0]
+
+    def measure(run):
+        alloc = AllocationCounter()
+        started = time.perf_counter()
+        for frame in frames:
+            run(frame, alloc)
+        elapsed = time.perf_counter() - started
+        return elapsed / len(frames) * 1e6, alloc.count / len(frames), alloc.bytes / len(frames) / 1024.0
+
+    pool = FramePool()
+    pooled_frame_path(frames[0], hand, AllocationCounter(), pool)  # Allocate the pool up front
+    variants = [
+        ("legacy: flip, 2x BGR->RGB, draw on BGR", lambda f, a: legacy_frame_path(f, hand, a)),
+        ("pooled: 1x BGR->RGB, in-place flip", lambda f, a: pooled_frame_path(f, hand, a, pool)),
+        ("pooled, preview hidden (no overlay)", lambda f, a: pooled_frame_path(f, hand, a, pool, preview=False)),
+    ]
+
+    print(f"Per-frame image work on {len(frames)} frames of {width}x{height} from {args.source or 'synthetic noise'}")
+    print(f"  {'pipeline':<42} {'us/frame':>9} {'allocs':>7} {'KiB allocated':>14}")
+    for name, run in variants:
+        measure(run)  # Warm up caches
+        us, allocations, kib = min((measure(run) for _ in range(3)), key=lambda r: r[0])
+        print(f"  {name:<42} {us:9.1f} {allocations:7.1f} {kib:14.1f}")
+    print(f"  pool: {pool.allocations} buffers allocated in total")
+
+
+def legacy_map_to_screen(x, y, frame_shape, screen_size):
+    """The original mapping: two np.interp calls with fixed 120 px margins"""
+    cam_height, cam_width = frame_shape[:2]
+    screen_x = np.interp(x, [120, cam_width-120], [0, screen_size[0]])
+    screen_y = np.interp(y, [120, cam_height-120], [0, screen_size[1]])
+    return screen_x, screen_y
+
+
+def bench_mapping(args):
+    """Check the screen mapper against the original mapping and time both"""
+    rng = np.random.default_rng(0)
+    shape = (480, 640, 3)
+    failures = 0
+    print("Default profile against the original mapping")
+    for screen in ((1920, 1080), (2560, 1440), (1366, 768), (3840, 2160)):
+        mapper = ScreenMapper(screen, DEFAULT_PROFILE)
+        # Points inside, on the edges of and outside the active region
+        points = np.concatenate([
+            rng.uniform(-100.0, 740.0, (args.points, 2)),
+            np.array([(120, 120), (520, 360), (120, 360), (520, 120), (0, 0), (640, 480), (320, 240)], float),
+        ])
+        worst = 0.0
+        for x, y in points.tolist():
+            ex, ey = legacy_map_to_screen(x, y, shape, screen)
+            mx, my = mapper.map(x, y, shape)
+            worst = max(worst, abs(ex - mx), abs(ey - my))
+        failures += worst != 0.0
+        print(f"  {screen[0]}x{screen[1]}: {len(points)} points, largest difference {worst:g} px")
+
+    mapper = ScreenMapper((1920, 1080))
+    curved = ScreenMapper((1920, 1080), DEFAULT_PROFILE._replace(gamma=1.5))
+    rows = [
+        ("legacy: 2x np.interp", time_call(lambda: legacy_map_to_screen(300.0, 200.0, shape, (1920, 1080)), 20000), ""),
+        ("mapper: default profile", time_call(lambda: mapper.map(300.0, 200.0, shape), 20000), ""),
+        ("mapper: gamma 1.5 curve", time_call(lambda: curved.map(300.0, 200.0, shape), 20000), ""),
+    ]
+    print_table("Camera-to-screen mapping per point", rows)
+    print("Default profile matches the original mapping" if not failures else
+          "MISMATCH: default profile differs from the original mapping")
+    return 1 if failures else 0
+
+
+VOICE_COMMANDS = ("click", "scroll up", "press enter", "type hello", "double click", "right click",
+                  "scroll down", "press tab")
+
+
+def write_synthetic_utterances(directory, count, sample_rate=16000, seed=0):
+    """WAV files of speech-like tone bursts in low background noise, named after commands
+
+    Returns (path, burst seconds) pairs.
+    """
+    rng = np.random.default_rng(seed)
+    files = []
+    for i in range(count):
+        duration = rng.uniform(0.4, 1.0)
+        t = np.arange(int(sample_rate * duration)) / sample_rate
+        envelope = np.minimum(1.0, np.minimum(t, duration - t) * 20.0)
+        burst = 3000.0 * envelope * np.sin(2.0 * np.pi * 180.0 * t * (1.0 + 0.3 * np.sin(5.0 * t)))
+        pad = np.zeros(int(sample_rate * 0.2))
+        samples = np.concatenate([pad, burst, pad])
+        samples = (samples + rng.normal(0.0, 40.0, len(samples))).astype(np.int16)
+        name = VOICE_COMMANDS[i % len(VOICE_COMMANDS)].replace(" ", "_")
+        path = os.path.join(directory, f"{i:02d}-{name}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(samples.tobytes())
+        files.append((path, duration))
+    return files
+
+
+def alternating_voice(paths, backend, gap):
+    """The original loop: listen for one phrase, then recognise it with the microphone closed"""
+    source = WavFileSource(paths, gap=gap)
+    source.open()
+    vad = VoiceActivityDetector(source.sample_rate, source.sample_width)
+    results = []
+    while True:
+        chunk = source.read()
+        utterance = vad.flush() if chunk is None else vad.feed(chunk, time.monotonic(), source.label)
+        if utterance is not None:
+            text = backend.recognize(utterance)
+            results.append((text, utterance, time.monotonic() - utterance.speech_end))
+            source.skip_to_now()
+        if chunk is None:
+            return results
+
+
+def bench_voice(args):
+    """Compare strict listen-then-recognise with the streaming pipeline on synthetic utterances"""
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_synthetic_utterances(directory, args.utterances)
+        paths = [path for path, _ in files]
+        expected = dict(files)
+        backend = TranscriptBackend(delay=args.delay)
+
+        def summarize(name, results):
+            # Complete: the utterance covers most of the burst, rather than the tail heard after a deaf spell
+            complete = [text for text, utterance, _ in results
+                        if utterance.speech_end - utterance.started >= 0.8 * expected[utterance.label]]
+            latencies = sorted(latency for _, _, latency in results)
+            p50 = latencies[len(latencies) // 2] if latencies else 0.0
+            print(f"  {name:<28} {len(complete)}/{len(files)} commands heard in full, "
+                  f"{len(results) - len(complete)} cut short; latency p50 {p50 * 1000.0:.0f} ms, "
+                  f"max {(latencies[-1] if latencies else 0.0) * 1000.0:.0f} ms")
+            return complete
+
+        print(f"{len(files)} synthetic utterances, {args.gap:.1f} s apart, recognition takes {args.delay:.1f} s")
+        summarize("listen, then recognise", alternating_voice(paths, backend, args.gap))
+
+        results = []
+        pipeline = VoicePipeline(WavFileSource(paths, gap=args.gap), backend, workers=args.workers,
+                                 on_result=lambda text, utterance: results.append(
+                                     (text, utterance, time.monotonic() - utterance.speech_end)))
+        pipeline.start()
+        pipeline.wait()
+        complete = summarize(f"pipeline, {args.workers} workers", results)
+        labels = [utterance.label for _, utterance, _ in results]  # Files are numbered in spoken order
+        in_order = labels == sorted(labels)
+        print(f"  Pipeline results in spoken order: {'yes' if in_order else 'no'}")
+        return 0 if len(complete) == len(files) else 1
+
+
+def legacy_voice_command(command):
+    """The original if/elif command chain, returning the (handler, args) calls instead of making them"""
+    if command in ["click", "click mouse", "left click"]:
+        return [("click", ())]
+    elif command in ["right click", "right mouse"]:
+        return [("rightClick", ())]
+    elif command in ["double click", "double"]:
+        return [("doubleClick", ())]
+    elif "scroll" in command:
+        if "up" in command:
+            return [("scroll", (300,))]
+        elif "down" in command:
+            return [("scroll", (-300,))]
+    elif command.startswith("type "):
+        return [("write", (command[5:],))]
+    elif command.startswith("press "):
+        key = command[6:]
+        special_keys = {
+            "enter": "enter", "space": "space", "tab": "tab",
+            "escape": "escape", "esc": "escape",
+            "up": "up", "down": "down", "left": "left", "right": "right",
+            "backspace": "backspace", "delete": "delete",
+            "home": "home", "end": "end",
+            "page up": "pageup", "page down": "pagedown"
+        }
+        if key in special_keys:
+            return [("press", (special_keys[key],))]
+        else:
+            return [("press", (key,))]
+    elif command in ["hello", "hi there", "hey"]:
+        return [("speak", ("Hello, I'm listening to your commands",))]
+    return []
+
+
+COMMAND_NEAR_MISSES = ("clique", "click mouse please", "right clique", "write click", "dabble click", "scroll app",
+                       "scrolled own", "pressed enter", "tipe hello", "hay", "hi", "clicks", "double clique")
+
+
+def command_corpus(n, distinct=500, seed=0):
+    """Transcripts: every declared phrase, parameterised commands, near misses and unrelated speech
+
+    `n` transcripts are drawn from `distinct` phrases with Zipf-like
+    frequencies, as people repeat the same few commands (and the same
+    mishearings) most of the time.
+    """
+    rng = np.random.default_rng(seed)
+    words = ["hello", "world", "up", "down", "scroll", "type", "press", "enter", "page", "click", "the", "a",
+             "right", "left", "mouse", "double", "space", "tab", "end", "scrolling", "upwards", "downtown"]
+    pool = []
+    for command in VOICE_COMMANDS:
+        pool.extend(getattr(command, "phrases", ()))
+    pool += ["scroll up", "scroll down", "scroll", "scroll upward", "scrolling down please", "type scroll up",
+             "press scroll down", "type", "type ", "press ", "press page up", "press esc", "press q", "double up"]
+    pool += COMMAND_NEAR_MISSES
+    while len(pool) < distinct:
+        kind = rng.integers(4)
+        phrase = " ".join(rng.choice(words, rng.integers(1, 4)))
+        if kind == 1:
+            phrase = "type " + phrase
+        elif kind == 2:
+            phrase = "press " + phrase
+        pool.append(str(phrase))
+    weights = 1.0 / np.arange(1, len(pool) + 1)
+    picks = rng.choice(len(pool), size=max(n - len(pool), 0), p=weights / weights.sum())
+    return pool + [pool[i] for i in picks]
+
+
+def bench_commands(args):
+    """Check the command registry against the original chain, then time both"""
+    calls = []
+    handlers = {name: functools.partial(lambda name, *a: calls.append((name, a)), name)
+                for name in ("click", "rightClick", "doubleClick", "scroll", "write", "press", "speak")}
+    registry = CommandRegistry(handlers=handlers)
+    corpus = command_corpus(args.transcripts)
+
+    def registry_calls(transcript):
+        calls.clear()
+        match = registry.match(transcript)
+        if match is not None:
+            registry.execute(match)
+        return list(calls), match
+
+    mismatches = []
+    recovered = []
+    for transcript in dict.fromkeys(corpus):
+        expected = legacy_voice_command(transcript)
+        actual, match = registry_calls(transcript)
+        if expected:
+            if actual != expected:
+                mismatches.append((transcript, expected, actual))
+        elif match is not None:
+            if not match.fuzzy:
+                mismatches.append((transcript, expected, actual))
+            else:
+                recovered.append((transcript, match.command.name, match.argument))
+
+    print(f"{len(dict.fromkeys(corpus))} distinct transcripts, {len(corpus)} in all")
+    for transcript, expected, actual in mismatches[:10]:
+        print(f"  MISMATCH {transcript!r}: original {expected}, registry {actual}")
+    print(f"  Commands the original chain recognised: {'all identical' if not mismatches else f'{len(mismatches)} differ'}")
+    print(f"  Near misses now recognised by sound: {len(recovered)}")
+    for transcript, name, argument in recovered:
+        if transcript in COMMAND_NEAR_MISSES:
+            print(f"    {transcript!r} -> {name}" + (f" {argument!r}" if argument else ""))
+
+    def run_legacy():
+        for transcript in corpus:
+            legacy_voice_command(transcript)
+
+    def run_registry():
+        for transcript in corpus:
+            registry.match(transcript)
+
+    cold = CommandRegistry()
+    started = time.perf_counter()
+    for transcript in corpus:
+        cold.match(transcript)
+    cold_us = (time.perf_counter() - started) / len(corpus) * 1e6
+    rows = [
+        ("original if/elif chain", time_call(run_legacy, 1, 3) / len(corpus), "no fuzzy matching"),
+        ("registry, fuzzy cache cold", cold_us, f"{cold.stats()['voice_commands_fuzzy_cache_misses_total']} fuzzy lookups"),
+        ("registry, fuzzy cache warm", time_call(run_registry, 1, 3) / len(corpus), ""),
+        ("registry, 3 alternatives", time_call(lambda: registry.match(["clique", "click", "quick"]), 10000),
+         f"-> {registry.match(['clique', 'click', 'quick']).transcript!r}"),
+    ]
+    print_table("Time per transcript", rows)
+    return 1 if mismatches else 0
+
+
+def bench_speech(args):
+    """Thread-per-message speech against the speech worker, with a fake engine"""
+    phrases = ["Simplified Gesture Control is ready", "Hello, I'm listening to your commands", "Drag ended"]
+    messages = [phrases[i % len(phrases)] for i in range(args.messages)]
+    delay = args.ms_per_char / 1000.0
+
+    # The original: a new thread per message, all driving the same engine
+    engine = FakeEngine(delay)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=engine.say, args=(text,)) for text in messages]
+    for thread in threads:
+        thread.start()
+        time.sleep(args.interval / 1000.0)
+    for thread in threads:
+        thread.join()
+    print(f"{args.messages} messages, {args.interval:.0f} ms apart, {args.ms_per_char:.0f} ms per character to synthesise")
+    print(f"  thread per message:  up to {engine.max_active} engine calls at once, "
+          f"{len(engine.spoken)} spoken, {time.perf_counter() - started:.2f} s")
+
+    # The worker: one engine call at a time, without a cache, then with an empty and a warm one
+    with tempfile.TemporaryDirectory() as directory:
+        for label, cache in (("speech worker, no cache", None), ("speech worker, cold cache", directory),
+                             ("speech worker, warm cache", directory)):
+            engine = FakeEngine(delay)
+            heard = []  # When each message started to be heard
+            say = engine.say
+            engine.say = lambda text: (say(text), heard.append(time.perf_counter()))  # Heard once synthesised
+            worker = SpeechWorker(engine, cache_dir=cache,
+                                  player=lambda path: heard.append(time.perf_counter()) or True).start()
+            started = time.perf_counter()
+            for text in messages:
+                worker.speak(text, max_age=None)
+                time.sleep(args.interval / 1000.0)
+            while worker.pending() or worker.spoken + worker.merged < len(messages):
+                time.sleep(0.005)
+            worker.stop()
+            stats = worker.stats()
+            first = (heard[0] - started) * 1000.0 if heard else 0.0
+            print(f"  {label + ':':<27} up to {engine.max_active} engine call at once, "
+                  f"{stats['speech_spoken_total']} spoken, {stats['speech_merged_total']} merged, "
+                  f"{stats['speech_cache_misses_total']} synthesised, first heard after {first:.0f} ms")
+
+
+def percentiles_us(samples):
+    us = np.asarray(samples) * 1e6
+    return "p50 {:.1f}  p99 {:.1f}  max {:.1f} us".format(*np.percentile(us, [50, 99, 100]))
+
+
+def stuck_subscriber(address):
+    """A connection that never reads, with a small receive buffer so it fills quickly"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(address)
+    return sock
+
+
+def bench_events(args):
+    """Cost of publishing an event, with a reading subscriber and one that never reads"""
+    events = [("action", {"action": "moveTo", "args": [float(i % 1920), float(i % 1080)]}) if i % 10 else
+              ("action", {"action": "click", "args": []}) for i in range(args.events)]
+
+    # A naive server: blocking sends to each subscriber in turn, from the tracking thread
+    server = socket.create_server(("127.0.0.1", 0))
+    stuck = stuck_subscriber(server.getsockname())
+    conn, _ = server.accept()
+    conn.settimeout(args.stall)
+    sent = 0
+    try:
+        for kind, fields in events:
+            conn.sendall(encode_event(dict(seq=sent, t=time.time(), type=kind, **fields)))
+            sent += 1
+    except socket.timeout:
+        pass
+    print(f"{args.events} events, one every {args.interval:.2f} ms")
+    if sent < args.events:
+        print(f"  blocking send:   stalled for {args.stall:.1f} s after {sent} events to a subscriber that never reads")
+    for sock in (conn, stuck, server):
+        sock.close()
+
+    def run(label, readers, stuck_readers):
+        publisher = EventPublisher("127.0.0.1:0", max_pending=args.max_pending).start()
+        address = publisher.address_text
+        code = f"from eventbus import subscribe\nprint(sum(1 for _ in subscribe({address!r})))"
+        processes = [subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+                     for _ in range(readers)]
+        stuck = [stuck_subscriber(publisher.address) for _ in range(stuck_readers)]
+        deadline = time.monotonic() + 5.0
+        while publisher.subscriber_count() < readers + stuck_readers and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        latencies = []
+        for kind, fields in events:
+            started = time.perf_counter()
+            publisher.publish(kind, **fields)
+            latencies.append(time.perf_counter() - started)
+            if args.interval:
+                time.sleep(args.interval / 1000.0)
+        time.sleep(0.5)
+        stats = publisher.stats()
+        publisher.stop()
+        received = [int(p.communicate(timeout=10)[0] or 0) - 1 for p in processes]  # Less the hello event
+        for sock in stuck:
+            sock.close()
+        delivered = f", readers got {min(received)}-{max(received)}" if received else ""
+        print(f"  {label:<16} {percentiles_us(latencies)}, {stats['events_dropped_total']} dropped{delivered}")
+
+    run("no subscribers:", 0, 0)
+    run(f"{args.readers} readers:", args.readers, 0)
+    run(f"{args.readers} + 1 stuck:", args.readers, 1)
+
+
+class StubDevices:
+    """Camera, hand model, TTS engine and microphone that take as long to start as asked"""
+
+    def __init__(self, args):
+        self.args = args
+
+    def camera(self):
+        time.sleep(self.args.camera)
+        return IterableSource(np.zeros((480, 640, 3), np.uint8) for _ in range(10))
+
+    def model(self):
+        time.sleep(self.args.model)
+        return lambda frame: time.sleep(self.args.inference)
+
+    def tts(self):
+        time.sleep(self.args.tts)
+
+    def microphone(self):
+        time.sleep(self.args.microphone)
+
+    def window(self):
+        time.sleep(self.args.window)
+
+
+def track_first_frame(camera, model):
+    ok, frame = camera.read()
+    model(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def bench_startup(args):
+    """Time to window, first tracked frame and listening, from the start of the app, with stub devices
+
+    Tracking and voice are switched on as soon as the window appears.
+    """
+    devices = StubDevices(args)
+
+    # The original: everything in turn before the window, then a noise calibration whenever voice starts
+    started = time.perf_counter()
+    devices.microphone()
+    devices.tts()
+    model = devices.model()
+    devices.window()
+    camera = devices.camera()
+    window = time.perf_counter() - started
+    track_first_frame(camera, model)
+    first_frame = time.perf_counter() - started
+    time.sleep(args.calibration)
+    listening = time.perf_counter() - started
+    serial = (window, first_frame, listening)
+
+    # Background start-up: camera, model and TTS load side by side, the microphone when voice is first used
+    startup = Startup()
+    startup.add("camera", devices.camera)
+    startup.add("hand model", devices.model)
+    startup.add("speech", devices.tts)
+    startup.add("voice", devices.microphone, lazy=True)
+    devices.window()
+    startup.mark("window")
+    startup.load("voice").add_done_callback(lambda _: startup.mark("listening"))
+    track_first_frame(startup.result("camera"), startup.result("hand model"))
+    startup.mark("first frame")
+    startup.result("voice")
+    times = startup.times
+    background = (times["window"], times["first frame"], times["listening"])
+
+    print(f"Stub devices: camera {args.camera:.2f} s, hand model {args.model:.2f} s, TTS {args.tts:.2f} s, "
+          f"microphone {args.microphone:.2f} s, window {args.window:.2f} s, noise calibration {args.calibration:.2f} s")
+    print(f"  {'':<22} {'window':>8} {'first frame':>12} {'listening':>10}")
+    for label, (window, first_frame, listening) in (("in turn", serial), ("in the background", background)):
+        print(f"  {label:<22} {window:7.2f}s {first_frame:11.2f}s {listening:9.2f}s")
+    print(f"  Load times: " + ", ".join(f"{name} {times[name]:.2f} s"
+                                        for name in ("camera", "hand model", "speech", "voice")))
+
+
+def hand_results(hands, labels, width, height):
+    """MediaPipe-shaped results holding pixel landmark arrays, with their handedness"""
+    return SimpleNamespace(
+        multi_hand_landmarks=[as_mediapipe_hand(hand, width, height) for hand in hands],
+        multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label=label, score=0.9)])
+                          for label in labels])
+
+
+def bench_hands(args):
+    """Per-frame gesture logic for one hand, and what tracking a second hand adds
+
+    Detection isn't included: MediaPipe's own cost grows with the number of
+    hands whatever the logic after it does.
+    """
+    width, height = 640, 480
+    frame = np.zeros((height, width, 3), np.uint8)
+    pointer = synthetic_sequence([1], centers=[(420.0, 300.0)])[0]
+    chord = synthetic_sequence([2], centers=[(200.0, 300.0)])[0]
+    one = hand_results([pointer], ["Right"], width, height)
+    both = hand_results([chord, pointer], ["Left", "Right"], width, height)
+
+    def per_frame(max_hands, results):
+        tracker = GestureTracker(RecordingMouse(), (1920, 1080), hands=SimpleNamespace(), max_hands=max_hands)
+        tracker.draw_overlays = False
+        tracker.timestamp = 0.0
+
+        def frame_logic():
+            tracker.mouse.actions.clear()  # Keep the recording from growing
+            tracker.process_hand_landmarks(frame, results)
+        return time_call(frame_logic, args.frames)
+
+    single = per_frame(1, one)
+    rows = [
+        ("one hand (default)", single, ""),
+        ("two hands enabled, one in view", per_frame(2, one), ""),
+        ("two hands in view", per_frame(2, both), "(pointer steers, other hand scrolls)"),
+    ]
+    print_table("Gesture logic per frame", [(name, us, f"{us / single:4.2f}x {note}".rstrip())
+                                           for name, us, note in rows])
+
+
+def gesture_segments(rng, fps=30.0):
+    """Scripted scenarios as (name, expected gestures, [(fingers, wrist path)] segments)"""
+    def still(fingers, seconds, at):
+        return fingers, np.tile(at, (int(seconds * fps), 1))
+
+    def move(fingers, seconds, start, end):
+        steps = np.linspace(0.0, 1.0, int(seconds * fps))[:, None]
+        # Eased, as a real hand speeds up and slows down
+        eased = (1.0 - np.cos(np.pi * steps)) / 2.0
+        return fingers, np.asarray(start) + eased * (np.asarray(end) - np.asarray(start))
+
+    centre = np.array([320.0, 300.0]) + rng.uniform(-40.0, 40.0, 2)
+    left, right = centre - (160.0, 0.0), centre + (160.0, 0.0)
+    return [
+        ("swipe left", ["swipe_left"], [still(5, 0.2, right), move(5, 0.25, right, left), still(5, 0.2, left)]),
+        ("swipe right", ["swipe_right"], [still(5, 0.2, left), move(5, 0.25, left, right), still(5, 0.2, right)]),
+        ("pinch", ["pinch"], [still(1, 0.3, centre), still(PINCH, 0.2, centre), still(1, 0.3, centre)]),
+        ("hold open hand", ["grab"], [still(5, 0.8, centre)]),
+        ("slow open-hand drift", [], [move(5, 3.0, left, right)]),
+        ("pointing around", [], [(1, random_walk(int(2.0 * fps), start=centre, seed=int(rng.integers(1 << 30))))]),
+        ("slow vertical wave", [], [move(5, 0.6, centre - (0.0, 60.0), centre + (0.0, 60.0)),
+                                    move(5, 0.6, centre + (0.0, 60.0), centre - (0.0, 60.0))]),
+    ]
+
+
+def bench_gestures(args):
+    """Temporal gestures on scripted synthetic trajectories: detections, false alarms and per-frame cost"""
+    fps = 30.0
+    rng = np.random.default_rng(0)
+    engine = TemporalGestures()
+    results = {}  # scenario -> [trials right, trials]
+    costs = []
+    for trial in range(args.trials):
+        scale = rng.uniform(0.8, 1.5)
+        angle = rng.uniform(-20.0, 20.0)
+        for name, expected, segments in gesture_segments(rng, fps):
+            engine.reset()
+            fired = []
+            t = trial * 100.0
+            for fingers, path in segments:
+                for wrist in path:
+                    hand = synthetic_hand(fingers, wrist, scale, angle, args.noise, rng)
+                    count = 2 if fingers == PINCH else fingers
+                    begin = time.perf_counter()
+                    for gesture in engine.update(hand, t, count):
+                        fired.append((gesture.name, t))
+                    costs.append(time.perf_counter() - begin)
+                    t += 1.0 / fps
+            entry = results.setdefault(name, [0, 0])
+            entry[0] += [gesture for gesture, _ in fired] == expected
+            entry[1] += 1
+
+    costs = np.array(costs) * 1e6
+    print(f"Temporal gestures over {args.trials} trials of each scenario "
+          f"(hands scaled 0.8-1.5x, rotated up to 20 degrees, {args.noise} px jitter)")
+    print(f"  {'scenario':<24} {'expected':<14} {'right':>7}")
+    for name, expected, _ in gesture_segments(np.random.default_rng(0), fps):
+        right, trials = results[name]
+        print(f"  {name:<24} {', '.join(expected) or '(nothing)':<14} {right / trials:7.0%}")
+    print(f"  update: p50 {np.percentile(costs, 50):.1f} us, p99 {np.percentile(costs, 99):.1f} us per frame; "
+          f"{np.count_nonzero(costs > 1000.0)} of {len(costs)} frames over the 1000 us budget")
+
+    hands = synthetic_sequence(rng.integers(0, 6, 10000), random_walk(10000), noise=1.5)
+    batch = time_call(lambda: hand_features(hands), 1, 5) / len(hands)
+    print(f"  hand_features over a batch of {len(hands)}: {batch:.3f} us per hand")
+
+    # Velocity-proportional scrolling, against the fixed step of 10 per frame
+    print(f"  scroll clicks per frame by vertical hand speed (fixed: 10):")
+    speeds = (0.0, 0.5, 1.0, 2.0, 4.0)
+    row = []
+    for speed in speeds:
+        engine.reset()
+        t, clicks = 0.0, 0
+        for i in range(10):
+            hand = synthetic_hand(2, (320.0, 300.0 - speed * 95.0 * t), 1.0)
+            engine.update(hand, t, 2)
+            clicks = engine.scroll_clicks(1)
+            t += 1.0 / fps
+        row.append(f"{speed:g} hand/s: {clicks}")
+    print("    " + ", ".join(row) + f" (at most {SCROLL_MAX_CLICKS})")
+
+
+class SimulatedHands:
+    """Hands stand-in that holds the interpreter for `cost` seconds per frame and finds one hand
+
+    Pure-Python work, so threads in one process take turns at it, as they
+    would at MediaPipe's Python-side work.
+    """
+
+    def __init__(self, max_hands=1, cost=0.015):
+        self.cost = cost
+        hand = synthetic_sequence([1])[0] / (640.0, 480.0, 640.0)
+        self.results = SimpleNamespace(
+            multi_hand_landmarks=[as_mediapipe_hand(hand, 1.0, 1.0)],
+            multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label="Right", score=0.9)])])
+
+    def process(self, rgb_frame):
+        deadline = time.thread_time() + self.cost
+        while time.thread_time() < deadline:
+            pass
+        return self.results
+
+
+def write_camera_videos(directory, frames, count):
+    """`count` MJPG files of `frames`, each starting at a different frame, to stand in for cameras"""
+    paths = []
+    height, width = frames[0].shape[:2]
+    for i in range(count):
+        path = os.path.join(directory, f"camera{i}.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (width, height))
+        for frame in frames[i:] + frames[:i]:
+            writer.write(frame)
+        writer.release()
+        paths.append(path)
+    return paths
+
+
+def threaded_cameras(paths, factory, kwargs):
+    """Frames per second with a thread and a model per camera, all in this process"""
+    done = []
+
+    def run(path):
+        model = factory(**kwargs)
+        capture = open_frame_source(path)
+        frames = 0
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            model.process(cv2.flip(rgb, 1, dst=rgb))
+            frames += 1
+        capture.release()
+        done.append(frames)
+
+    threads = [threading.Thread(target=run, args=(path,)) for path in paths]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / (time.perf_counter() - started)
+
+
+def pooled_cameras(paths, workers, factory, kwargs):
+    """Frames per second with the cameras' detection in `workers` processes; every frame is detected"""
+    pool = HandDetectorPool(len(paths), workers, hands_factory=factory, factory_kwargs=kwargs).start()
+    captures = [open_frame_source(path) for path in paths]
+    try:
+        # Let the workers start and load their models before timing
+        for source in range(len(paths)):
+            pool.submit(source, np.zeros(pool.frame_shape + (3,), np.uint8), -1, 0.0)
+        while pool.in_flight():
+            pool.collect()
+
+        started = time.perf_counter()
+        frames = 0
+        open_sources = set(range(len(paths)))
+        while open_sources or pool.in_flight():
+            for source in sorted(open_sources):
+                if pool.in_flight(source) < pool.slots:
+                    ok, frame = captures[source].read()
+                    if not ok:
+                        open_sources.discard(source)
+                        continue
+                    pool.submit(source, frame, frames, time.monotonic())
+            if pool.collect(timeout=1.0 if not open_sources else 0.001) is not None:
+                frames += 1
+        return frames / (time.perf_counter() - started)
+    finally:
+        for capture in captures:
+            capture.release()
+        pool.stop()
+
+
+def bench_cameras(args):
+    """Detection throughput for several cameras: threads in one process against a pool of worker processes"""
+    frames = load_frames(args.source, args.frames)
+    if args.mediapipe:
+        factory, kwargs, model = mediapipe_hands, {}, "MediaPipe Hands"
+    else:
+        factory, kwargs, model = SimulatedHands, {"cost": args.cost / 1000.0}, f"simulated {args.cost:g} ms model"
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_camera_videos(directory, frames, args.sources)
+        print(f"{args.sources} video files of {len(frames)} frames standing in for cameras, {model}, "
+              f"{os.cpu_count()} CPUs")
+        print(f"  {'detection':<36} {'frames/s':>9} {'speed-up':>9}")
+        base = threaded_cameras(paths, factory, kwargs)
+        print(f"  {'threads in one process':<36} {base:9.1f} {1.0:8.2f}x")
+        for workers in range(1, args.sources + 1):
+            fps = pooled_cameras(paths, workers, factory, kwargs)
+            print(f"  {f'{workers} worker process' + ('es' if workers > 1 else ''):<36} {fps:9.1f} {fps / base:8.2f}x")
+
+    # What handing a frame to a worker costs the sending process
+    frame = frames[0]
+    slot = np.empty_like(frame)
+    pickled = time_call(lambda: pickle.loads(pickle.dumps(frame)), 200)
+    shared = time_call(lambda: np.copyto(slot, frame), 200)
+    print(f"  hand-off of one {frame.shape[1]}x{frame.shape[0]} frame: pickled {pickled:.0f} us, "
+          f"copied into shared memory {shared:.0f} us")
+
+# Regression check: hot paths timed on fixed inputs, against results kept in the repo
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.3  # Allowed slow-down of the mean time per call
+DEFAULT_LATENCY_TOLERANCE = 1.0  # Allowed slow-down of the 99th percentile; single calls are noisier
+
+
+def reference_work():
+    """Fixed mix of interpreter and small-array NumPy work; check timings are kept in units of it
+
+    Each timed pass is paired with a run of it just before, so a busy or
+    slower machine slows both and the ratio holds; that is also what makes
+    a baseline recorded on one machine usable on another, within reason.
+    """
+    values = list(range(300))
+    a = np.arange(63, dtype=np.float32).reshape(21, 3)
+
+    def work():
+        total = 0
+        for v in values:
+            total += v * v
+        return total + float((a @ a.T).sum())
+    return work
+
+
+def check_count_fingers():
+    """landmarks.count_fingers on rotated, jittered single hands"""
+    rng = np.random.default_rng(0)
+    hands = np.concatenate([synthetic_sequence([int(c)], scale=1.4, angle=a, noise=1.5, seed=i)
+                            for i, (c, a) in enumerate(zip(rng.integers(0, 6, 2000), rng.uniform(-25, 25, 2000)))])
+    out = []
+    return len(hands), lambda i: out.append(int(landmarks.count_fingers(hands[i]))), lambda: out
+
+
+def check_finger_vote():
+    """FingerCountVoter.update on held counts with 10% misread; the winner and transitions"""
+    counts = noisy_counts(20000, 0.1).tolist()
+    voter = FingerCountVoter()
+    out = []
+
+    def step(i):
+        transition = voter.update(counts[i], i / 30.0)
+        out.append(voter.winner if transition is None else (voter.winner, transition.count))
+    return len(counts), step, lambda: out
+
+
+def check_navigation():
+    """Navigation mode's cursor filter and screen mapping on a pointing hand's random walk"""
+    hands = synthetic_sequence([1] * 3000, random_walk(3000, seed=1), noise=1.0, seed=1)
+    tracker = GestureTracker(RecordingMouse(), (1920, 1080), hands=SimpleNamespace())
+    shape = (480, 640, 3)
+
+    def step(i):
+        tracker.timestamp = i / 30.0
+        tracker.handle_navigation_mode(hands[i], shape)
+    return len(hands), step, lambda: tracker.mouse.actions
+
+
+def check_mode_changes():
+    """process_landmarks on noisy finger counts: votes, mode switches and each mode's actions"""
+    counts = noisy_counts(3000, 0.1, seed=2)
+    hands = synthetic_sequence(counts, random_walk(3000, seed=2), noise=1.0, seed=2)
+    mouse = RecordingMouse()
+    modes = []
+    tracker = GestureTracker(mouse, (1920, 1080), hands=SimpleNamespace(),
+                             on_mode_change=lambda mode: modes.append((mouse.frame, mode.name)))
+    shape = (480, 640, 3)
+
+    def step(i):
+        mouse.frame = i
+        tracker.timestamp = i / 30.0
+        tracker.process_landmarks(hands[i], shape)
+    return len(hands), step, lambda: [mouse.actions, modes]
+
+
+def check_gestures():
+    """TemporalGestures.update over the scripted swipe, pinch and hold scenarios"""
+    rng = np.random.default_rng(3)
+    frames = []
+    for _ in range(4):
+        for _, _, segments in gesture_segments(rng):
+            for fingers, path in segments:
+                hands = synthetic_sequence([fingers] * len(path), path, noise=1.5, seed=len(frames))
+                frames += [(hand, 1 if fingers == PINCH else fingers) for hand in hands]
+    temporal = TemporalGestures()
+    out = []
+
+    def step(i):
+        hand, fingers = frames[i]
+        for gesture in temporal.update(hand, i / 30.0, fingers):
+            out.append((i, gesture.name))
+    return len(frames), step, lambda: out
+
+
+def check_voice_commands():
+    """CommandRegistry.match and execute over a transcript corpus, fuzzy cache warmed"""
+    calls = []
+    handlers = {name: functools.partial(lambda name, *a: calls.append((name, a)), name)
+                for name in ("click", "rightClick", "doubleClick", "scroll", "write", "press", "speak")}
+    registry = CommandRegistry(handlers=handlers)
+    corpus = command_corpus(5000)
+    for transcript in corpus:
+        registry.match(transcript)
+
+    def step(i):
+        match = registry.match(corpus[i])
+        if match is not None:
+            registry.execute(match)
+    return len(corpus), step, lambda: calls
+
+
+# name -> setup() returning (calls, step(i), outputs()); each setup starts from fresh state
+CHECKS = {
+    "count_fingers": check_count_fingers,
+    "finger_vote": check_finger_vote,
+    "navigation": check_navigation,
+    "mode_changes": check_mode_changes,
+    "gestures": check_gestures,
+    "voice_commands": check_voice_commands,
+}
+
+
+def digest(outputs):
+    """Short fingerprint of a check's outputs, to tell whether behaviour changed"""
+    return hashlib.sha1(json.dumps(outputs, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def run_check(setup, repeat, work):
+    """Check result: us per call and at p99, the same in units of `work`, and the output digest
+
+    Each is the median over `repeat` passes, each pass in ratio to `work`
+    timed just before it.
+    """
+    clock = time.perf_counter
+    passes = []
+    for _ in range(repeat):
+        reference = time_call(work, 200, 1)
+        calls, step, outputs = setup()
+        latencies = np.empty(calls)
+        for i in range(calls):
+            started = clock()
+            step(i)
+            latencies[i] = clock() - started
+        mean, p99 = latencies.mean() * 1e6, np.percentile(latencies, 99) * 1e6
+        passes.append((mean, p99, mean / reference, p99 / reference))
+    mean, p99, cost, p99_cost = np.median(passes, axis=0).tolist()
+    return {"us": round(mean, 3), "p99_us": round(p99, 3), "cost": round(cost, 4), "p99_cost": round(p99_cost, 4),
+            "digest": digest(outputs())}
+
+
+def bench_check(args):
+    """Time the checks against the stored baseline; 1 if anything got slower or behaves differently"""
+    work = reference_work()
+    results = {name: run_check(setup, args.repeat, work) for name, setup in CHECKS.items()}
+
+    if args.update:
+        baseline = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                    "reference_us": round(time_call(work, 2000, 5), 3), "checks": results}
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        for name, result in results.items():
+            print(f"  {name:<16} {result['us']:8.2f} us  p99 {result['p99_us']:8.2f} us  {result['digest']}")
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; record one with --update")
+        return 1
+    print(f"Regression check against {args.baseline}; allowed slow-down "
+          f"{args.tolerance:.0%} per call, {args.latency_tolerance:.0%} at p99, relative to the reference work")
+    print(f"  {'check':<16} {'us/call':>9} {'change':>7} {'p99 us':>9} {'change':>7}  status")
+    failures = 0
+    for name, result in results.items():
+        expected = baseline["checks"].get(name)
+        if expected is None:
+            print(f"  {name:<16} {result['us']:9.2f} {'':>7} {result['p99_us']:9.2f} {'':>7}  NEW")
+            continue
+        change = result["cost"] / expected["cost"] - 1.0
+        p99_change = result["p99_cost"] / expected["p99_cost"] - 1.0
+        if change > args.tolerance or p99_change > args.latency_tolerance:
+            # Measure once more before calling it a regression; a burst of other load can last a pass or two
+            again = run_check(CHECKS[name], args.repeat, work)
+            if again["cost"] < result["cost"]:
+                result = again
+                change = result["cost"] / expected["cost"] - 1.0
+            p99_change = min(p99_change, again["p99_cost"] / expected["p99_cost"] - 1.0)
+        problems = []
+        if result["digest"] != expected["digest"]:
+            problems.append("OUTPUT CHANGED")
+        if change > args.tolerance:
+            problems.append("SLOWER")
+        if p99_change > args.latency_tolerance:
+            problems.append("P99 SLOWER")
+        failures += bool(problems)
+        print(f"  {name:<16} {result['us']:9.2f} {change:+7.0%} {result['p99_us']:9.2f} {p99_change:+7.0%}  "
+              f"{', '.join(problems) or 'ok'}")
+    print(f"  {failures} of {len(results)} checks failed" if failures else "  all checks passed")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture pipeline microbenchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fingers = commands.add_parser("fingers", help="landmark extraction and finger counting")
+    fingers.add_argument("--hands", type=int, default=10000, help="number of synthetic hands")
+    fingers.set_defaults(run=bench_fingers)
+
+    cursor = commands.add_parser("filters", help="cursor filter jitter, lag and cost")
+    cursor.add_argument("--trace", help="recorded cursor trace (.csv or .npy with t,x,y or x,y columns)")
+    cursor.add_argument("--smoothing", type=int, default=filters.DEFAULT_SMOOTHING, help="slider level 1-10")
+    cursor.add_argument("--latency", type=float, default=50.0,
+                        help="capture-to-actuation delay in ms the cursor is judged against")
+    cursor.add_argument("--fps", type=float, default=30.0, help="frame rate for traces without timestamps")
+    cursor.add_argument("--frames", type=int, default=3000, help="length of the synthetic trace")
+    cursor.add_argument("--noise", type=float, default=2.0, help="jitter of the synthetic trace in pixels")
+    cursor.set_defaults(run=bench_filters)
+
+    voting = commands.add_parser("voting", help="finger-count voting and mode transitions")
+    voting.add_argument("--frames", type=int, default=20000, help="length of the synthetic count sequence")
+    voting.add_argument("--flicker", type=float, default=0.2, help="fraction of misread frames")
+    voting.set_defaults(run=bench_voting)
+
+    budget = commands.add_parser("governor", help="CPU-budget governor driven by synthetic frame timings")
+    budget.add_argument("--cpu-budget", type=float, default=DEFAULT_CPU_BUDGET, help="CPU seconds per second, e.g. 1.0 for one core")
+    budget.add_argument("--slo", type=float, default=50.0, help="per-frame latency target in ms (0 to ignore)")
+    budget.set_defaults(run=bench_governor)
+
+    images = commands.add_parser("frames", help="allocations and time of the per-frame image work")
+    images.add_argument("source", nargs="?", help="video file or directory of frames (default: synthetic frames)")
+    images.add_argument("--frames", type=int, default=300, help="number of frames to use")
+    images.set_defaults(run=bench_frames)
+
+    mapping = commands.add_parser("mapping", help="camera-to-screen mapping equivalence and cost")
+    mapping.add_argument("--points", type=int, default=100000, help="random points per screen size")
+    mapping.set_defaults(run=bench_mapping)
+
+    speech = commands.add_parser("voice", help="voice pipeline latency and missed commands, with simulated recognition")
+    speech.add_argument("--utterances", type=int, default=6, help="number of synthetic utterances")
+    speech.add_argument("--gap", type=float, default=0.6, help="seconds of silence between utterances")
+    speech.add_argument("--delay", type=float, default=1.0, help="simulated recognition time in seconds")
+    speech.add_argument("--workers", type=int, default=2, help="recognition workers in the pipeline")
+    speech.set_defaults(run=bench_voice)
+
+    grammar = commands.add_parser("commands", help="voice command matching, against the original command chain")
+    grammar.add_argument("--transcripts", type=int, default=20000, help="size of the transcript corpus")
+    grammar.set_defaults(run=bench_commands)
+
+    tts = commands.add_parser("speech", help="text-to-speech worker, queue merging and phrase cache, with a fake engine")
+    tts.add_argument("--messages", type=int, default=20, help="messages to speak")
+    tts.add_argument("--interval", type=float, default=20.0, help="ms between messages")
+    tts.add_argument("--ms-per-char", type=float, default=5.0, help="simulated synthesis time per character")
+    tts.set_defaults(run=bench_speech)
+
+    bus = commands.add_parser("events", help="event publishing cost and backpressure, over localhost TCP")
+    bus.add_argument("--events", type=int, default=100000, help="events to publish")
+    bus.add_argument("--interval", type=float, default=0.0, help="ms between events; 0 publishes flat out")
+    bus.add_argument("--readers", type=int, default=2, help="subscriber processes reading every event")
+    bus.add_argument("--max-pending", type=int, default=512, help="events queued per subscriber")
+    bus.add_argument("--stall", type=float, default=1.0, help="seconds a blocking send may wait")
+    bus.set_defaults(run=bench_events)
+
+    boot = commands.add_parser("startup", help="time to window and first tracked frame, with stub devices")
+    boot.add_argument("--camera", type=float, default=1.0, help="seconds to open the camera")
+    boot.add_argument("--model", type=float, default=1.5, help="seconds to import MediaPipe and load the hand model")
+    boot.add_argument("--tts", type=float, default=0.5, help="seconds to start the TTS engine")
+    boot.add_argument("--microphone", type=float, default=0.5, help="seconds to set up speech recognition")
+    boot.add_argument("--window", type=float, default=0.3, help="seconds to build the window")
+    boot.add_argument("--inference", type=float, default=0.03, help="seconds of hand detection per frame")
+    boot.add_argument("--calibration", type=float, default=0.5,
+                      help="seconds of ambient-noise calibration at each voice start, as originally")
+    boot.set_defaults(run=bench_startup)
+
+    both = commands.add_parser("hands", help="per-frame gesture logic with one hand and with two")
+    both.add_argument("--frames", type=int, default=2000)
+    both.set_defaults(run=bench_hands)
+
+    temporal = commands.add_parser("gestures", help="swipe, pinch and hold recognition on synthetic trajectories")
+    temporal.add_argument("--trials", type=int, default=50)
+    temporal.add_argument("--noise", type=float, default=1.5, help="landmark jitter in pixels (default: %(default)s)")
+    temporal.set_defaults(run=bench_gestures)
+
+    cameras = commands.add_parser("cameras", help="multi-camera detection throughput across worker processes")
+    cameras.add_argument("source", nargs="?", help="recording whose frames every stand-in camera plays")
+    cameras.add_argument("--sources", type=int, default=4, help="cameras, and the most workers tried (default: %(default)s)")
+    cameras.add_argument("--frames", type=int, default=120, help="frames per camera (default: %(default)s)")
+    cameras.add_argument("--cost", type=float, default=15.0,
+                         help="ms of interpreter-bound work per frame for the simulated model (default: %(default)s)")
+    cameras.add_argument("--mediapipe", action="store_true", help="detect with MediaPipe instead of the simulation")
+    cameras.set_defaults(run=bench_cameras)
+
+    check = commands.add_parser("check", help="fail if hot paths got slower or their outputs changed")
+    check.add_argument("--baseline", default=BASELINE_FILE, help="stored results (default: %(default)s)")
+    check.add_argument("--update", action="store_true", help="record this run as the new baseline")
+    check.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                       help="allowed slow-down of the time per call (default: %(default)s)")
+    check.add_argument("--latency-tolerance", type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                       help="allowed slow-down of the 99th percentile call (default: %(default)s)")
+    check.add_argument("--repeat", type=int, default=7, help="timed passes, median kept (default: %(default)s)")
+    check.set_defaults(run=bench_check)
+
+    args = parser.parse_args(argv)
+    return args.run(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Frame capture stage that keeps only the freshest camera frame"""
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+# A captured frame with its sequence number and monotonic capture time
+CapturedFrame = namedtuple("CapturedFrame", ["seq", "timestamp", "image"])
+
+
+class IterableSource:
+    """Frame source backed by any iterable of BGR images (e.g. a generator)"""
+
+    def __init__(self, frames, width=None, height=None):
+        self._frames = iter(frames)
+        self._opened = True
+        self._props = {
+            cv2.CAP_PROP_FRAME_WIDTH: width or 0,
+            cv2.CAP_PROP_FRAME_HEIGHT: height or 0,
+        }
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        try:
+            frame = next(self._frames)
+        except StopIteration:
+            self._opened = False
+            return False, None
+
+        # Learn the frame size from the first frame if it wasn't given
+        if not self._props[cv2.CAP_PROP_FRAME_WIDTH]:
+            self._props[cv2.CAP_PROP_FRAME_HEIGHT] = frame.shape[0]
+            self._props[cv2.CAP_PROP_FRAME_WIDTH] = frame.shape[1]
+        return True, frame
+
+    def get(self, prop):
+        return self._props.get(prop, 0)
+
+    def set(self, prop, value):
+        # Frames come from memory, so size requests can't be honoured
+        return False
+
+    def release(self):
+        self._opened = False
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class ImageDirectorySource(IterableSource):
+    """Frame source that reads the image files in a directory in name order"""
+
+    def __init__(self, directory):
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        super().__init__(cv2.imread(path) for path in self.paths)
+
+
+def open_frame_source(source=0):
+    """Open a webcam index, video file, image directory or iterable of frames as a frame source
+
+    Anything that already provides read() (such as a cv2.VideoCapture) is
+    returned unchanged.
+    """
+    if hasattr(source, "read"):
+        return source
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    if isinstance(source, str):
+        if source.isdigit():
+            return cv2.VideoCapture(int(source))
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Frame source not found: {source}")
+        if os.path.isdir(source):
+            return ImageDirectorySource(source)
+        return cv2.VideoCapture(source)
+    return IterableSource(source)
+
+
+class LatestFrameSlot:
+    """Single-frame buffer where a newer frame always replaces an unread one"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        """Store a frame, counting the unread one it replaces as dropped"""
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Take the latest frame, waiting up to timeout; None if closed or timed out"""
+        with self._cond:
+            if self._frame is None and not self._closed:
+                self._cond.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        """Wake any waiting reader; remaining frames can still be taken"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class CopyingFrameSlot(LatestFrameSlot):
+    """LatestFrameSlot that keeps a copy of each frame, in buffers the reader gives back
+
+    The writer can reuse its own buffer as soon as put() returns. The reader
+    owns the frame it took until it hands it back with release(); frames
+    replaced unread go straight back. Only a few buffers ever circulate, so
+    nothing is allocated per frame.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._free = deque()
+
+    def put(self, frame):
+        """Store a copy of the frame, counting the unread one it replaces as dropped"""
+        try:
+            buffer = self._free.pop()
+        except IndexError:
+            buffer = None
+        if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        with self._cond:
+            replaced = self._frame
+            if replaced is not None:
+                self.dropped += 1
+            self._frame = buffer
+            self._cond.notify()
+        if replaced is not None:
+            self._free.append(replaced)
+
+    def release(self, frame):
+        """Give back a frame taken with get() once it is no longer read"""
+        self._free.append(frame)
+
+
+class FrameGrabber:
+    """Background thread that continuously drains a frame source into a LatestFrameSlot"""
+
+    def __init__(self, source, slot=None, pace_fps=None, metrics=None):
+        self.source = source
+        self.slot = slot or LatestFrameSlot()
+        self.metrics = metrics  # Optional PipelineMetrics that times each read
+        # Optional pacing so video files and generators play back in real time
+        self.pace_fps = pace_fps
+        self.frames_captured = 0
+        self.finished = False
+        self._size_request = None  # (width, height) to apply before the next read
+        self._running = False
+        self._thread = None
+
+    @property
+    def dropped(self):
+        return self.slot.dropped
+
+    def request_size(self, width, height):
+        """Ask for a new capture resolution; applied by the capture thread between reads"""
+        self._size_request = (width, height)
+
+    def start(self):
+        """Start the capture thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Stop the capture thread and wait for it to exit"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.slot.close()
+
+    def _run(self):
+        """Capture loop"""
+        interval = 1.0 / self.pace_fps if self.pace_fps else 0
+        next_due = time.monotonic()
+        seq = 0
+
+        while self._running:
+            if self._size_request is not None:
+                width, height = self._size_request
+                self._size_request = None
+                self.source.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.source.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+            t = self.metrics.now() if self.metrics else 0.0
+            ok, image = self.source.read()
+            if not ok:
+                break
+            if self.metrics:
+                self.metrics.lap("read", t)
+
+            timestamp = time.monotonic()
+            self.slot.put(CapturedFrame(seq, timestamp, image))
+            self.frames_captured += 1
+            seq += 1
+
+            if interval:
+                next_due += interval
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.monotonic()
+
+        self.finished = True
+        self.slot.close()
@@ -0,0 +1,368 @@
+"""Gesture events published to local subscribers as newline-delimited JSON
+
+An EventPublisher listens on a Unix domain socket (or localhost TCP where
+there are none) and sends every event to every connected subscriber, one
+JSON object per line:
+
+    {"seq": 12, "t": 1718000000.123, "type": "action", "action": "moveTo", "args": [960.0, 540.0]}
+    {"seq": 13, "t": 1718000000.150, "type": "mode", "mode": "CLICK"}
+
+Event types are "hello" (sent once on connect, with the screen size the
+cursor targets were mapped to), "action" (a mouse call, named as in
+pyautogui), "mode", "hand" (hand seen or lost) and "log".
+
+publish() never blocks: the event is encoded once and queued for each
+subscriber, and one I/O thread writes the queues out with non-blocking
+sends. A subscriber that falls behind loses its oldest cursor moves first,
+then its oldest events; the gap shows in `seq`. One that has not taken any
+data for STALL_TIMEOUT seconds while its queue is full is disconnected, so a
+stuck reader never holds up tracking or the other subscribers.
+"""
+import json
+import os
+import selectors
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "gesture_control.sock")
+DEFAULT_TCP_ADDRESS = ("127.0.0.1", 9465)  # Next to the metrics port
+DEFAULT_MAX_PENDING = 512  # Events queued per subscriber
+STALL_TIMEOUT = 5.0
+SEND_CHUNK = 65536
+PROTOCOL_VERSION = 1
+
+
+def default_address():
+    """The Unix socket where the platform has them, else localhost TCP"""
+    return DEFAULT_SOCKET if hasattr(socket, "AF_UNIX") else "%s:%d" % DEFAULT_TCP_ADDRESS
+
+
+def parse_address(text):
+    """(family, address) for "HOST:PORT", ":PORT", "unix:PATH" or a socket path"""
+    if text.startswith("unix:"):
+        return socket.AF_UNIX, text[5:]
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, text
+
+
+def encode_event(event):
+    """One event as a line of compact JSON"""
+    return json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _Subscriber:
+    """A connected client and the events still to be sent to it"""
+
+    __slots__ = ("sock", "pending", "moves", "current", "sent", "dropped", "last_progress")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.pending = deque()  # (is_move, encoded event)
+        self.moves = 0  # Cursor moves in `pending`
+        self.current = None  # memoryview of the event being sent
+        self.sent = 0
+        self.dropped = 0
+        self.last_progress = time.monotonic()
+
+
+class EventPublisher:
+    """Socket server that fans gesture events out to any number of subscribers"""
+
+    def __init__(self, address=None, max_pending=DEFAULT_MAX_PENDING, hello=None):
+        self.family, self.address = parse_address(address or default_address())
+        self.max_pending = max_pending
+        self.hello = dict(hello or {})  # Extra fields for the hello event
+        self.published = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self._seq = 0
+        self._subscribers = {}  # socket -> _Subscriber
+        self._lock = threading.Lock()
+        self._selector = None
+        self._server = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Bind the socket and start the I/O thread"""
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)  # Left behind by a daemon that didn't shut down cleanly
+        self._server = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self.address)
+        if self.family == socket.AF_INET:
+            self.address = self._server.getsockname()  # The real port when 0 was asked for
+        self._server.listen()
+        self._server.setblocking(False)
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Stop serving, disconnect everyone and remove the socket file"""
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def address_text(self):
+        if self.family == socket.AF_UNIX:
+            return self.address
+        return "%s:%d" % self.address
+
+    def publish(self, kind, **fields):
+        """Queue an event for every subscriber; never blocks"""
+        with self._lock:
+            self._seq += 1
+            self.published += 1
+            if not self._subscribers:
+                return
+            data = encode_event(dict(seq=self._seq, t=time.time(), type=kind, **fields))
+            is_move = kind == "action" and fields.get("action") == "moveTo"
+            for subscriber in self._subscribers.values():
+                self._enqueue(subscriber, is_move, data)
+        self._wake()
+
+    def _enqueue(self, subscriber, is_move, data):
+        pending = subscriber.pending
+        if len(pending) >= self.max_pending:
+            # Behind: the oldest cursor move is the cheapest loss, a later move supersedes it
+            if subscriber.moves:
+                for i, (move, _) in enumerate(pending):
+                    if move:
+                        del pending[i]
+                        subscriber.moves -= 1
+                        break
+            else:
+                if pending.popleft()[0]:
+                    subscriber.moves -= 1
+            subscriber.dropped += 1
+            self.dropped += 1
+        pending.append((is_move, data))
+        subscriber.moves += is_move
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already woken, or shutting down
+
+    def _run(self):
+        """I/O loop: accept subscribers, write their queues, notice when they go away"""
+        selector = self._selector
+        try:
+            while self._running:
+                for key, mask in selector.select(timeout=1.0):
+                    sock = key.fileobj
+                    if sock is self._server:
+                        self._accept()
+                    elif sock is self._wake_r:
+                        try:
+                            while sock.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif mask & selectors.EVENT_READ and not self._readable(sock):
+                        self._disconnect(sock)
+                self._send_all()
+        finally:
+            with self._lock:
+                for sock in list(self._subscribers):
+                    self._disconnect(sock, locked=True)
+            selector.close()
+            self._server.close()
+            self._wake_r.close()
+            self._wake_w.close()
+            if self.family == socket.AF_UNIX and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def _accept(self):
+        try:
+            sock, _ = self._server.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setblocking(False)
+        subscriber = _Subscriber(sock)
+        with self._lock:
+            self._seq += 1
+            hello = dict(seq=self._seq, t=time.time(), type="hello", version=PROTOCOL_VERSION, **self.hello)
+            subscriber.pending.append((False, encode_event(hello)))
+            self._subscribers[sock] = subscriber
+        self._selector.register(sock, selectors.EVENT_READ)
+
+    def _readable(self, sock):
+        """Discard anything a subscriber sends; False once it has hung up"""
+        try:
+            return bool(sock.recv(4096))
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def _send_all(self):
+        """Write as much of each queue as the sockets take without blocking"""
+        now = time.monotonic()
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            sock = subscriber.sock
+            try:
+                while True:
+                    if subscriber.current is None:
+                        with self._lock:
+                            if not subscriber.pending:
+                                break
+                            chunk = bytearray()
+                            while subscriber.pending and len(chunk) < SEND_CHUNK:
+                                is_move, data = subscriber.pending.popleft()
+                                subscriber.moves -= is_move
+                                subscriber.sent += 1
+                                chunk += data
+                        subscriber.current = memoryview(chunk)
+                    sent = sock.send(subscriber.current)
+                    subscriber.last_progress = now
+                    subscriber.current = subscriber.current[sent:]
+                    if not subscriber.current:
+                        subscriber.current = None
+            except BlockingIOError:
+                # Its buffer is full; wait to be told it can take more
+                if len(subscriber.pending) >= self.max_pending and now - subscriber.last_progress > STALL_TIMEOUT:
+                    self._disconnect(sock)
+                    continue
+            except OSError:
+                self._disconnect(sock)
+                continue
+            waiting = subscriber.current is not None or bool(subscriber.pending)
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if waiting else 0)
+            if sock in self._subscribers and self._selector.get_key(sock).events != events:
+                self._selector.modify(sock, events)
+
+    def _disconnect(self, sock, locked=False):
+        if locked:
+            subscriber = self._subscribers.pop(sock, None)
+        else:
+            with self._lock:
+                subscriber = self._subscribers.pop(sock, None)
+        if subscriber is None:
+            return
+        self.disconnected += 1
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def stats(self):
+        """Publishing counters, named for export"""
+        with self._lock:
+            backlog = max((len(s.pending) for s in self._subscribers.values()), default=0)
+            return {
+                "events_subscribers": len(self._subscribers),
+                "events_published_total": self.published,
+                "events_dropped_total": self.dropped,
+                "events_disconnected_total": self.disconnected,
+                "events_max_backlog": backlog,
+            }
+
+
+class EventMouse:
+    """Stand-in for pyautogui that publishes each mouse call as an "action" event
+
+    `mouse`, if given, also gets every call; that is how the daemon drives
+    the local pointer when asked to.
+    """
+
+    def __init__(self, publisher, mouse=None):
+        self.publisher = publisher
+        self.mouse = mouse
+
+    def _emit(self, name, *args):
+        self.publisher.publish("action", action=name, args=list(args))
+        if self.mouse is not None:
+            getattr(self.mouse, name)(*args)
+
+    def moveTo(self, x, y):
+        self._emit("moveTo", round(float(x), 2), round(float(y), 2))
+
+    def scroll(self, clicks):
+        self._emit("scroll", int(clicks))
+
+    def click(self):
+        self._emit("click")
+
+    def rightClick(self):
+        self._emit("rightClick")
+
+    def doubleClick(self):
+        self._emit("doubleClick")
+
+    def mouseDown(self):
+        self._emit("mouseDown")
+
+    def mouseUp(self):
+        self._emit("mouseUp")
+
+    def press(self, key):
+        self._emit("press", key)
+
+
+def subscribe(address=None, timeout=None):
+    """Connect to a publisher and yield its events as dicts until it goes away"""
+    family, target = parse_address(address or default_address())
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(target)
+        with sock.makefile("rb") as stream:
+            for line in stream:
+                yield json.loads(line)
+
+
+def actuate(events, mouse, screen_size=None):
+    """Apply the "action" events of a subscription to a pyautogui-like mouse
+
+    Cursor targets are mapped to the screen size in the publisher's hello
+    event; with `screen_size` (this screen's) they are scaled to it, so the
+    whole screen is reachable whatever the publisher's resolution.
+
+    Returns the number of events received whose `seq` shows they were dropped
+    because this subscriber fell behind.
+    """
+    missed = 0
+    last = None
+    scale_x = scale_y = 1.0
+    for event in events:
+        seq = event["seq"]
+        if last is not None and seq > last + 1:
+            missed += seq - last - 1
+        last = seq
+        kind = event["type"]
+        if kind == "action":
+            if event["action"] == "moveTo":
+                x, y = event["args"]
+                mouse.moveTo(x * scale_x, y * scale_y)
+            else:
+                getattr(mouse, event["action"])(*event["args"])
+        elif kind == "hello" and screen_size and event.get("screen"):
+            width, height = event["screen"]
+            scale_x, scale_y = screen_size[0] / width, screen_size[1] / height
+    return missed
@@ -0,0 +1,285 @@
+"""Cursor smoothing filters with constant-time updates
+
+Every filter takes one (x, y, t) sample per frame and returns the smoothed
+position, or None while it is still warming up (the first few samples after
+the hand appears), matching the original moving-average behaviour. The
+Smoothing slider's 1-10 level is mapped onto each filter's own parameters by
+set_smoothing(). The slider runs on the UI thread, so a new level only takes
+effect at the next update(), on the tracking thread.
+"""
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+WARMUP_SAMPLES = 3  # The original smoother waited for more than two points
+DEFAULT_SMOOTHING = 5
+
+
+class CursorFilter(ABC):
+    """Base class handling warm-up, reset and smoothing changes"""
+
+    name = "base"
+
+    def __init__(self, smoothing=DEFAULT_SMOOTHING):
+        self.samples = 0
+        self._pending_smoothing = None
+        self._apply_smoothing(smoothing)
+        self._reset()
+
+    def set_smoothing(self, level):
+        """Ask for a Smoothing slider level (1 = responsive, 10 = smooth); safe from any thread
+
+        The filter changes over at its next update().
+        """
+        self._pending_smoothing = level
+
+    def update(self, x, y, t):
+        """Add a sample and return the filtered (x, y), or None while warming up"""
+        if self._pending_smoothing is not None:
+            level, self._pending_smoothing = self._pending_smoothing, None
+            self._apply_smoothing(level)
+        self.samples += 1
+        point = self._update(float(x), float(y), t)
+        return point if self.samples >= WARMUP_SAMPLES else None
+
+    def reset(self):
+        """Forget all history, e.g. when the hand is lost"""
+        self.samples = 0
+        self._reset()
+
+    def _apply_smoothing(self, level):
+        """Map a smoothing level onto the filter's parameters; only called between updates"""
+        self.smoothing = level
+
+    @abstractmethod
+    def _update(self, x, y, t):
+        """Filter one sample; returns the smoothed (x, y)"""
+
+    def _reset(self):
+        pass
+
+
+class MovingAverageFilter(CursorFilter):
+    """Mean of the last `smoothing` samples, kept with running sums over a ring buffer"""
+
+    name = "Moving average"
+
+    def _apply_smoothing(self, level):
+        self.smoothing = max(1, int(level))
+        self._ring_x = [0.0] * self.smoothing
+        self._ring_y = [0.0] * self.smoothing
+        self._reset()
+
+    def _update(self, x, y, t):
+        i = self._pos
+        if self._count == self.smoothing:
+            self._sum_x -= self._ring_x[i]
+            self._sum_y -= self._ring_y[i]
+        else:
+            self._count += 1
+        self._ring_x[i] = x
+        self._ring_y[i] = y
+        self._sum_x += x
+        self._sum_y += y
+        self._pos = (i + 1) % self.smoothing
+        return self._sum_x / self._count, self._sum_y / self._count
+
+    def _reset(self):
+        self._pos = 0
+        self._count = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+
+
+class ExponentialFilter(CursorFilter):
+    """Exponential moving average with the same centre of mass as a `smoothing`-sample window"""
+
+    name = "Exponential"
+
+    def _apply_smoothing(self, level):
+        self.smoothing = level
+        self.alpha = 2.0 / (max(1, level) + 1.0)
+
+    def _update(self, x, y, t):
+        if self._x is None:
+            self._x, self._y = x, y
+        else:
+            self._x += self.alpha * (x - self._x)
+            self._y += self.alpha * (y - self._y)
+        return self._x, self._y
+
+    def _reset(self):
+        self._x = self._y = None
+
+
+def _smoothing_factor(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(CursorFilter):
+    """One Euro filter: heavy smoothing when the hand is still, little lag when it moves
+
+    The cutoff frequency rises with speed: cutoff = min_cutoff + beta * |velocity|.
+    """
+
+    name = "One Euro"
+
+    def __init__(self, smoothing=DEFAULT_SMOOTHING, beta=0.02, d_cutoff=1.0):
+        self.beta = beta  # Per px/s of hand speed
+        self.d_cutoff = d_cutoff
+        super().__init__(smoothing)
+
+    def _apply_smoothing(self, level):
+        self.smoothing = level
+        self.min_cutoff = 5.0 / max(1, level)  # Level 5 gives the usual 1 Hz
+
+    def _update(self, x, y, t):
+        if self._t is None:
+            self._t = t
+            self._x, self._y = x, y
+            self._dx = self._dy = 0.0
+            return x, y
+
+        dt = max(t - self._t, 1e-3)
+        self._t = t
+        a_d = _smoothing_factor(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        self._dy += a_d * ((y - self._y) / dt - self._dy)
+
+        speed = math.hypot(self._dx, self._dy)
+        a = _smoothing_factor(self.min_cutoff + self.beta * speed, dt)
+        self._x += a * (x - self._x)
+        self._y += a * (y - self._y)
+        return self._x, self._y
+
+    def _reset(self):
+        self._t = None
+
+
+class KalmanPredictor(CursorFilter):
+    """Constant-velocity Kalman filter that extrapolates to the expected actuation time
+
+    `lead` is how far ahead (seconds) to predict, normally the capture-to-
+    actuation latency, so the cursor lands where the hand is rather than
+    where it was when the frame was taken.
+    """
+
+    name = "Kalman (predictive)"
+
+    def __init__(self, smoothing=DEFAULT_SMOOTHING, lead=0.05, measurement_noise=4.0):
+        self.lead = lead
+        self.measurement_noise = measurement_noise  # Landmark jitter in px^2
+        super().__init__(smoothing)
+
+    def _apply_smoothing(self, level):
+        self.smoothing = level
+        # Acceleration noise (px/s^2)^2: lower trusts the constant-velocity model more
+        self.process_noise = 1.0e7 / (max(1, level) ** 3)
+
+    def _update(self, x, y, t):
+        if self._t is None:
+            self._t = t
+            self._axes = [[x, 0.0, self.measurement_noise, 0.0, 0.0, 1e4],
+                          [y, 0.0, self.measurement_noise, 0.0, 0.0, 1e4]]
+            return x, y
+
+        dt = max(t - self._t, 1e-3)
+        self._t = t
+        return self._step(self._axes[0], x, dt), self._step(self._axes[1], y, dt)
+
+    def _step(self, s, z, dt):
+        """One predict/update cycle for a single axis; s = [p, v, P00, P01, P10, P11]"""
+        p, v, p00, p01, p10, p11 = s
+        q = self.process_noise
+
+        # Predict
+        p += v * dt
+        dt2 = dt * dt
+        p00 += dt * (p10 + p01) + dt2 * p11 + q * dt2 * dt2 / 4.0
+        p01 += dt * p11 + q * dt2 * dt / 2.0
+        p10 += dt * p11 + q * dt2 * dt / 2.0
+        p11 += q * dt2
+
+        # Update with the measured position
+        innovation = z - p
+        s_inv = 1.0 / (p00 + self.measurement_noise)
+        k0, k1 = p00 * s_inv, p10 * s_inv
+        p += k0 * innovation
+        v += k1 * innovation
+        p00, p01, p10, p11 = (1 - k0) * p00, (1 - k0) * p01, p10 - k1 * p00, p11 - k1 * p01
+
+        s[:] = p, v, p00, p01, p10, p11
+        return p + v * self.lead
+
+    def _reset(self):
+        self._t = None
+
+
+FILTERS = {cls.name: cls for cls in (MovingAverageFilter, ExponentialFilter, OneEuroFilter, KalmanPredictor)}
+DEFAULT_FILTER = MovingAverageFilter.name
+
+
+def make_filter(name=DEFAULT_FILTER, smoothing=DEFAULT_SMOOTHING):
+    """Create a cursor filter by its display name"""
+    return FILTERS[name](smoothing)
+
+
+def evaluate_filter(cursor_filter, times, points, reference=None, latency=0.0, max_lag_frames=15):
+    """Replay a trace through a filter and measure jitter, lag and error
+
+    `points` is an (N, 2) array of raw positions sampled at `times`. Without a
+    ground-truth `reference`, a centred (zero-lag) 5-frame average of the
+    input stands in for the true path. The output is judged against where
+    the hand is `latency` seconds later, when the cursor actually moves.
+    Returns a dict with:
+      jitter_px   RMS frame-to-frame acceleration of the output
+      lag_ms      shift of the output behind the reference that fits best
+      error_px    RMS distance to the reference after warm-up
+    """
+    points = np.asarray(points, dtype=float)
+    times = np.asarray(times, dtype=float)
+    if reference is None:
+        kernel = np.ones(5) / 5.0
+        reference = np.column_stack([
+            np.convolve(np.pad(points[:, i], 2, mode="edge"), kernel, mode="valid") for i in range(2)
+        ])
+
+    frame_time = np.median(np.diff(times)) if len(times) > 1 else 0.0
+    if latency and frame_time:
+        ahead = int(round(latency / frame_time))
+        reference = np.concatenate([reference[ahead:], np.repeat(reference[-1:], ahead, axis=0)])
+
+    cursor_filter.reset()
+    output = np.full_like(points, np.nan)
+    for i, ((x, y), t) in enumerate(zip(points, times)):
+        point = cursor_filter.update(x, y, t)
+        if point is not None:
+            output[i] = point
+
+    valid = ~np.isnan(output[:, 0])
+    out, ref = output[valid], reference[valid]
+    jitter = np.sqrt(np.mean(np.sum(np.diff(out, n=2, axis=0) ** 2, axis=1))) if len(out) > 2 else 0.0
+    error = np.sqrt(np.mean(np.sum((out - ref) ** 2, axis=1))) if len(out) else 0.0
+
+    # Lag: how many frames the reference must be delayed to best match the output
+    # (negative when a predictive filter runs ahead of it)
+    best_shift, best_error = 0, float("inf")
+    n = len(out)
+    for shift in range(-max_lag_frames, max_lag_frames + 1):
+        if n - abs(shift) < 10:
+            continue
+        if shift >= 0:
+            diff = out[shift:] - ref[:n - shift]
+        else:
+            diff = out[:n + shift] - ref[-shift:]
+        shifted_error = np.mean(np.sum(diff ** 2, axis=1))
+        if shifted_error < best_error:
+            best_shift, best_error = shift, shifted_error
+
+    return {
+        "jitter_px": float(jitter),
+        "lag_ms": float(best_shift * frame_time * 1000.0),
+        "error_px": float(error),
+    }
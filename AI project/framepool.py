@@ -0,0 +1,47 @@
+"""Preallocated image buffers for the per-frame OpenCV calls
+
+OpenCV allocates a new output array on every call unless it is given one
+with `dst=`. FramePool hands out buffers by name, sized to the current
+frame, and only allocates again when the capture resolution changes.
+
+Each name rotates through `depth` buffers, so a returned frame stays intact
+while the next few are written. That is no guarantee for a reader on
+another thread, which may be held up for longer: the preview is given a
+copy (see capture.CopyingFrameSlot).
+"""
+import numpy as np
+
+DEFAULT_DEPTH = 3
+
+
+class FramePool:
+    """Named rings of reusable image buffers"""
+
+    def __init__(self, depth=DEFAULT_DEPTH):
+        self.depth = depth
+        self._rings = {}  # name -> [buffers, next index]
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Next buffer for `name` with the given shape, reallocating on a size change"""
+        ring = self._rings.get(name)
+        if ring is None or ring[0][0].shape != shape or ring[0][0].dtype != dtype:
+            buffers = [np.empty(shape, dtype=dtype) for _ in range(self.depth)]
+            self.allocations += self.depth
+            self.allocated_bytes += self.depth * buffers[0].nbytes
+            ring = self._rings[name] = [buffers, 0]
+        buffers, index = ring
+        ring[1] = (index + 1) % self.depth
+        return buffers[index]
+
+    def clear(self):
+        """Drop all buffers"""
+        self._rings = {}
+
+    def stats(self):
+        """Allocation counters, named for export"""
+        return {
+            "framepool_allocations_total": self.allocations,
+            "framepool_allocated_bytes_total": self.allocated_bytes,
+        }
@@ -0,0 +1,212 @@
+"""Gesture tracking without a window, publishing events to local subscribers
+
+Runs the same capture, detection and mode logic as the app, with no Tk
+window or preview, and publishes gesture events over a local socket (see
+eventbus.py). The local mouse is only moved if asked for with --actuate,
+here or from a separate subscriber process. Given several sources, hands
+are detected in a worker process per camera and the most confident view
+is used (see multicam.py).
+
+Usage:
+    python gesture_daemon.py [source ...] [--listen ADDRESS] [--actuate] [--workers N]
+    python gesture_daemon.py --subscribe [--listen ADDRESS] [--actuate]
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+
+from capture import FrameGrabber, open_frame_source
+from eventbus import EventMouse, EventPublisher, actuate, default_address, subscribe
+from headless import DEFAULT_SCREEN_SIZE, parse_screen_size
+from metrics import MetricsServer, PipelineMetrics
+from motion import MotionGate
+from multicam import WorkerHands, track_cameras
+from temporal import TemporalGestures
+from tracker import GestureTracker
+
+STATS_INTERVAL = 1.0  # Seconds between gauge updates
+
+
+def local_mouse(metrics=None):
+    """Non-blocking pyautogui actuator for driving this machine's pointer"""
+    import pyautogui
+    from actuator import InputActuator, PyAutoGUIBackend
+    pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = 0.1
+    return InputActuator(PyAutoGUIBackend(), metrics=metrics).start(), pyautogui.size()
+
+
+def run_daemon(source=0, address=None, screen_size=None, actuate_locally=False, roi=False,
+               motion_gate=None, pace_fps=None, metrics_port=None, stop=None, max_hands=1, temporal=None,
+               workers=None):
+    """Track gestures from `source` and publish them until the source ends or `stop` is set
+
+    `source` may be a list of sources, one per camera; `workers` caps the
+    number of detection processes they get.
+    """
+    sources = list(source) if isinstance(source, (list, tuple)) else [source]
+    metrics = PipelineMetrics()
+    mouse = None
+    if actuate_locally:
+        mouse, local_size = local_mouse(metrics)
+        screen_size = screen_size or tuple(local_size)
+    screen_size = screen_size or DEFAULT_SCREEN_SIZE
+
+    publisher = EventPublisher(address, hello={"screen": list(screen_size)}).start()
+    print(f"Publishing gesture events on {publisher.address_text}", flush=True)
+    metrics_server = MetricsServer(metrics, metrics_port).start() if metrics_port else None
+
+    # The hello event tells new subscribers the current state
+    state = publisher.hello
+    state.update(mode=None, hand=None)
+
+    def hand_status(detected):
+        # Called every processed frame; only changes are worth publishing
+        if detected != state["hand"]:
+            state["hand"] = detected
+            publisher.publish("hand", detected=detected)
+
+    def mode_change(mode):
+        state["mode"] = mode.name
+        publisher.publish("mode", mode=mode.name)
+
+    tracker = GestureTracker(
+        mouse=EventMouse(publisher, mouse),
+        screen_size=screen_size,
+        hands=WorkerHands() if len(sources) > 1 else None,
+        on_hand_status=hand_status,
+        on_mode_change=mode_change,
+        log=lambda message: publisher.publish("log", message=message),
+        metrics=metrics,
+        roi=roi,
+        motion_gate=motion_gate,
+        max_hands=max_hands,
+        temporal=temporal
+    )
+    tracker.draw_overlays = False  # Nobody sees the frames
+    state["mode"] = tracker.mode.name
+    stop = stop or threading.Event()
+    next_stats = time.monotonic()
+
+    if len(sources) > 1:
+        def publish_stats(timestamp):
+            nonlocal next_stats
+            if timestamp >= next_stats:
+                next_stats = timestamp + STATS_INTERVAL
+                metrics.gauges.update(publisher.stats())
+                if mouse is not None:
+                    metrics.gauges.update(mouse.stats())
+
+        try:
+            metrics.gauges.update(track_cameras(sources, tracker, workers, pace_fps, stop, on_frame=publish_stats,
+                                                metrics=metrics))
+        finally:
+            tracker.release()
+            if mouse is not None:
+                mouse.stop()
+            if metrics_server:
+                metrics_server.stop()
+            publisher.stop()
+        return publisher.stats()
+
+    cap = open_frame_source(sources[0])
+    grabber = FrameGrabber(cap, pace_fps=pace_fps, metrics=metrics).start()
+    try:
+        while not stop.is_set():
+            captured = grabber.slot.get(timeout=1.0)
+            if captured is None:
+                if grabber.finished:
+                    break
+                continue
+            tracker.process_frame(captured.image, captured.timestamp)
+            metrics.frames_dropped = grabber.dropped
+
+            if captured.timestamp >= next_stats:
+                next_stats = captured.timestamp + STATS_INTERVAL
+                metrics.gauges.update(publisher.stats())
+                if mouse is not None:
+                    metrics.gauges.update(mouse.stats())
+    finally:
+        grabber.stop()
+        tracker.release()
+        if mouse is not None:
+            mouse.stop()
+        if hasattr(cap, "release"):
+            cap.release()
+        if metrics_server:
+            metrics_server.stop()
+        publisher.stop()
+    return publisher.stats()
+
+
+def run_subscriber(address=None, actuate_locally=False):
+    """Print a publisher's events, or apply its mouse actions to this machine's pointer"""
+    events = subscribe(address)
+    if not actuate_locally:
+        for event in events:
+            print(json.dumps(event), flush=True)
+        return 0
+
+    mouse, local_size = local_mouse()
+    try:
+        missed = actuate(events, mouse, tuple(local_size))
+    finally:
+        mouse.stop()
+    if missed:
+        print(f"Fell behind and missed {missed} events", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track hand gestures without a window and publish them as events")
+    parser.add_argument("source", nargs="*", default=[0],
+                        help="webcam index, video file or directory of frames; several for several cameras "
+                             "(default: webcam 0)")
+    parser.add_argument("--listen", metavar="ADDRESS", default=default_address(),
+                        help="Unix socket path, or HOST:PORT for TCP (default: %(default)s)")
+    parser.add_argument("--actuate", action="store_true", help="also move this machine's mouse")
+    parser.add_argument("--subscribe", action="store_true",
+                        help="connect to a running daemon instead, printing its events (or acting on them with --actuate)")
+    parser.add_argument("--screen", type=parse_screen_size,
+                        help="screen size used for cursor mapping, e.g. 1920x1080 (default: this screen with "
+                             "--actuate, else %dx%d)" % DEFAULT_SCREEN_SIZE)
+    parser.add_argument("--roi", action="store_true", help="track the hand in a crop around its last position")
+    parser.add_argument("--no-idle-gate", action="store_true", help="run hand detection on every frame")
+    parser.add_argument("--two-hands", action="store_true", help="track a second hand for chorded clicks and scrolls")
+    parser.add_argument("--gestures", action="store_true",
+                        help="also recognise swipes, pinches and holds, and scroll as fast as the hand moves")
+    parser.add_argument("--pace-fps", type=float, help="play a video file back at this frame rate")
+    parser.add_argument("--metrics-port", type=int, help="serve pipeline metrics on this localhost port")
+    parser.add_argument("--workers", type=int,
+                        help="detection processes for several cameras (default: one per camera)")
+    args = parser.parse_args(argv)
+    if args.roi and len(args.source) > 1:
+        parser.error("--roi works with one camera; with several, the workers search whole frames")
+
+    if args.subscribe:
+        try:
+            return run_subscriber(args.listen, args.actuate)
+        except (KeyboardInterrupt, BrokenPipeError):
+            return 0
+        except OSError as e:
+            print(f"Can't subscribe to {args.listen}: {e}", file=sys.stderr)
+            return 1
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        run_daemon(args.source, args.listen, args.screen, args.actuate, roi=args.roi,
+                   motion_gate=MotionGate(enabled=False) if args.no_idle_gate else None,
+                   pace_fps=args.pace_fps, metrics_port=args.metrics_port, stop=stop,
+                   max_hands=2 if args.two_hands else 1, temporal=TemporalGestures() if args.gestures else None,
+                   workers=args.workers)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
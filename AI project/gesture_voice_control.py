@@ -1,18 +1,36 @@
+import argparse
+import functools
 import cv2
-import mediapipe as mp
 import pyautogui
-import speech_recognition as sr
 import threading
 import time
 import tkinter as tk
 import customtkinter as ctk
-import pyttsx3
-from PIL import Image, ImageTk
 import numpy as np
-from enum import Enum
+from PIL import Image, ImageTk
+
+from activitylog import (EVENT_COMMAND, EVENT_ERROR, EVENT_INFO, SOURCE_APP, SOURCE_GESTURE, SOURCE_INPUT,
+                         SOURCE_VOICE, ActivityLog, format_entry)
+from actuator import InputActuator, PyAutoGUIBackend
+from capture import CopyingFrameSlot, FrameGrabber, open_frame_source
+from filters import DEFAULT_FILTER, FILTERS
+from governor import DEFAULT_CPU_BUDGET, DEFAULT_LATENCY_SLO, BudgetGovernor
+from metrics import MetricsServer, PipelineMetrics
+from motion import DEFAULT_IDLE_AFTER, DEFAULT_IDLE_RATE, DEFAULT_THRESHOLD, MotionGate
+from screenmap import (DEFAULT_PROFILE, PROFILE_FILE, ScreenMapper, list_monitors, load_profiles,
+                       save_profile, select_screen)
+from sessionlog import SessionRecorder
+from speech import DEFAULT_CACHE_DIR, PRIORITY_HIGH, PRIORITY_NORMAL, Pyttsx3Engine, SpeechWorker
+from startup import STATE_FAILED, STATE_IDLE, STATE_LOADING, STATE_READY, Startup
+from temporal import TemporalGestures
+from tracker import POINTER_HAND, GestureTracker, Mode
+from voice import (DEFAULT_WORKERS, STATE_PROCESSING, MicrophoneSource, SpeechRecognitionBackend, VoicePipeline,
+                   load_noise_floor, save_noise_floor)
+from voicecommands import GREETING, CommandRegistry
 
 # Prevent PyAutoGUI from moving the mouse to extreme edges
 pyautogui.FAILSAFE = True
+# Pause after clicks and key presses; cursor moves and scrolls are coalesced by the actuator instead
 pyautogui.PAUSE = 0.1
 
 # UI Constants
@@ -22,26 +40,47 @@ MODE_SCROLL_DOWN = "📜 Mode: Scroll Down"
 MODE_CLICK = "👆 Mode: Click"
 MODE_DRAG = "✋ Mode: Drag"
 VOICE_INACTIVE = "🎤 Voice: Inactive"
-VOICE_ACTIVE = "🎤 Voice: Active"
 VOICE_LISTENING = "🎤 Voice: Listening..."
 VOICE_PROCESSING = "🎤 Voice: Processing..."
 VOICE_ERROR = "🎤 Voice: Error"
+VOICE_LOADING = "🎤 Voice: Starting..."
 HAND_DETECTED = "👋 Hand: Detected"
 HAND_NOT_DETECTED = "👋 Hand: Not Detected"
 BTN_START_TRACKING = "Start Tracking"
 BTN_STOP_TRACKING = "Stop Tracking"
 BTN_START_VOICE = "Start Voice Control"
 BTN_STOP_VOICE = "Stop Voice Control"
+BTN_EXPORT_STATS = "Export Stats"
+BTN_CALIBRATE = "Calibrate Area"
+CALIBRATION_MS = 5000
+PERF_STATS_FILE = "gesture_metrics.prom"
+PERF_REFRESH_MS = 1000
+PREVIEW_FPS = 30  # Display rate, independent of the processing rate
+PREVIEW_MAX_WIDTH = 640
+LOG_FLUSH_MS = 100
+LOG_BATCH = 50  # Most entries shown per flush; the rest wait for the next one
+LOG_MAX_LINES = 500
+READY_MESSAGE = "Simplified Gesture Control is ready"
+STARTUP_POLL_MS = 100
+STARTUP_ICONS = {STATE_IDLE: "💤", STATE_LOADING: "⏳", STATE_READY: "✅", STATE_FAILED: "❌"}
+SUBSYSTEMS = ("camera", "hand model", "speech", "voice")
 
-class Mode(Enum):
-    NAVIGATION = 1
-    SCROLL_UP = 2
-    SCROLL_DOWN = 3
-    CLICK = 4
-    DRAG = 5
+MODE_LABELS = {
+    Mode.NAVIGATION: MODE_NAVIGATION,
+    Mode.SCROLL_UP: MODE_SCROLL_UP,
+    Mode.SCROLL_DOWN: MODE_SCROLL_DOWN,
+    Mode.CLICK: MODE_CLICK,
+    Mode.DRAG: MODE_DRAG,
+}
 
 class GestureVoiceControlApp:
-    def __init__(self, root):
+    def __init__(self, root, source=0, metrics_port=None, preview_fps=PREVIEW_FPS, log_file=None,
+                 roi=False, motion_gate=None, governor=None, profile=DEFAULT_PROFILE, record=None,
+                 voice_engine="google", voice_workers=DEFAULT_WORKERS, tts_cache=DEFAULT_CACHE_DIR,
+                 max_hands=1, pointer_hand=POINTER_HAND, gestures=False):
+        # Slow subsystems load in the background; see the end of __init__
+        self.startup = Startup()
+        
         # Main window setup
         self.root = root
         self.root.title("Simplified Gesture & Voice Control")
@@ -54,49 +93,180 @@ class GestureVoiceControlApp:
         # Initialize variables
         self.running = False
         self.voice_running = False
-        self.mode = Mode.NAVIGATION
-        self.prev_y = None
         self.smoothing = 5
-        self.history_x = []
-        self.history_y = []
-        self.screen_width, self.screen_height = pyautogui.size()
-        self.click_cooldown = 0
-        self.last_finger_count = 0
-        self.finger_count_history = []  # For stabilizing finger count detection
-        self.is_dragging = False
-        self.drag_start_pos = None
-        
-        # Speech recognition setup
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 150)
-        
-        # MediaPipe setup
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.6,  # Lower threshold for better detection
-            min_tracking_confidence=0.6    # Lower threshold for better tracking
-        )
-        self.mp_draw = mp.solutions.drawing_utils
+        
+        # Activity log: written from any thread, shown by the main loop
+        self.activity = ActivityLog(capacity=LOG_MAX_LINES, path=log_file)
+        
+        # Preview state: the tracking thread publishes, the main loop displays
+        self.preview_slot = CopyingFrameSlot()  # Tracking reuses its pooled frames while the preview draws
+        self.preview_enabled = True
+        self.preview_interval = max(1, int(1000 / preview_fps))
+        self.preview_image = None
+        self.preview_buffer = None  # Reused when the preview has to be scaled down
+        self.frames_rendered = 0
+        self.frames_hidden = 0  # Processed while the preview was off or minimised
+        self.hand_detected = False
+        self.current_mode = Mode.NAVIGATION
+        self.voice_text = VOICE_INACTIVE  # Voice pipeline workers report here too
+        self.shown_status = (False, Mode.NAVIGATION, VOICE_INACTIVE)
+        
+        # Speech recognition is set up on first use
+        self.voice_engine = voice_engine
+        self.voice_backend = None
+        self.recognizer = None
+        self.microphone = None
+        self.voice_waiting = None  # Pending check for speech recognition to finish loading
+        self.voice_workers = voice_workers
+        self.voice_pipeline = None
+        
+        # Speech output: one worker loads and owns the TTS engine; frequent phrases are synthesised once
+        self.speech = SpeechWorker(Pyttsx3Engine(rate=150), cache_dir=tts_cache,
+                                   on_error=self.handle_speech_error).start()
+        self.speech.prepare([READY_MESSAGE, GREETING])
+        
+        # Stage timings shared by the tracking and input threads
+        self.metrics = PipelineMetrics()
+        
+        # Mouse and keyboard input is applied on its own thread
+        self.actuator = InputActuator(PyAutoGUIBackend(), on_error=self.handle_input_error,
+                                      metrics=self.metrics).start()
+        
+        # Voice commands, compiled once, act through the same actuator
+        self.voice_commands = CommandRegistry(handlers={
+            "click": self.actuator.click, "rightClick": self.actuator.rightClick,
+            "doubleClick": self.actuator.doubleClick, "scroll": self.actuator.scroll,
+            "write": self.actuator.write, "press": self.actuator.press, "speak": self.speak_text,
+        })
+        
+        # Camera-to-screen mapping for the chosen profile and monitor
+        self.monitors = list_monitors(pyautogui.size())
+        self.mapper = ScreenMapper(select_screen(self.monitors, profile.monitor), profile)
+        
+        # Gesture pipeline, created with the hand model in the background
+        self.tracker = None
+        self.roi = roi
+        self.motion_gate = motion_gate
+        self.max_hands = max_hands  # 2 for chords played with the other hand
+        self.pointer_hand = pointer_hand
+        self.gestures = gestures  # Swipes, pinches and holds as well as finger counts
+        self.cap = None
+        
+        # Optional session recording, for replaying what the tracker saw without the camera
+        self.recorder = SessionRecorder(record) if record else None
+        
+        # Optional governor that trades quality for speed when frames take too long
+        self.governor = governor
+        self.grabber = None
+        self.fps_cap = None
+        self.governor_preview = True
+        if governor:
+            governor.on_change = self.apply_rung
+            governor.log_message = functools.partial(self.log_message, source=SOURCE_GESTURE)
+        
+        # Camera and hand model load side by side while the window comes up; voice waits for first use
+        self.startup.add("camera", functools.partial(self.open_camera, source))
+        self.startup.add("hand model", self.load_tracker)
+        self.startup.add("speech", self.speech.wait_ready)
+        self.startup.add("voice", self.load_voice, lazy=True)
         
         # Create UI
         self.create_ui()
-        
-        # Initialize webcam
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            self.log_message("Error: Could not open webcam")
-            return
+        if self.recorder:
+            # A recording stores the settings it started with, so they stay fixed until the app closes
+            for control in (self.smooth_slider, self.filter_menu, self.calibrate_button):
+                control.configure(state="disabled")
+            self.log_message(f"Recording to {record}: smoothing, filter and calibration are fixed")
+        
+        # Optional Prometheus-style exporter on localhost
+        self.metrics_server = None
+        if metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, port=metrics_port).start()
+            self.log_message(f"Serving metrics on http://127.0.0.1:{metrics_port}/metrics")
+        self.update_perf_status()
+        self.render_preview()
+        self.flush_log()
+        self.shown_startup = None
+        self.startup_pump = None
+        self.update_startup_status()
+        # Timed when the window is actually on screen, once the main loop runs
+        self.root.bind("<Map>", lambda event: self.startup.mark("window"), add="+")
+        
+    def open_camera(self, source):
+        """Open the webcam (or any other frame source); runs in the background"""
+        cap = open_frame_source(source)
+        if not cap.isOpened():
+            raise RuntimeError("Could not open webcam")
         
         # Set capture properties
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        
-        # Success message
-        self.log_message("Application initialized successfully")
-        self.speak_text("Simplified Gesture Control is ready")
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap = cap
+        return cap
+    
+    def load_tracker(self):
+        """Load the hand model and build the gesture pipeline; runs in the background"""
+        # Gesture pipeline drives the mouse and reports back to the UI
+        tracker = GestureTracker(
+            mouse=self.actuator,
+            screen_size=pyautogui.size(),
+            on_hand_status=self.update_hand_status,
+            on_mode_change=self.update_mode_label,
+            log=functools.partial(self.log_message, source=SOURCE_GESTURE),
+            metrics=self.metrics,
+            roi=self.roi,
+            motion_gate=self.motion_gate,
+            mapper=self.mapper,
+            max_hands=self.max_hands,
+            pointer_hand=self.pointer_hand,
+            temporal=TemporalGestures() if self.gestures else None
+        )
+        tracker.set_smoothing(self.smoothing)
+        if self.recorder:
+            tracker.set_recorder(self.recorder)
+        self.tracker = tracker
+        return tracker
+    
+    def load_voice(self):
+        """Set up speech recognition and the microphone; runs in the background on first use"""
+        import speech_recognition as sr
+        self.recognizer = sr.Recognizer()
+        self.voice_backend = SpeechRecognitionBackend(self.voice_engine, self.recognizer)
+        self.microphone = sr.Microphone()
+        return self.microphone
+    
+    def update_startup_status(self):
+        """Main-loop pump: show which subsystems are ready, until nothing is loading"""
+        states = tuple(self.startup.state(name) for name in SUBSYSTEMS)
+        if states != self.shown_startup:
+            self.startup_label.configure(text="  ".join(
+                f"{STARTUP_ICONS[state]} {name.capitalize()}" for name, state in zip(SUBSYSTEMS, states)))
+            previous = self.shown_startup or (None,) * len(SUBSYSTEMS)
+            for name, state, before in zip(SUBSYSTEMS, states, previous):
+                if state == before:
+                    continue
+                if state == STATE_READY:
+                    self.on_subsystem_ready(name)
+                elif state == STATE_FAILED:
+                    self.log_message(f"{name.capitalize()} failed to start: {self.startup.error(name)}",
+                                     SOURCE_APP, EVENT_ERROR)
+            self.shown_startup = states
+        self.startup_pump = None
+        if self.startup.loading():
+            self.startup_pump = self.root.after(STARTUP_POLL_MS, self.update_startup_status)
+    
+    def on_subsystem_ready(self, name):
+        """Report a subsystem that finished loading and catch it up with the UI"""
+        self.log_message(f"{name.capitalize()} ready in {self.startup.times[name]:.2f} s")
+        if name == "hand model":
+            # The controls may have been changed while it loaded
+            self.tracker.set_smoothing(self.smoothing)
+            if self.filter_menu.get() != self.tracker.filter_name:
+                self.tracker.set_filter(self.filter_menu.get())
+            self.tracker.set_roi(bool(self.roi_switch.get()))
+        if name in ("camera", "hand model") and self.startup.ready("camera") and self.startup.ready("hand model"):
+            self.log_message("Application initialized successfully")
+            self.speak_text(READY_MESSAGE, PRIORITY_HIGH)
         
     def create_ui(self):
         # Main container
@@ -127,6 +297,10 @@ class GestureVoiceControlApp:
         self.voice_status = ctk.CTkLabel(status_frame, text=VOICE_INACTIVE, font=("Arial", 14))
         self.voice_status.pack(side=tk.LEFT, padx=20)
         
+        # Pipeline performance indicator
+        self.perf_status = ctk.CTkLabel(status_frame, text="", font=("Arial", 14))
+        self.perf_status.pack(side=tk.LEFT, padx=20)
+        
         # Right panel
         right_panel = ctk.CTkFrame(container, width=300)
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, padx=5, pady=5)
@@ -134,6 +308,10 @@ class GestureVoiceControlApp:
         # Control title
         ctk.CTkLabel(right_panel, text="Controls", font=("Arial", 16, "bold")).pack(pady=10)
         
+        # Readiness of the subsystems loading in the background
+        self.startup_label = ctk.CTkLabel(right_panel, text="", font=("Arial", 12))
+        self.startup_label.pack(padx=20, pady=(0, 5))
+        
         # Control buttons
         self.start_button = ctk.CTkButton(right_panel, text=BTN_START_TRACKING, command=self.toggle_tracking)
         self.start_button.pack(fill=tk.X, padx=20, pady=5)
@@ -152,6 +330,38 @@ class GestureVoiceControlApp:
         self.smooth_slider.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
         self.smooth_slider.set(self.smoothing)
         
+        # Cursor filter selection, applied at the slider's smoothing level
+        filter_frame = ctk.CTkFrame(right_panel)
+        filter_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+        
+        ctk.CTkLabel(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        
+        self.filter_menu = ctk.CTkOptionMenu(filter_frame, values=list(FILTERS), command=self.update_filter)
+        self.filter_menu.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
+        self.filter_menu.set(DEFAULT_FILTER)
+        
+        self.calibrate_button = ctk.CTkButton(right_panel, text=BTN_CALIBRATE, command=self.calibrate)
+        self.calibrate_button.pack(fill=tk.X, padx=20, pady=(0, 10))
+        
+        # Performance instrumentation
+        perf_frame = ctk.CTkFrame(right_panel)
+        perf_frame.pack(fill=tk.X, padx=20, pady=5)
+        
+        self.perf_switch = ctk.CTkSwitch(perf_frame, text="Performance stats", command=self.toggle_instrumentation)
+        self.perf_switch.pack(side=tk.LEFT, padx=5)
+        self.perf_switch.select()
+        
+        ctk.CTkButton(perf_frame, text=BTN_EXPORT_STATS, width=90, command=self.export_stats).pack(side=tk.RIGHT, padx=5)
+        
+        self.preview_switch = ctk.CTkSwitch(right_panel, text="Camera preview", command=self.toggle_preview)
+        self.preview_switch.pack(anchor="w", padx=25, pady=5)
+        self.preview_switch.select()
+        
+        self.roi_switch = ctk.CTkSwitch(right_panel, text="Track hand region only", command=self.toggle_roi)
+        self.roi_switch.pack(anchor="w", padx=25, pady=5)
+        if self.roi:
+            self.roi_switch.select()
+        
         # Help section
         help_frame = ctk.CTkFrame(right_panel)
         help_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -194,25 +404,122 @@ class GestureVoiceControlApp:
     
     def update_smoothing(self, value):
         self.smoothing = int(value)
+        if self.tracker:
+            self.tracker.set_smoothing(self.smoothing)
+    
+    def update_filter(self, name):
+        """Switch the cursor smoothing filter"""
+        if self.tracker:
+            self.tracker.set_filter(name)
+        self.log_message(f"Cursor filter: {name}")
+    
+    def calibrate(self):
+        """Learn the hand's comfortable area from where the index finger moves for a few seconds"""
+        self.mapper.start_calibration()
+        self.calibrate_button.configure(state="disabled")
+        self.log_message(f"Calibrating: in navigation mode, move your index finger over the area "
+                         f"you want to use for {CALIBRATION_MS // 1000} seconds")
+        self.root.after(CALIBRATION_MS, self.finish_calibration)
+    
+    def finish_calibration(self):
+        """Apply and save the calibrated area"""
+        self.calibrate_button.configure(state="normal")
+        profile = self.mapper.finish_calibration(self.mapper.profile.name)
+        if profile is None:
+            self.log_message("Calibration needs more finger movement; the area was not changed")
+            return
+        self.mapper.set_profile(profile)
+        save_profile(profile)
+        self.log_message(f"Saved calibration profile '{profile.name}' to {PROFILE_FILE}")
+    
+    def toggle_instrumentation(self):
+        """Turn per-stage timing on or off"""
+        self.metrics.enabled = bool(self.perf_switch.get())
+    
+    def export_stats(self):
+        """Dump the current pipeline metrics to a file"""
+        self.metrics.dump(PERF_STATS_FILE)
+        self.log_message(f"Performance stats written to {PERF_STATS_FILE}")
+    
+    def update_perf_status(self):
+        """Refresh the performance indicator from the main loop"""
+        summary = self.metrics.summary()
+        if self.tracker:
+            if self.tracker.gate.idle:
+                summary += " | idle"
+            self.metrics.gauges.update(self.tracker.pool.stats())
+        if self.governor:
+            self.metrics.gauges.update(self.governor.stats())
+            if self.governor.level:
+                summary += f" | level {self.governor.level}"
+        if self.voice_pipeline:
+            self.metrics.gauges.update(self.voice_pipeline.stats())
+            self.metrics.gauges.update(self.voice_commands.stats())
+        self.metrics.gauges.update(self.speech.stats())
+        self.metrics.gauges.update(self.startup.stats())
+        if self.recorder:
+            self.metrics.gauges.update(self.recorder.stats())
+            summary += " | recording"
+        self.perf_status.configure(text=summary)
+        self.root.after(PERF_REFRESH_MS, self.update_perf_status)
+    
+    def handle_input_error(self, event, error):
+        """Report a mouse or keyboard action that failed on the actuator thread"""
+        self.log_message(f"Input error ({type(event).__name__}): {error}", SOURCE_INPUT, EVENT_ERROR)
+    
+    def update_hand_status(self, detected):
+        """Record whether a hand is detected; shown by the preview pump"""
+        self.hand_detected = detected
+    
+    def update_mode_label(self, mode):
+        """Record the current gesture mode; shown by the preview pump"""
+        self.current_mode = mode
+    
+    def set_voice_status(self, text):
+        """Record the voice status text; shown by the preview pump, so safe from any thread"""
+        self.voice_text = text
+    
+    def toggle_preview(self):
+        """Turn the camera preview on or off"""
+        self.preview_enabled = bool(self.preview_switch.get())
+        if not self.preview_enabled:
+            self.camera_label.configure(image=None)
+            self.preview_image = None
+        
+    def toggle_roi(self):
+        """Switch between cropping around the hand and searching the whole frame"""
+        if self.tracker:
+            self.tracker.set_roi(bool(self.roi_switch.get()))
+        
+    def log_message(self, message, source=SOURCE_APP, event=EVENT_INFO):
+        """Add a timestamped message to the activity log; safe from any thread"""
+        self.activity.add(message, source, event)
+    
+    def flush_log(self):
+        """Main-loop pump: show new log entries in one textbox update"""
+        batch = self.activity.drain(LOG_BATCH)
+        if batch:
+            self.log_area.configure(state="normal")
+            self.log_area.insert(tk.END, "".join(format_entry(entry) for entry in batch))
+            
+            # Keep the textbox as bounded as the log itself
+            lines = int(self.log_area.index("end-1c").split(".")[0])
+            if lines > LOG_MAX_LINES:
+                self.log_area.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
+            
+            self.log_area.see(tk.END)
+            self.log_area.configure(state="disabled")
         
-    def log_message(self, message):
-        """Add message to log area with timestamp"""
-        timestamp = time.strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        
-        self.log_area.configure(state="normal")
-        self.log_area.insert(tk.END, log_entry)
-        self.log_area.see(tk.END)
-        self.log_area.configure(state="disabled")
+        self.metrics.gauges["log_dropped_total"] = self.activity.dropped
+        self.root.after(LOG_FLUSH_MS, self.flush_log)
         
-    def speak_text(self, text):
-        """Speak the given text using TTS"""
-        threading.Thread(target=self._speak_worker, args=(text,), daemon=True).start()
+    def speak_text(self, text, priority=PRIORITY_NORMAL):
+        """Queue text for the speech worker; returns immediately"""
+        self.speech.speak(text, priority)
     
-    def _speak_worker(self, text):
-        """Background worker for text-to-speech"""
-        self.engine.say(text)
-        self.engine.runAndWait()
+    def handle_speech_error(self, message):
+        """Report speech the worker couldn't say; later messages are still spoken"""
+        self.log_message(message, SOURCE_APP, EVENT_ERROR)
     
     def toggle_tracking(self):
         """Toggle hand tracking on/off"""
@@ -230,382 +537,295 @@ class GestureVoiceControlApp:
         """Toggle voice control on/off"""
         if self.voice_running:
             self.voice_running = False
+            if self.voice_pipeline:
+                self.remember_noise_floor()
+                # Utterances already heard are still recognised, in the background
+                self.voice_pipeline.stop(timeout=0)
             self.voice_button.configure(text=BTN_START_VOICE)
-            self.voice_status.configure(text=VOICE_INACTIVE)
+            self.set_voice_status(VOICE_INACTIVE)
             self.log_message("Voice control stopped")
         else:
             self.voice_running = True
             self.voice_button.configure(text=BTN_STOP_VOICE)
-            self.voice_status.configure(text=VOICE_ACTIVE)
             self.log_message("Voice control started")
-            threading.Thread(target=self.run_voice_recognition, daemon=True).start()
-    
-    def run_voice_recognition(self):
-        """Voice recognition thread"""
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-        
-        while self.voice_running:
-            try:
-                with self.microphone as source:
-                    self.voice_status.configure(text=VOICE_LISTENING)
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-                    self.voice_status.configure(text=VOICE_PROCESSING)
-                
-                try:
-                    text = self.recognizer.recognize_google(audio).lower()
-                    self.log_message(f"Voice command: {text}")
-                    self.process_voice_command(text)
-                except sr.UnknownValueError:
-                    self.voice_status.configure(text=VOICE_ACTIVE)
-                except sr.RequestError:
-                    self.log_message("Could not request results from Google Speech Recognition")
-                    self.voice_status.configure(text=VOICE_ERROR)
-                    time.sleep(2)
-                    self.voice_status.configure(text=VOICE_ACTIVE)
-            
-            except Exception as e:
-                self.log_message(f"Voice error: {str(e)}")
-                self.voice_status.configure(text=VOICE_ERROR)
-                time.sleep(2)
-                self.voice_status.configure(text=VOICE_ACTIVE)
+            # Speech recognition and the microphone are loaded the first time they are needed
+            if not self.startup.ready("voice"):
+                self.set_voice_status(VOICE_LOADING)
+                self.startup.load("voice")
+                if self.startup_pump is None:
+                    self.update_startup_status()
+            if self.voice_waiting is None:
+                self.start_voice_pipeline()
     
-    def process_voice_command(self, command):
-        """Process voice commands"""
-        # Command to click
-        if command in ["click", "click mouse", "left click"]:
-            pyautogui.click()
-            self.log_message("Left click")
-        
-        # Command for right click
-        elif command in ["right click", "right mouse"]:
-            pyautogui.rightClick()
-            self.log_message("Right click")
-        
-        # Double click command
-        elif command in ["double click", "double"]:
-            pyautogui.doubleClick()
-            self.log_message("Double click")
-        
-        # Scrolling commands
-        elif "scroll" in command:
-            if "up" in command:
-                pyautogui.scroll(300)  # Scroll up
-                self.log_message("Scrolling up")
-            elif "down" in command:
-                pyautogui.scroll(-300)  # Scroll down
-                self.log_message("Scrolling down")
-        
-        # Typing commands
-        elif command.startswith("type "):
-            text_to_type = command[5:]  # Remove "type " prefix
-            pyautogui.write(text_to_type)
-            self.log_message(f"Typing: {text_to_type}")
-        
-        # Key press commands
-        elif command.startswith("press "):
-            key = command[6:]  # Remove "press " prefix
-            
-            # Handle special keys
-            special_keys = {
-                "enter": "enter", "space": "space", "tab": "tab",
-                "escape": "escape", "esc": "escape",
-                "up": "up", "down": "down", "left": "left", "right": "right",
-                "backspace": "backspace", "delete": "delete",
-                "home": "home", "end": "end",
-                "page up": "pageup", "page down": "pagedown"
-            }
-            
-            if key in special_keys:
-                pyautogui.press(special_keys[key])
-                self.log_message(f"Pressed {key} key")
-            else:
-                # For single character keys
-                pyautogui.press(key)
-                self.log_message(f"Pressed {key} key")
+    def start_voice_pipeline(self):
+        """Start listening, once speech recognition has loaded"""
+        state = self.startup.state("voice")
+        if state == STATE_LOADING:
+            self.voice_waiting = self.root.after(STARTUP_POLL_MS, self.start_voice_pipeline)
+            return
+        self.voice_waiting = None
+        if not self.voice_running:
+            return
+        if state == STATE_FAILED:
+            self.voice_running = False
+            self.voice_button.configure(text=BTN_START_VOICE)
+            self.set_voice_status(VOICE_ERROR)
+            return
+        if self.voice_pipeline is not None and self.voice_pipeline.capturing():
+            # The last session is still closing the microphone, which can only be open once
+            self.voice_waiting = self.root.after(STARTUP_POLL_MS, self.start_voice_pipeline)
+            return
         
-        # Respond to greeting
-        elif command in ["hello", "hi there", "hey"]:
-            self.speak_text("Hello, I'm listening to your commands")
+        # Listening continues while earlier utterances are being recognised; the
+        # background level measured last time on this microphone is the starting point
+        self.set_voice_status(VOICE_LISTENING)
+        source = MicrophoneSource(self.microphone)
+        self.voice_pipeline = VoicePipeline(
+            source, self.voice_backend, workers=self.voice_workers,
+            on_result=self.handle_voice_result, on_error=self.handle_voice_error,
+            on_state=self.update_voice_state, noise_floor=load_noise_floor(source.device)).start()
+    
+    def remember_noise_floor(self):
+        """Save the microphone's background level for the next session"""
+        vad = self.voice_pipeline.vad
+        if vad is None or vad.noise_floor is None:
+            return
+        try:
+            save_noise_floor(self.voice_pipeline.source.device, vad.noise_floor)
+        except OSError as e:
+            self.log_message(f"Could not save the noise level: {e}", SOURCE_VOICE, EVENT_ERROR)
+    
+    def handle_voice_result(self, text, utterance):
+        """Act on a recognised utterance; called by the voice pipeline in spoken order"""
+        heard = text if isinstance(text, str) else text[0]
+        self.log_message(f"Voice command: {heard}", SOURCE_VOICE, EVENT_COMMAND)
+        self.process_voice_command(text)
+    
+    def handle_voice_error(self, message):
+        """Report a failed recognition; the pipeline keeps listening"""
+        self.log_message(message, SOURCE_VOICE, EVENT_ERROR)
+        self.set_voice_status(VOICE_ERROR)
+    
+    def update_voice_state(self, state):
+        """Show whether the pipeline is only listening or also recognising"""
+        if self.voice_running:
+            self.set_voice_status(VOICE_PROCESSING if state == STATE_PROCESSING else VOICE_LISTENING)
+    
+    def process_voice_command(self, command):
+        """Process a voice command, or the alternative transcripts of one (best first)"""
+        match = self.voice_commands.match(command)
+        if match is None:
+            return
+        message = self.voice_commands.execute(match)
+        if message:
+            if match.fuzzy:
+                message += f" (heard \"{match.transcript}\")"
+            self.log_message(message, SOURCE_VOICE, EVENT_COMMAND)
     
     def run_tracking(self):
         """Main tracking thread for hand gesture recognition"""
-        last_mode_change_time = time.time() - 1  # Initialize with offset to allow immediate mode change
-        mode_change_cooldown = 0.5  # Seconds between mode changes to prevent rapid switching
+        # The camera and hand model may still be loading
+        try:
+            cap = self.startup.result("camera")
+            tracker = self.startup.result("hand model")
+        except Exception as e:
+            self.log_message(f"Can't start tracking: {e}", SOURCE_APP, EVENT_ERROR)
+            self.running = False
+            return
+        
+        # Capture runs on its own thread so we always process the freshest frame
+        metrics = self.metrics
+        grabber = self.grabber = FrameGrabber(cap, metrics=metrics).start()
+        tracked = False
         
         while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                self.log_message("Error reading from webcam")
-                break
-            
-            # Flip the frame horizontally for a more intuitive mirror view
-            frame = cv2.flip(frame, 1)
-            
-            # Convert to RGB for MediaPipe and process for hand detection
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-            
-            # Check if hand is detected
-            if not results.multi_hand_landmarks:
-                self.handle_no_hand_detected()
-                self.update_canvas(frame)
+            captured = grabber.slot.get(timeout=1.0)
+            if captured is None:
+                if grabber.finished:
+                    self.log_message("Error reading from webcam")
+                    break
                 continue
             
-            # Hand is detected - process landmarks
-            self.hand_status.configure(text=HAND_DETECTED)
-            self.process_hand_landmarks(frame, results, last_mode_change_time)
-            last_mode_change_time = self.update_mode_if_needed(last_mode_change_time, mode_change_cooldown)
-            
-            # Display the processed frame
-            self.update_canvas(frame)
-            
-            # Handle click cooldown
-            if self.click_cooldown > 0:
-                self.click_cooldown -= 1
-    
-    def handle_no_hand_detected(self):
-        """Handle case when no hand is detected"""
-        self.hand_status.configure(text=HAND_NOT_DETECTED)
-        self.finger_count_history = []
-        # Clear pointer smoothing history when hand disappears
-        self.history_x = []
-        self.history_y = []
-        self.prev_y = None
-        
-        # End dragging if active
-        if self.is_dragging:
-            pyautogui.mouseUp()
-            self.is_dragging = False
-            self.log_message("Drag ended (hand lost)")
-    
-    def process_hand_landmarks(self, frame, results, last_mode_change_time):
-        """Process detected hand landmarks"""
-        # Process only the first detected hand
-        hand_landmarks = results.multi_hand_landmarks[0]
-        
-        # Draw landmarks on frame
-        self.mp_draw.draw_landmarks(
-            frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-        
-        # Extract landmark positions
-        landmarks = []
-        for lm in hand_landmarks.landmark:
-            x, y = int(lm.x * frame.shape[1]), int(lm.y * frame.shape[0])
-            landmarks.append((x, y))
-        
-        # Count extended fingers and stabilize
-        finger_count = self.count_fingers(landmarks)
-        self.update_finger_count_history(finger_count)
-        
-        # Get most common finger count from history for stability
-        common_finger_count = self.get_common_finger_count()
-        
-        # Add finger count text to frame
-        cv2.putText(frame, f"Fingers: {common_finger_count}", (50, 50), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        
-        # Process according to current mode
-        self.process_current_mode(common_finger_count, landmarks)
-    
-    def update_finger_count_history(self, finger_count):
-        """Update history of finger counts for stabilization"""
-        self.finger_count_history.append(finger_count)
-        if len(self.finger_count_history) > 5:  # Keep last 5 frames
-            self.finger_count_history.pop(0)
-    
-    def get_common_finger_count(self):
-        """Get most common finger count from recent history"""
-        if not self.finger_count_history:
-            return 0
-        return max(set(self.finger_count_history), key=self.finger_count_history.count)
-    
-    def update_mode_if_needed(self, last_mode_change_time, cooldown):
-        """Update mode if finger count has changed and cooldown passed"""
-        common_finger_count = self.get_common_finger_count()
-        
-        if common_finger_count != self.last_finger_count and time.time() - last_mode_change_time > cooldown:
-            self.handle_finger_count_change(common_finger_count)
-            self.last_finger_count = common_finger_count
-            return time.time()  # Reset cooldown timer
-        
-        return last_mode_change_time  # Keep current cooldown timer
-    
-    def process_current_mode(self, finger_count, landmarks):
-        """Process hand gesture based on current mode"""
-        if self.mode == Mode.NAVIGATION and finger_count == 1:
-            self.handle_navigation_mode(landmarks)
-        elif self.mode == Mode.SCROLL_UP and finger_count == 2:
-            pyautogui.scroll(10)  # Scroll up with a gentle continuous movement
-        elif self.mode == Mode.SCROLL_DOWN and finger_count == 3:
-            pyautogui.scroll(-10)  # Scroll down with a gentle continuous movement
-        elif self.mode == Mode.CLICK and finger_count == 4:
-            if self.click_cooldown == 0:
-                pyautogui.click()
-                self.click_cooldown = 10
-                self.log_message("Click performed")
-        elif self.mode == Mode.DRAG and finger_count == 5:
-            self.handle_drag_mode(landmarks)
-    
-    def count_fingers(self, landmarks):
-        """Count number of extended fingers"""
-        if len(landmarks) < 21:  # Need all hand landmarks
-            return 0
-            
-        # Points for each finger tip and pip joints
-        tips = [8, 12, 16, 20]  # Index, middle, ring, pinky tips
-        pips = [6, 10, 14, 18]  # Corresponding pip joints
-        
-        # Count extended fingers (not thumb)
-        count = 0
-        for tip, pip in zip(tips, pips):
-            # Finger is extended if tip is higher than pip (lower y-value)
-            if landmarks[tip][1] < landmarks[pip][1]:  
-                count += 1
-                
-        # Special case for thumb
-        if landmarks[4][0] > landmarks[3][0] + 20:  # Thumb extended to right
-            count += 1
-            
-        return count
-    
-    def handle_finger_count_change(self, finger_count):
-        """Handle changes in detected finger count"""
-        # End dragging if it was active and we're switching modes
-        if self.is_dragging and finger_count != 5:
-            pyautogui.mouseUp()
-            self.is_dragging = False
-            self.log_message("Drag ended (mode change)")
-        
-        if finger_count == 1:
-            self.mode = Mode.NAVIGATION
-            self.mode_label.configure(text=MODE_NAVIGATION)
-            self.log_message("Switched to navigation mode")
-        
-        elif finger_count == 2:
-            self.mode = Mode.SCROLL_UP
-            self.mode_label.configure(text=MODE_SCROLL_UP)
-            self.log_message("Switched to scroll up mode")
-        
-        elif finger_count == 3:
-            self.mode = Mode.SCROLL_DOWN
-            self.mode_label.configure(text=MODE_SCROLL_DOWN)
-            self.log_message("Switched to scroll down mode")
-        
-        elif finger_count == 4:
-            self.mode = Mode.CLICK
-            self.mode_label.configure(text=MODE_CLICK)
-            self.log_message("Switched to click mode")
-            
-        elif finger_count == 5:
-            self.mode = Mode.DRAG
-            self.mode_label.configure(text=MODE_DRAG)
-            self.log_message("Switched to drag mode")
-            self.prev_y = None  # Reset drag reference point
-    
-    def handle_navigation_mode(self, landmarks):
-        """Handle mouse pointer control mode"""
-        # Use index finger tip for cursor control
-        index_tip = landmarks[8]
-        
-        # Apply smoothing to cursor movement
-        self.history_x.append(index_tip[0])
-        self.history_y.append(index_tip[1])
-        
-        # Keep history to smoothing length
-        if len(self.history_x) > self.smoothing:
-            self.history_x.pop(0)
-            self.history_y.pop(0)
-        
-        # Calculate smoothed position
-        if len(self.history_x) > 2:  # Need at least a few points for stability
-            smooth_x = sum(self.history_x) / len(self.history_x)
-            smooth_y = sum(self.history_y) / len(self.history_y)
+            # Detect the hand, update the mode and drive the mouse
+            started = time.perf_counter()
+            # Process CPU time, so MediaPipe's own worker threads are counted too
+            cpu_started = time.process_time()
+            frame = tracker.process_frame(captured.image, captured.timestamp)
+            if not tracked:
+                tracked = True
+                self.startup.mark("first frame")
+            cost = time.perf_counter() - started
+            metrics.frames_dropped = grabber.dropped
+            if self.governor:
+                self.governor.observe(cost, captured.timestamp, time.process_time() - cpu_started)
             
-            # Map camera coordinates to screen coordinates with larger margins
-            # This reduces the need for precise hand positioning
-            cam_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-            cam_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            
-            # Apply mapping with larger margins (120px from edges)
-            screen_x = np.interp(smooth_x, [120, cam_width-120], [0, self.screen_width])
-            screen_y = np.interp(smooth_y, [120, cam_height-120], [0, self.screen_height])
+            # Hand the processed frame to the preview pump, unless nobody will see it
+            if tracker.draw_overlays:
+                self.preview_slot.put(frame)
+            else:
+                self.frames_hidden += 1
             
-            # Move the mouse cursor with increased smoothing
-            pyautogui.moveTo(screen_x, screen_y)
+            # Hold to the governor's frame-rate cap; newer frames replace older ones meanwhile
+            if self.fps_cap:
+                delay = 1.0 / self.fps_cap - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+        
+        grabber.stop()
+        self.log_message(f"Frames captured: {grabber.frames_captured}, dropped: {grabber.dropped}")
     
-    def handle_drag_mode(self, landmarks):
-        """Handle drag mode with 5 fingers"""
-        # Use middle finger for drag reference
-        middle_tip = landmarks[12]
-        
-        # Apply smoothing to movement
-        self.history_x.append(middle_tip[0])
-        self.history_y.append(middle_tip[1])
-        
-        if len(self.history_x) > self.smoothing:
-            self.history_x.pop(0)
-            self.history_y.pop(0)
-        
-        if len(self.history_x) > 2:
-            smooth_x = sum(self.history_x) / len(self.history_x)
-            smooth_y = sum(self.history_y) / len(self.history_y)
-            
-            # Map coordinates to screen
-            cam_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-            cam_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            
-            screen_x = np.interp(smooth_x, [120, cam_width-120], [0, self.screen_width])
-            screen_y = np.interp(smooth_y, [120, cam_height-120], [0, self.screen_height])
-            
-            # Start drag if not already dragging
-            if not self.is_dragging:
-                pyautogui.mouseDown()
-                self.is_dragging = True
-                self.log_message("Started dragging")
-            
-            # Move while dragging
-            pyautogui.moveTo(screen_x, screen_y)
+    def apply_rung(self, rung, previous):
+        """Apply a governor step; called on the tracking thread"""
+        self.tracker.set_model_complexity(rung.model_complexity)
+        if (rung.width, rung.height) != (previous.width, previous.height) and self.grabber:
+            self.grabber.request_size(rung.width, rung.height)
+        self.fps_cap = rung.fps_cap
+        self.governor_preview = rung.preview
     
-    def update_canvas(self, frame):
-        """Update UI with the current camera frame"""
-        # Convert frame to RGB for tkinter
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
+    def preview_visible(self):
+        """Whether the preview is switched on and the window is not minimised"""
+        return (self.preview_enabled and self.governor_preview
+                and self.root.state() not in ("iconic", "withdrawn"))
+    
+    def render_preview(self):
+        """Main-loop pump: refresh status labels and show the latest processed frame"""
+        status = (self.hand_detected, self.current_mode, self.voice_text)
+        if status != self.shown_status:
+            if status[0] != self.shown_status[0]:
+                self.hand_status.configure(text=HAND_DETECTED if status[0] else HAND_NOT_DETECTED)
+            if status[1] != self.shown_status[1]:
+                self.mode_label.configure(text=MODE_LABELS[status[1]])
+            if status[2] != self.shown_status[2]:
+                self.voice_status.configure(text=status[2])
+            self.shown_status = status
+        
+        # Overlays are only drawn while the preview can be seen
+        visible = self.preview_visible()
+        if self.tracker:
+            self.tracker.draw_overlays = visible
+        
+        frame = self.preview_slot.get(timeout=0)
+        if frame is not None and visible:
+            t = self.metrics.now()
+            self.show_frame(frame)
+            self.metrics.lap("render", t)
+            self.frames_rendered += 1
+        if frame is not None:
+            self.preview_slot.release(frame)
+        
+        self.metrics.gauges["preview_rendered_total"] = self.frames_rendered
+        self.metrics.gauges["preview_skipped_total"] = self.preview_slot.dropped + self.frames_hidden
+        self.root.after(self.preview_interval, self.render_preview)
+    
+    def show_frame(self, rgb_frame):
+        """Display an RGB frame, reusing the existing PhotoImage when the size matches"""
         # Resize if needed
         frame_height, frame_width = rgb_frame.shape[:2]
-        max_width = 640
         
-        if frame_width > max_width:
-            scale_factor = max_width / frame_width
+        if frame_width > PREVIEW_MAX_WIDTH:
+            scale_factor = PREVIEW_MAX_WIDTH / frame_width
             new_width = int(frame_width * scale_factor)
             new_height = int(frame_height * scale_factor)
-            rgb_frame = cv2.resize(rgb_frame, (new_width, new_height))
+            if self.preview_buffer is None or self.preview_buffer.shape[:2] != (new_height, new_width):
+                self.preview_buffer = np.empty((new_height, new_width, 3), dtype=np.uint8)
+            rgb_frame = cv2.resize(rgb_frame, (new_width, new_height), dst=self.preview_buffer)
         
-        # Convert to PhotoImage
         img = Image.fromarray(rgb_frame)
-        imgtk = ImageTk.PhotoImage(image=img)
+        if self.preview_image is not None and (self.preview_image.width(), self.preview_image.height()) == img.size:
+            self.preview_image.paste(img)
+            return
         
-        # Update the label
-        self.camera_label.imgtk = imgtk
-        self.camera_label.configure(image=imgtk)
+        # First frame or new size: create the PhotoImage and attach it to the label
+        self.preview_image = ImageTk.PhotoImage(image=img)
+        self.camera_label.configure(image=self.preview_image)
     
     def on_close(self):
         """Clean up resources when application closes"""
         self.running = False
+        if self.voice_pipeline:
+            if self.voice_running:
+                self.remember_noise_floor()
+            self.voice_pipeline.stop(timeout=0)
         self.voice_running = False
         
-        # Make sure to release mouse if dragging
-        if self.is_dragging:
-            pyautogui.mouseUp()
+        # Make sure to release mouse if dragging, then apply any queued input
+        if self.tracker:
+            self.tracker.release()
+        self.actuator.stop()
+        if self.recorder:
+            self.recorder.close()
+        self.speech.stop(timeout=0)
         
         if self.cap and self.cap.isOpened():
             self.cap.release()
         
+        if self.metrics_server:
+            self.metrics_server.stop()
+        
+        self.activity.close()
         self.root.destroy()
         
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gesture & voice control")
+    parser.add_argument("source", nargs="?", default=0, help="webcam index or video file (default: webcam 0)")
+    parser.add_argument("--metrics-port", type=int, help="serve pipeline metrics on this localhost port")
+    parser.add_argument("--preview-fps", type=float, default=PREVIEW_FPS, help="camera preview refresh rate")
+    parser.add_argument("--roi", action="store_true", help="start with hand-region tracking switched on")
+    parser.add_argument("--idle-rate", type=float, default=DEFAULT_IDLE_RATE,
+                        help="hand detections per second while nothing moves (default: %(default)s)")
+    parser.add_argument("--idle-after", type=float, default=DEFAULT_IDLE_AFTER,
+                        help="seconds without a hand or motion before going idle (default: %(default)s)")
+    parser.add_argument("--motion-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="mean grey-level change that counts as motion (default: %(default)s)")
+    parser.add_argument("--cpu-budget", type=float, default=DEFAULT_CPU_BUDGET,
+                        help="CPU seconds per second tracking may use before --governor lowers quality; "
+                             "1.0 is one full core (default: %(default)s)")
+    parser.add_argument("--latency-slo", type=float, default=DEFAULT_LATENCY_SLO * 1000.0,
+                        help="per-frame processing target in ms (default: %(default)s)")
+    parser.add_argument("--governor", action="store_true",
+                        help="lower the model, frame rate, resolution and preview when tracking can't keep up")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE.name,
+                        help="calibration profile to use and to save calibrations under (default: %(default)s)")
+    parser.add_argument("--monitor", help="screen to control: primary, all, or a monitor number")
+    parser.add_argument("--gamma", type=float,
+                        help="cursor response curve; above 1 gives finer control near the middle")
+    parser.add_argument("--log-file", help="also write the activity log here as rotating JSON lines")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the tracking session here for replay with headless.py; "
+                             "smoothing, filter and calibration can't be changed meanwhile")
+    parser.add_argument("--voice-engine", choices=("google", "sphinx", "whisper"), default="google",
+                        help="speech recogniser; sphinx and whisper run offline (default: %(default)s)")
+    parser.add_argument("--voice-workers", type=int, default=DEFAULT_WORKERS,
+                        help="utterances recognised at the same time (default: %(default)s)")
+    parser.add_argument("--tts-cache", default=DEFAULT_CACHE_DIR, metavar="DIR",
+                        help="keep synthesised phrases here; an empty string disables the cache (default: %(default)s)")
+    parser.add_argument("--two-hands", action="store_true",
+                        help="track both hands: one steers, the other clicks and scrolls")
+    parser.add_argument("--pointer-hand", choices=("Right", "Left"), default=POINTER_HAND,
+                        help="the hand that steers with --two-hands, as MediaPipe labels it (default: %(default)s)")
+    parser.add_argument("--gestures", action="store_true",
+                        help="also recognise swipes, pinches and holds, and scroll as fast as the hand moves")
+    args = parser.parse_args()
+    if args.two_hands and args.record:
+        parser.error("--record can't be combined with --two-hands; session files hold one hand")
+    
+    motion_gate = MotionGate(threshold=args.motion_threshold, idle_rate=args.idle_rate, idle_after=args.idle_after)
+    governor = None
+    if args.governor:
+        governor = BudgetGovernor(cpu_budget=args.cpu_budget, latency_slo=args.latency_slo / 1000.0)
+    
+    profile = load_profiles().get(args.profile, DEFAULT_PROFILE._replace(name=args.profile))
+    if args.monitor:
+        profile = profile._replace(monitor=args.monitor)
+    if args.gamma:
+        profile = profile._replace(gamma=args.gamma)
+    
     root = ctk.CTk()
-    app = GestureVoiceControlApp(root)
+    app = GestureVoiceControlApp(root, args.source, metrics_port=args.metrics_port, preview_fps=args.preview_fps,
+                                 log_file=args.log_file, roi=args.roi, motion_gate=motion_gate, governor=governor,
+                                 profile=profile, record=args.record, voice_engine=args.voice_engine,
+                                 voice_workers=args.voice_workers, tts_cache=args.tts_cache or None,
+                                 max_hands=2 if args.two_hands else 1, pointer_hand=args.pointer_hand,
+                                 gestures=args.gestures)
     root.protocol("WM_DELETE_WINDOW", app.on_close)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""CPU-budget governor for the tracking loop
+
+The governor watches how long each frame takes to process, both as the
+CPU time spent processing per second and as the latency of each frame. When
+either stays over its budget it steps down a ladder of cheaper
+configurations; when there is plenty of headroom it steps back up. Each
+step changes as little as possible, so the MediaPipe model is only rebuilt
+on the steps that change its complexity.
+
+Nothing here touches the camera or MediaPipe: the caller applies a Rung in
+its `on_change` callback, which is what lets the governor be driven by
+synthetic timings (see `python benchmark.py governor`).
+"""
+from collections import namedtuple
+
+# One configuration; fps_cap None means process frames as fast as they come
+Rung = namedtuple("Rung", ["model_complexity", "width", "height", "fps_cap", "preview"])
+
+# Best quality first; the first rung is the app's original configuration
+DEFAULT_LADDER = (
+    Rung(1, 640, 480, None, True),
+    Rung(0, 640, 480, None, True),
+    Rung(0, 640, 480, 20, True),
+    Rung(0, 320, 240, 20, True),
+    Rung(0, 320, 240, 15, False),
+)
+
+DEFAULT_CPU_BUDGET = 1.0  # CPU seconds per second the tracking stage may use (1.0 = one full core)
+DEFAULT_LATENCY_SLO = 0.05  # Seconds of processing per frame
+
+
+def describe(rung):
+    """Short human-readable description of a rung"""
+    fps = f"{rung.fps_cap} FPS cap" if rung.fps_cap else "no FPS cap"
+    preview = "preview on" if rung.preview else "preview off"
+    return f"model {rung.model_complexity}, {rung.width}x{rung.height}, {fps}, {preview}"
+
+
+class BudgetGovernor:
+    """Steps through a ladder of configurations to keep frame cost within a budget
+
+    Over the last `window` frames the governor measures the CPU load (CPU
+    time spent processing per second of wall time) and the mean frame cost
+    (wall time, the latency the user feels), and
+    takes the larger of load / `cpu_budget` and cost / `latency_slo` as the
+    pressure; either budget can be None to ignore it. Then
+      - pressure above `high`, step down (cheaper),
+      - pressure below `low`, step up (better),
+      - pressure in between for `recover_dwell` seconds, try a step up.
+    A step is only taken `min_dwell` seconds after the previous one, and
+    stepping up again after stepping down waits `recover_dwell` seconds. If a
+    step up has to be undone within that time, the wait doubles (up to
+    `max_recover_dwell`), so a borderline load doesn't make the configuration
+    oscillate; once a step up has held that long, the wait is reset.
+    """
+
+    def __init__(self, cpu_budget=DEFAULT_CPU_BUDGET, latency_slo=DEFAULT_LATENCY_SLO, ladder=DEFAULT_LADDER,
+                 window=30, high=1.0, low=0.6, min_dwell=2.0, recover_dwell=10.0, max_recover_dwell=300.0,
+                 on_change=None, log=None):
+        self.cpu_budget = cpu_budget
+        self.latency_slo = latency_slo
+        self.ladder = tuple(ladder)
+        self.window = window
+        self.high = high
+        self.low = low
+        self.min_dwell = min_dwell
+        self.base_recover_dwell = recover_dwell
+        self.recover_dwell = recover_dwell  # Grows when steps up keep being undone
+        self.max_recover_dwell = max_recover_dwell
+        self.on_change = on_change
+        self.log_message = log
+        self.level = 0
+        self.steps = []  # (timestamp, from level, to level, pressure)
+        self.last_step_time = None
+        self.last_step_down_time = None
+        self.last_step_up_time = None
+        self._costs = [0.0] * window
+        self._cpu = [0.0] * window
+        self._times = [0.0] * window
+        self._clear()
+
+    @property
+    def rung(self):
+        return self.ladder[self.level]
+
+    def mean_cost(self):
+        """Mean frame cost over the window, in seconds"""
+        return self._sum / self._count if self._count else 0.0
+
+    def load(self):
+        """CPU time spent processing per second of wall time over the window (1.0 = a full core)"""
+        if self._count < 2:
+            return 0.0
+        oldest = (self._pos - self._count) % self.window
+        span = self._times[(self._pos - 1) % self.window] - self._times[oldest]
+        # Costs after the oldest frame fall inside the span
+        return (self._cpu_sum - self._cpu[oldest]) / span if span > 0 else 0.0
+
+    def pressure(self):
+        """How far over budget the loop is; above 1.0 means over"""
+        pressure = 0.0
+        if self.cpu_budget:
+            pressure = self.load() / self.cpu_budget
+        if self.latency_slo:
+            pressure = max(pressure, self.mean_cost() / self.latency_slo)
+        return pressure
+
+    def observe(self, cost, timestamp, cpu=None):
+        """Add one frame's processing cost; return the new Rung if the level changed
+
+        `cost` is the wall time the frame took and `cpu` the CPU time it used,
+        both in seconds; without `cpu` the wall time stands in for it.
+        """
+        if cpu is None:
+            cpu = cost
+        if self._count == self.window:
+            self._sum -= self._costs[self._pos]
+            self._cpu_sum -= self._cpu[self._pos]
+        else:
+            self._count += 1
+        self._costs[self._pos] = cost
+        self._cpu[self._pos] = cpu
+        self._times[self._pos] = timestamp
+        self._sum += cost
+        self._cpu_sum += cpu
+        self._pos = (self._pos + 1) % self.window
+
+        if self._count < self.window:
+            return None
+        if self.last_step_time is not None and timestamp - self.last_step_time < self.min_dwell:
+            return None
+
+        if (self.last_step_time == self.last_step_up_time and self.recover_dwell > self.base_recover_dwell
+                and timestamp - self.last_step_time >= self.recover_dwell):
+            self.recover_dwell = self.base_recover_dwell  # The last step up held
+
+        pressure = self.pressure()
+        if pressure > self.high and self.level < len(self.ladder) - 1:
+            if self.last_step_up_time is not None and timestamp - self.last_step_up_time < self.recover_dwell:
+                # The last step up didn't hold: wait longer before trying again
+                self.recover_dwell = min(self.recover_dwell * 2.0, self.max_recover_dwell)
+            self.last_step_down_time = timestamp
+            return self._step(self.level + 1, timestamp, pressure)
+        if pressure <= self.high and self.level > 0:
+            if self.last_step_down_time is not None and timestamp - self.last_step_down_time < self.recover_dwell:
+                return None
+            if pressure >= self.low and timestamp - self.last_step_time < self.recover_dwell:
+                return None
+            self.last_step_up_time = timestamp
+            return self._step(self.level - 1, timestamp, pressure)
+        return None
+
+    def _step(self, level, timestamp, pressure):
+        previous = self.level
+        self.level = level
+        self.last_step_time = timestamp
+        self.steps.append((timestamp, previous, level, pressure))
+
+        if self.log_message:
+            direction = "down" if level > previous else "up"
+            self.log_message(f"Performance: stepped {direction} to level {level} ({describe(self.rung)}); "
+                             f"{self.load():.0%} CPU, {self.mean_cost() * 1000.0:.1f} ms per frame")
+
+        # The new configuration costs differently, so judge it on fresh samples
+        self._clear()
+        if self.on_change:
+            self.on_change(self.rung, self.ladder[previous])
+        return self.rung
+
+    def _clear(self):
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._cpu_sum = 0.0
+
+    def stats(self):
+        """Governor state, named for export"""
+        return {
+            "governor_level": self.level,
+            "governor_steps_total": len(self.steps),
+            "governor_load": self.load(),
+            "governor_recover_dwell_seconds": self.recover_dwell,
+            "governor_mean_cost_seconds": self.mean_cost(),
+        }
@@ -0,0 +1,284 @@
+"""Headless replay and benchmark harness for the gesture pipeline
+
+Feeds a recorded video file or a directory of frames through the same
+GestureTracker the app uses, with the mouse and the UI replaced by recording
+stubs, and reports sustained FPS, per-frame latency and the emitted actions.
+No webcam, display or GPU is needed.
+
+A session file (see sessionlog.py) is replayed without detection instead,
+checking that the gesture logic still produces the recorded actions.
+
+Usage:
+    python headless.py recording.mp4 [--fps 30] [--json report.json] [--actions]
+    python headless.py recording.mp4 --compare-roi
+    python headless.py recording.mp4 --record session.gvs
+    python headless.py session.gvs [--actions]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from capture import open_frame_source
+from metrics import PipelineMetrics
+from motion import MotionGate
+from sessionlog import SessionRecorder, format_replay, is_session_file, replay_session
+from temporal import TemporalGestures
+from tracker import GestureTracker
+
+DEFAULT_FPS = 30.0
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+class RecordingMouse:
+    """Stand-in for pyautogui that records calls instead of moving the mouse"""
+
+    def __init__(self):
+        self.actions = []
+        self.frame = 0  # Index of the frame being processed, set by the harness
+
+    def _record(self, name, *args):
+        self.actions.append((self.frame, name, list(args)))
+
+    def moveTo(self, x, y):
+        self._record("moveTo", round(float(x), 2), round(float(y), 2))
+
+    def scroll(self, clicks):
+        self._record("scroll", int(clicks))
+
+    def click(self):
+        self._record("click")
+
+    def rightClick(self):
+        self._record("rightClick")
+
+    def doubleClick(self):
+        self._record("doubleClick")
+
+    def mouseDown(self):
+        self._record("mouseDown")
+
+    def mouseUp(self):
+        self._record("mouseUp")
+
+    def write(self, text):
+        self._record("write", text)
+
+    def press(self, key):
+        self._record("press", key)
+
+
+def latency_summary(latencies):
+    """Summarise per-frame latencies (seconds) as milliseconds"""
+    if not latencies:
+        return {}
+    ms = np.asarray(latencies) * 1000.0
+    summary = {f"p{p}": float(np.percentile(ms, p)) for p in LATENCY_PERCENTILES}
+    summary["mean"] = float(ms.mean())
+    summary["max"] = float(ms.max())
+    return summary
+
+
+def run_replay(source, fps=None, max_frames=None, screen_size=DEFAULT_SCREEN_SIZE, hands=None,
+               instrument=True, roi=False, motion_gate=None, record=None, max_hands=1, temporal=None):
+    """Replay a recording through the gesture pipeline and return a report dict
+
+    Frames are timestamped from the recording's frame rate (or `fps`) rather
+    than the wall clock, so mode changes happen as they would in real time
+    even when the replay runs faster or slower. Per-stage timings are
+    included unless `instrument` is False, which is how the cost of the
+    instrumentation itself is measured. `roi` turns on region-of-interest
+    tracking, `motion_gate` replaces the default idle scheduler, `record`
+    is a session file to record the replay to, `max_hands` 2 tracks a
+    second hand for chords and `temporal` adds swipes, pinches and holds.
+    """
+    frames = open_frame_source(source)
+    if fps is None:
+        fps = frames.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+
+    mouse = RecordingMouse()
+    events = []
+    hand_frames = []
+    metrics = PipelineMetrics(enabled=instrument)
+    tracker = GestureTracker(
+        mouse=mouse,
+        screen_size=screen_size,
+        hands=hands,
+        on_hand_status=lambda detected: hand_frames.append(detected),
+        on_mode_change=lambda mode: events.append((mouse.frame, "mode", mode.name)),
+        log=lambda message: events.append((mouse.frame, "log", message)),
+        metrics=metrics,
+        roi=roi,
+        motion_gate=motion_gate,
+        max_hands=max_hands,
+        temporal=temporal
+    )
+    recorder = SessionRecorder(record) if record else None
+    if recorder is not None:
+        tracker.set_recorder(recorder)
+
+    latencies = []
+    index = 0
+    started = time.perf_counter()
+
+    while max_frames is None or index < max_frames:
+        ok, frame = frames.read()
+        if not ok:
+            break
+
+        mouse.frame = index
+        t0 = time.perf_counter()
+        tracker.process_frame(frame, index / fps)
+        latencies.append(time.perf_counter() - t0)
+        index += 1
+
+    wall_time = time.perf_counter() - started
+    tracker.release()
+    if recorder is not None:
+        recorder.close()
+    if hasattr(frames, "release"):
+        frames.release()
+
+    snapshot = metrics.snapshot()
+    return {
+        "source": str(source),
+        "frames": index,
+        "hand_frames": sum(hand_frames),
+        "wall_time": wall_time,
+        "fps": index / wall_time if wall_time > 0 else 0.0,
+        "latency_ms": latency_summary(latencies),
+        "stages": snapshot["stages"],
+        "overhead_us_per_frame": snapshot["overhead_us_per_frame"] if instrument else 0.0,
+        "roi": dict(tracker.detector.stats(), enabled=roi),
+        "motion": tracker.gate.stats(),
+        "action_counts": dict(Counter(action[1] for action in mouse.actions)),
+        "actions": mouse.actions,
+        "events": events,
+    }
+
+
+def format_report(report):
+    """Format the headline numbers of a replay report as text"""
+    lines = [
+        f"Source:       {report['source']}",
+        f"Frames:       {report['frames']} ({report['hand_frames']} with a hand)",
+        f"Wall time:    {report['wall_time']:.2f} s",
+        f"Sustained:    {report['fps']:.1f} FPS",
+    ]
+    latency = report["latency_ms"]
+    if latency:
+        lines.append("Latency (ms): " + ", ".join(
+            f"{name} {value:.2f}" for name, value in latency.items()))
+    for name, stage in report["stages"].items():
+        lines.append(f"  {name:<10} mean {stage['mean_ms']:7.3f}  p50 {stage['p50_ms']:7.3f}  "
+                     f"p95 {stage['p95_ms']:7.3f}  p99 {stage['p99_ms']:7.3f}")
+    if report["overhead_us_per_frame"]:
+        lines.append(f"Instrumentation overhead: {report['overhead_us_per_frame']:.1f} us/frame")
+    roi = report["roi"]
+    if roi["enabled"]:
+        lines.append(f"ROI tracking: {roi['roi_frames_total']} crop frames, {roi['roi_search_frames_total']} searches, "
+                     f"loss rate {roi['roi_loss_rate']:.1%}, {roi['roi_pixel_fraction']:.0%} of full-frame pixels")
+    motion = report["motion"]
+    if motion["motion_skipped_frames_total"]:
+        lines.append(f"Idle gating:  skipped detection on {motion['motion_skipped_frames_total']} frames, "
+                     f"saving about {motion['motion_saved_seconds_total'] * 1000.0:.0f} ms")
+    counts = report["action_counts"]
+    lines.append("Actions:      " + (", ".join(
+        f"{name} x{count}" for name, count in sorted(counts.items())) or "none"))
+    return "\n".join(lines)
+
+
+def compare_roi(source, **kwargs):
+    """Replay a recording with and without ROI tracking and report the inference time saved"""
+    def kinds(report):
+        return [(frame, name) for frame, name, _ in report["actions"]]
+
+    full = run_replay(source, roi=False, **kwargs)
+    roi = run_replay(source, roi=True, **kwargs)
+    full_ms = full["stages"]["inference"]["mean_ms"] * full["frames"]
+    roi_ms = roi["stages"]["inference"]["mean_ms"] * roi["frames"]
+    stats = roi["roi"]
+    lines = [
+        f"Source:          {source}",
+        f"Frames:          {full['frames']} ({full['hand_frames']} with a hand full-frame, "
+        f"{roi['hand_frames']} with ROI tracking)",
+        f"Inference:       full frame {full_ms:.1f} ms, ROI {roi_ms:.1f} ms "
+        f"(saved {full_ms - roi_ms:.1f} ms, {(full_ms - roi_ms) / full_ms if full_ms else 0.0:.1%})",
+        f"Tracking loss:   {stats['roi_losses_total']} of {stats['roi_frames_total']} crop frames "
+        f"({stats['roi_loss_rate']:.1%})",
+        f"Pixels:          {stats['roi_pixel_fraction']:.0%} of full-frame",
+        f"Same actions:    {'yes' if kinds(full) == kinds(roi) else 'no'}",
+    ]
+    if kinds(full) == kinds(roi):
+        drift = max((abs(a - b) for x, y in zip(full["actions"], roi["actions"])
+                     for a, b in zip(x[2], y[2]) if x[1] == "moveTo"), default=0.0)
+        lines.append(f"Cursor drift:    {drift:.1f} px at most")
+    return "\n".join(lines)
+
+
+def parse_screen_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recording through the gesture pipeline without a webcam or display")
+    parser.add_argument("source", help="video file, directory of frame images or session file")
+    parser.add_argument("--fps", type=float, help="frame rate of the recording (default: read from the file, else 30)")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--screen", type=parse_screen_size, default=DEFAULT_SCREEN_SIZE,
+                        help="screen size used for cursor mapping, e.g. 1920x1080")
+    parser.add_argument("--json", metavar="PATH", help="write the full report, including the action stream, as JSON")
+    parser.add_argument("--actions", action="store_true", help="print the emitted action stream")
+    parser.add_argument("--no-metrics", action="store_true", help="disable per-stage instrumentation")
+    parser.add_argument("--roi", action="store_true", help="track the hand in a crop around its last position")
+    parser.add_argument("--no-idle-gate", action="store_true", help="run hand detection on every frame")
+    parser.add_argument("--compare-roi", action="store_true",
+                        help="replay with and without ROI tracking and report the inference time saved")
+    parser.add_argument("--record", metavar="PATH", help="record the replay as a session file")
+    parser.add_argument("--two-hands", action="store_true", help="track a second hand for chorded clicks and scrolls")
+    parser.add_argument("--gestures", action="store_true",
+                        help="also recognise swipes, pinches and holds, and scroll as fast as the hand moves")
+    args = parser.parse_args(argv)
+    if args.two_hands and args.record:
+        parser.error("--record can't be combined with --two-hands; session files hold one hand")
+
+    if is_session_file(args.source):
+        report = replay_session(args.source, max_frames=args.max_frames)
+        print(format_replay(report))
+        if args.actions:
+            for frame, name, action_args in report["actions"]:
+                print(f"{frame:6d} {name} {' '.join(str(a) for a in action_args)}".rstrip())
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0 if report["divergence"] is None else 1
+
+    if args.compare_roi:
+        print(compare_roi(args.source, fps=args.fps, max_frames=args.max_frames, screen_size=args.screen))
+        return 0
+
+    report = run_replay(args.source, fps=args.fps, max_frames=args.max_frames, screen_size=args.screen,
+                        instrument=not args.no_metrics, roi=args.roi,
+                        motion_gate=MotionGate(enabled=False) if args.no_idle_gate else None, record=args.record,
+                        max_hands=2 if args.two_hands else 1, temporal=TemporalGestures() if args.gestures else None)
+    print(format_report(report))
+
+    if args.actions:
+        for frame, name, action_args in report["actions"]:
+            print(f"{frame:6d} {name} {' '.join(str(a) for a in action_args)}".rstrip())
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Vectorized hand landmark representation and finger classification
+
+A hand is a float32 array of shape (21, 3) holding MediaPipe's landmarks in
+pixel units (x, y, and z scaled like x). Every function here also accepts a
+stack of hands of shape (N, 21, 3) and classifies all of them at once;
+a single hand is classified with plain float arithmetic, as NumPy's per-call
+cost dominates at that size.
+
+count_fingers_upright() keeps the original tip-above-PIP rule. It is the
+cheapest per frame, and holds for the upright right hand the app tracks by
+default; the angle rules hold for either hand at any orientation.
+"""
+import math
+import operator
+from itertools import chain
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+WRIST = 0
+THUMB_MCP, THUMB_IP, THUMB_TIP = 2, 3, 4
+INDEX_MCP = 5
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+
+# Index, middle, ring and pinky joints
+FINGER_MCPS = np.array([5, 9, 13, 17])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+FINGER_TIPS = np.array([8, 12, 16, 20])
+TIP_IDS = np.array([4, 8, 12, 16, 20])  # Thumb first
+
+# A finger counts as extended when the MCP-PIP-TIP angle is wider than about 120 degrees
+STRAIGHT_COS = -0.5
+# Thumb tip must be this far from the index MCP, relative to the wrist-to-index-MCP length
+THUMB_SPREAD = 0.6
+# Upright rule: pixels the thumb tip must be right of its IP joint, in the mirrored image
+THUMB_OFFSET = 20.0
+
+_XYZ = operator.attrgetter("x", "y", "z")
+_SCALES = {}  # (width, height) -> float32 [width, height, width], so scaling converts nothing per frame
+
+
+def new_landmark_array():
+    """Preallocated landmark buffer for one hand"""
+    return np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+
+
+def landmarks_to_array(hand_landmarks, width, height, out=None):
+    """Copy a MediaPipe hand into a (21, 3) float32 pixel-space array"""
+    if out is None:
+        out = new_landmark_array()
+    # One pass in C over the landmark objects, then one copy and one scale
+    out.reshape(-1)[:] = np.fromiter(chain.from_iterable(map(_XYZ, hand_landmarks.landmark)),
+                                     np.float32, 3 * NUM_LANDMARKS)
+    scale = _SCALES.get((width, height))
+    if scale is None:
+        scale = _SCALES[width, height] = np.array((width, height, width), dtype=np.float32)
+    np.multiply(out, scale, out=out)
+    return out
+
+
+def _difference_matrix(pairs):
+    """Matrix D such that (D @ landmarks)[k] = landmarks[a_k] - landmarks[b_k]"""
+    d = np.zeros((len(pairs), NUM_LANDMARKS), dtype=np.float32)
+    for k, (a, b) in enumerate(pairs):
+        d[k, a] += 1.0
+        d[k, b] -= 1.0
+    return d
+
+
+# Every vector the classifier needs, produced by a single matrix product:
+#   0-3   PIP -> MCP          4-7   PIP -> tip
+#   8-11  wrist -> tip        12-15 wrist -> PIP
+#   16    index MCP -> thumb tip, 17 wrist -> index MCP
+#   18    pinky MCP -> thumb tip, 19 pinky MCP -> thumb IP
+_DIFFERENCES = _difference_matrix(
+    list(zip(FINGER_MCPS, FINGER_PIPS)) + list(zip(FINGER_TIPS, FINGER_PIPS))
+    + [(tip, WRIST) for tip in FINGER_TIPS] + [(pip, WRIST) for pip in FINGER_PIPS]
+    + [(THUMB_TIP, INDEX_MCP), (INDEX_MCP, WRIST), (THUMB_TIP, PINKY_MCP), (THUMB_IP, PINKY_MCP)]
+)
+
+
+# (MCP, PIP, tip) offsets of each finger into a flattened hand
+_FINGER_JOINTS = tuple((3 * m, 3 * p, 3 * t) for m, p, t in zip(FINGER_MCPS.tolist(), FINGER_PIPS.tolist(),
+                                                               FINGER_TIPS.tolist()))
+
+
+def _one_hand_states(hand):
+    """finger_states() for one (21, 3) float32 hand as a list of bools, the same rules in plain floats"""
+    f = hand.ravel().tolist()
+    wx, wy, wz = f[0], f[1], f[2]
+    tip, ip, index, pinky = 3 * THUMB_TIP, 3 * THUMB_IP, 3 * INDEX_MCP, 3 * PINKY_MCP
+    sx, sy, sz = f[tip] - f[index], f[tip + 1] - f[index + 1], f[tip + 2] - f[index + 2]
+    ix, iy, iz = f[index] - wx, f[index + 1] - wy, f[index + 2] - wz
+    px, py, pz = f[tip] - f[pinky], f[tip + 1] - f[pinky + 1], f[tip + 2] - f[pinky + 2]
+    qx, qy, qz = f[ip] - f[pinky], f[ip + 1] - f[pinky + 1], f[ip + 2] - f[pinky + 2]
+    states = [sx * sx + sy * sy + sz * sz > THUMB_SPREAD * THUMB_SPREAD * (ix * ix + iy * iy + iz * iz)
+              and px * px + py * py + pz * pz > qx * qx + qy * qy + qz * qz]
+    for m, p, t in _FINGER_JOINTS:
+        x, y, z = f[p], f[p + 1], f[p + 2]
+        ax, ay, az = f[m] - x, f[m + 1] - y, f[m + 2] - z
+        bx, by, bz = f[t] - x, f[t + 1] - y, f[t + 2] - z
+        extended = ax * bx + ay * by + az * bz < STRAIGHT_COS * math.sqrt(
+            (ax * ax + ay * ay + az * az) * (bx * bx + by * by + bz * bz))
+        if extended:
+            cx, cy, cz = f[t] - wx, f[t + 1] - wy, f[t + 2] - wz
+            dx, dy, dz = x - wx, y - wy, z - wz
+            extended = cx * cx + cy * cy + cz * cz > dx * dx + dy * dy + dz * dz
+        states.append(extended)
+    return states
+
+
+def finger_states(landmarks):
+    """Extended state of [thumb, index, middle, ring, pinky] as booleans
+
+    Accepts (21, 3) for one hand (returns shape (5,)) or (N, 21, 3) for a
+    batch (returns shape (N, 5)). The rules compare joint angles and
+    distances, so they don't depend on hand orientation or image size.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim == 2:
+        return np.array(_one_hand_states(landmarks))
+    v = _DIFFERENCES @ landmarks
+    sq = (v * v).sum(axis=-1)
+    states = np.empty(sq.shape[:-1] + (5,), dtype=bool)
+
+    # Fingers: straight at the PIP joint (cos < STRAIGHT_COS, compared without
+    # dividing) and the tip further from the wrist than the PIP
+    dot = (v[..., 0:4, :] * v[..., 4:8, :]).sum(axis=-1)
+    straight = dot < STRAIGHT_COS * np.sqrt(sq[..., 0:4] * sq[..., 4:8])
+    states[..., 1:] = straight & (sq[..., 8:12] > sq[..., 12:16])
+
+    # Thumb: tip spread away from the index MCP and pointing away from the pinky side
+    spread = sq[..., 16] > THUMB_SPREAD * THUMB_SPREAD * sq[..., 17]
+    states[..., 0] = spread & (sq[..., 18] > sq[..., 19])
+
+    return states
+
+
+def count_fingers(landmarks):
+    """Number of extended fingers for one hand (int) or a batch (int array)"""
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim == 2:
+        return sum(_one_hand_states(landmarks))
+    return finger_states(landmarks).sum(axis=-1)
+
+
+def count_fingers_upright(hand):
+    """Extended fingers of one (21, 3) hand by the original rule, the cheapest per frame
+
+    A finger counts when its tip is above its PIP joint, and the thumb when
+    its tip is more than THUMB_OFFSET pixels right of its IP joint. That
+    only holds for an upright right hand in the mirrored image.
+    """
+    f = hand.ravel().tolist()
+    # y of each fingertip against its PIP (8/6, 12/10, 16/14, 20/18), x of the thumb tip against its IP
+    return ((f[25] < f[19]) + (f[37] < f[31]) + (f[49] < f[43]) + (f[61] < f[55])
+            + (f[3 * THUMB_TIP] > f[3 * THUMB_IP] + THUMB_OFFSET))
+
+
+def fingertips(landmarks):
+    """Fingertip (x, y) positions, thumb first: shape (5, 2) or (N, 5, 2)"""
+    return np.asarray(landmarks)[..., TIP_IDS, :2]
@@ -0,0 +1,244 @@
+"""Low-overhead per-stage timing for the tracking pipeline
+
+Stages are timed with lap() calls on the monotonic perf counter:
+
+    t = metrics.now()
+    frame = cv2.flip(frame, 1)
+    t = metrics.lap("flip", t)
+
+Each stage keeps a fixed-bucket histogram plus a small ring of recent samples
+for rolling percentiles. Percentiles are only computed when someone asks for
+them (the UI, a file dump or the localhost exporter), never on the hot path.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds
+BUCKET_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_WINDOW = 256
+DEFAULT_PORT = 9464
+
+
+class StageHistogram:
+    """Latency histogram for one pipeline stage"""
+
+    __slots__ = ("buckets", "count", "total", "recent", "_pos")
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = [0.0] * window
+        self._pos = 0
+
+    def observe(self, seconds):
+        """Record one sample"""
+        i = 0
+        for bound in BUCKET_BOUNDS:
+            if seconds <= bound:
+                break
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent[self._pos] = seconds
+        self._pos = (self._pos + 1) % len(self.recent)
+
+    def quantiles(self):
+        """Rolling quantiles over the recent window, in seconds"""
+        samples = self.recent[:min(self.count, len(self.recent))]
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        samples.sort()
+        last = len(samples) - 1
+        return {q: samples[round(q * last)] for q in QUANTILES}
+
+
+class PipelineMetrics:
+    """Stage timers and frame counters for the tracking pipeline
+
+    Instrumentation can be switched on and off at runtime with `enabled`;
+    when it is off, now() and lap() return immediately.
+    """
+
+    def __init__(self, enabled=True, window=DEFAULT_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.gauges = {}  # Extra numeric values published by other components
+        self._frame_times = [0.0] * window
+        self._frame_pos = 0
+        self.lap_cost = None  # Measured on first use
+
+    def now(self):
+        """Start time for the next lap, or 0.0 when disabled"""
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def lap(self, stage, start):
+        """Record the time since `start` against `stage` and return the current time"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram(self.window)
+        histogram.observe(now - start)
+        return now
+
+    def frame_done(self):
+        """Count a processed frame"""
+        self.frames_processed += 1
+        if self.enabled:
+            self._frame_times[self._frame_pos] = time.perf_counter()
+            self._frame_pos = (self._frame_pos + 1) % self.window
+
+    def fps(self):
+        """Processing rate over the recent frame window"""
+        n = min(self.frames_processed, self.window)
+        if n < 2:
+            return 0.0
+        newest = self._frame_times[(self._frame_pos - 1) % self.window]
+        oldest = self._frame_times[(self._frame_pos - n) % self.window]
+        return (n - 1) / (newest - oldest) if newest > oldest else 0.0
+
+    def reset(self):
+        """Forget all samples and counters"""
+        self.stages = {}
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self._frame_pos = 0
+
+    def measure_lap_cost(self, iterations=20000):
+        """Measure the cost of one enabled lap() call in seconds"""
+        probe = PipelineMetrics(enabled=True, window=self.window)
+        t = probe.now()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t = probe.lap("probe", t)
+        return (time.perf_counter() - started) / iterations
+
+    def overhead_per_frame(self):
+        """Estimated instrumentation cost per frame in seconds"""
+        if not self.frames_processed:
+            return 0.0
+        if self.lap_cost is None:
+            self.lap_cost = self.measure_lap_cost()
+        laps = sum(h.count for h in self.stages.values())
+        return self.lap_cost * laps / self.frames_processed
+
+    def snapshot(self):
+        """Plain-dict view of all metrics, with times in milliseconds"""
+        stages = {}
+        for name, histogram in list(self.stages.items()):
+            quantiles = histogram.quantiles()
+            stages[name] = {
+                "count": histogram.count,
+                "mean_ms": histogram.total / histogram.count * 1000.0 if histogram.count else 0.0,
+                **{f"p{round(q * 100)}_ms": value * 1000.0 for q, value in quantiles.items()},
+            }
+        return {
+            "enabled": self.enabled,
+            "fps": self.fps(),
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "overhead_us_per_frame": self.overhead_per_frame() * 1e6,
+            "gauges": dict(self.gauges),
+            "stages": stages,
+        }
+
+    def summary(self, stage="frame"):
+        """One-line status text for the UI"""
+        histogram = self.stages.get(stage)
+        if not self.enabled or histogram is None:
+            return f"⏱ {self.fps():.0f} FPS"
+        p95 = histogram.quantiles()[0.95] * 1000.0
+        return f"⏱ {self.fps():.0f} FPS | p95 {p95:.0f} ms | dropped {self.frames_dropped}"
+
+    def prometheus_text(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# TYPE gesture_frames_processed_total counter",
+            f"gesture_frames_processed_total {self.frames_processed}",
+            "# TYPE gesture_frames_dropped_total counter",
+            f"gesture_frames_dropped_total {self.frames_dropped}",
+            "# TYPE gesture_fps gauge",
+            f"gesture_fps {self.fps():.3f}",
+            "# TYPE gesture_instrumentation_overhead_seconds gauge",
+            f"gesture_instrumentation_overhead_seconds {self.overhead_per_frame():.9f}",
+        ]
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE gesture_{name} gauge")
+            lines.append(f"gesture_{name} {value}")
+
+        stages = sorted(self.stages.items())
+        lines.append("# TYPE gesture_stage_seconds histogram")
+        for name, histogram in stages:
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS + ("+Inf",), histogram.buckets):
+                cumulative += count
+                lines.append(f'gesture_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'gesture_stage_seconds_sum{{stage="{name}"}} {histogram.total:.9f}')
+            lines.append(f'gesture_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+        lines.append("# TYPE gesture_stage_recent_seconds gauge")
+        for name, histogram in stages:
+            for q, value in histogram.quantiles().items():
+                lines.append(f'gesture_stage_recent_seconds{{stage="{name}",quantile="{q}"}} {value:.9f}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the metrics to a file: JSON for *.json, Prometheus text otherwise"""
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.prometheus_text())
+
+
+class MetricsServer:
+    """Serves PipelineMetrics as Prometheus text on localhost"""
+
+    def __init__(self, metrics, port=DEFAULT_PORT, host="127.0.0.1"):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path not in ("/", "/metrics"):
+                    handler.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        """Start serving in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,79 @@
+"""Motion-gated scheduling of hand detection
+
+With nobody in front of the camera there is no point running MediaPipe on
+every frame. MotionGate compares a tiny grayscale copy of each frame with
+the previous one; once no hand has been seen for `idle_after` seconds and
+nothing moves, detection only runs `idle_rate` times a second. Any motion,
+or a hand found by one of those idle checks, switches straight back to
+running on every frame.
+"""
+import cv2
+import numpy as np
+
+DEFAULT_THRESHOLD = 6.0  # Mean absolute grey-level change that counts as motion
+DEFAULT_IDLE_RATE = 2.0  # Detections per second while idle
+DEFAULT_IDLE_AFTER = 2.0  # Seconds without a hand or motion before going idle
+DEFAULT_SIZE = (80, 60)  # Width and height of the motion-check image
+
+
+class MotionGate:
+    """Decides per frame whether hand detection needs to run"""
+
+    def __init__(self, enabled=True, threshold=DEFAULT_THRESHOLD, idle_rate=DEFAULT_IDLE_RATE,
+                 idle_after=DEFAULT_IDLE_AFTER, size=DEFAULT_SIZE):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.idle_rate = idle_rate
+        self.idle_after = idle_after
+        self.size = size
+        self.idle = False
+        self.motion = 0.0  # Last measured motion level
+        self.last_activity = None  # Time of the last hand or motion
+        self.last_detection = None  # Time detection last ran
+        self.skipped = 0
+        self.saved = 0.0  # Estimated seconds of detection skipped
+        self.detection_time = 0.0  # Moving average of one detection, in seconds
+        self._small = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self._gray = np.zeros((size[1], size[0]), dtype=np.uint8)
+        self._previous = np.zeros_like(self._gray)
+        self._diff = np.zeros_like(self._gray)
+
+    def should_detect(self, frame, timestamp):
+        """Whether to run hand detection on this BGR frame"""
+        if not self.enabled:
+            return True
+
+        # Motion level: mean change of a downscaled grayscale image
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous, self._gray = self._gray, self._previous
+        self.motion = float(cv2.mean(self._diff)[0])
+
+        if self.last_activity is None or self.motion >= self.threshold:
+            self.last_activity = timestamp
+        self.idle = timestamp - self.last_activity > self.idle_after
+
+        if not self.idle or self.last_detection is None or timestamp - self.last_detection >= 1.0 / self.idle_rate:
+            self.last_detection = timestamp
+            return True
+
+        self.skipped += 1
+        self.saved += self.detection_time
+        return False
+
+    def record(self, timestamp, hand_found, duration):
+        """Report the outcome and cost of a detection that ran"""
+        self.detection_time += 0.1 * (duration - self.detection_time) if self.detection_time else duration
+        if hand_found:
+            self.last_activity = timestamp
+            self.idle = False
+
+    def stats(self):
+        """Scheduler state and savings, named for export"""
+        return {
+            "motion_idle": int(self.idle),
+            "motion_level": self.motion,
+            "motion_skipped_frames_total": self.skipped,
+            "motion_saved_seconds_total": self.saved,
+        }
@@ -0,0 +1,348 @@
+"""Hand detection for several cameras on a pool of worker processes
+
+Each frame source is served by a worker process that owns the source's own
+MediaPipe Hands model, so detection for different cameras runs in parallel
+instead of taking turns on one interpreter's GIL. With fewer workers than
+sources, sources are shared out between them.
+
+Frames are not pickled through a pipe: every source has a ring of frame
+slots in shared memory. submit() copies a BGR frame into a free slot and
+sends the worker only (source, slot, seq, timestamp); the worker converts
+and mirrors the frame as the tracker does, detects, and sends back an
+Observation with the landmarks as a small array. The slot is free again
+once its Observation has been collected. A source whose slots are all in
+flight drops the frame, since a newer one is coming anyway.
+
+HandFusion picks, for each moment, the best view of the hand any camera
+has, and hands it on shaped like Hands.process() results so the gesture
+logic can't tell it came from several cameras. Views are ranked by how much
+of the hand is in the picture and how large it is, as MediaPipe's Hands
+doesn't report a per-hand detection score (the handedness score only says
+how sure it is which hand it is). track_cameras() puts it all together for a
+GestureTracker, and forgets the cursor's smoothing and movement history when
+another camera takes over, since each camera sees the hand in its own frame.
+"""
+import multiprocessing
+import queue
+import time
+from collections import deque, namedtuple
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from capture import FrameGrabber, open_frame_source
+from landmarks import MIDDLE_MCP, WRIST
+
+DEFAULT_FRAME_SHAPE = (480, 640)  # Frames of any other size are resized into the slots
+DEFAULT_SLOTS = 3  # Frames in flight per source
+SWITCH_MARGIN = 0.1  # How much better another camera's view must be to take over
+QUALITY_HAND_SIZE = 0.15  # Wrist to middle MCP, as a fraction of the frame width, seen well enough
+
+# hands: (k, 21, 3) float32 normalized landmarks; labels and scores: handedness of each
+# quality: how good each view of a hand is, 0-1 (see hand_quality); latency: seconds the worker spent detecting
+Observation = namedtuple("Observation", ["source", "seq", "timestamp", "hands", "labels", "scores", "quality",
+                                         "latency"])
+
+# Shaped like MediaPipe's results; landmark objects only need x, y and z
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+HandLandmarks = namedtuple("HandLandmarks", ["landmark"])
+Category = namedtuple("Category", ["label", "score"])
+Classification = namedtuple("Classification", ["classification"])
+FusedResults = namedtuple("FusedResults", ["multi_hand_landmarks", "multi_handedness", "source", "timestamp"])
+
+
+def mediapipe_hands(max_hands=1, model_complexity=1):
+    """A MediaPipe Hands model set up as the tracker sets up its own; the default worker model"""
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(max_num_hands=max_hands, model_complexity=model_complexity,
+                                    min_detection_confidence=0.6, min_tracking_confidence=0.6)
+
+
+class WorkerHands:
+    """Stands in for the tracker's own model when detection happens in the pool's workers"""
+
+    def process(self, rgb_frame):
+        raise RuntimeError("hands are detected in the worker processes")
+
+    def close(self):
+        pass
+
+
+def hand_quality(hands, aspect, presence=None):
+    """How well each of (k, 21, 3) normalized hands is seen, 0-1
+
+    The share of landmarks inside the frame (or their mean presence, where
+    the model reports it), scaled down for a hand too small or far away to
+    be located precisely. `aspect` is the frame's height over its width.
+    """
+    x, y = hands[..., 0], hands[..., 1]
+    if presence is not None and presence.any():
+        visible = presence.mean(axis=-1)
+    else:
+        visible = ((x >= 0.0) & (x <= 1.0) & (y >= 0.0) & (y <= 1.0)).mean(axis=-1)
+    size = np.hypot(x[..., MIDDLE_MCP] - x[..., WRIST], (y[..., MIDDLE_MCP] - y[..., WRIST]) * aspect)
+    return visible * np.minimum(size / QUALITY_HAND_SIZE, 1.0)
+
+
+def _observe(source, seq, timestamp, results, latency, aspect):
+    """Observation holding MediaPipe results as arrays"""
+    found = results.multi_hand_landmarks or ()
+    hands = np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in found], dtype=np.float32)
+    hands = hands.reshape(len(found), 21, 3)
+    presence = np.array([[getattr(lm, "presence", 0.0) or 0.0 for lm in hand.landmark] for hand in found])
+    handedness = (results.multi_handedness or ())[:len(found)]
+    labels = tuple(h.classification[0].label for h in handedness)
+    scores = tuple(float(h.classification[0].score) for h in handedness)
+    if len(scores) < len(found):
+        labels += (None,) * (len(found) - len(labels))
+        scores += (0.0,) * (len(found) - len(scores))
+    quality = tuple(hand_quality(hands, aspect, presence.reshape(len(found), 21)).tolist())
+    return Observation(source, seq, timestamp, hands, labels, scores, quality, latency)
+
+
+def _worker(rings, requests, results, hands_factory, factory_kwargs):
+    """Worker process: detect hands in the frames of the sources in `rings`"""
+    blocks = {}
+    frames = {}
+    models = {}
+    for source, (name, shape) in rings.items():
+        blocks[source] = shared_memory.SharedMemory(name=name)
+        frames[source] = np.ndarray(shape, dtype=np.uint8, buffer=blocks[source].buf)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            source, slot, seq, timestamp = request
+            rgb = cv2.cvtColor(frames[source][slot], cv2.COLOR_BGR2RGB)
+            cv2.flip(rgb, 1, dst=rgb)
+            model = models.get(source)
+            if model is None:
+                model = models[source] = hands_factory(**factory_kwargs)  # Tracking state is per camera
+            started = time.perf_counter()
+            detected = model.process(rgb)
+            latency = time.perf_counter() - started
+            results.put((slot, _observe(source, seq, timestamp, detected, latency, rgb.shape[0] / rgb.shape[1])))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for model in models.values():
+            if hasattr(model, "close"):
+                model.close()
+        del frames
+        for block in blocks.values():
+            block.close()
+
+
+class HandDetectorPool:
+    """Worker processes detecting hands in frames from `sources` sources
+
+    `hands_factory(**factory_kwargs)` builds a model with Hands.process();
+    it runs in the workers, so it has to be importable there.
+    """
+
+    def __init__(self, sources, workers=None, frame_shape=DEFAULT_FRAME_SHAPE, slots=DEFAULT_SLOTS,
+                 hands_factory=mediapipe_hands, factory_kwargs=None):
+        self.sources = sources
+        self.workers = min(workers or sources, sources)
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.hands_factory = hands_factory
+        self.factory_kwargs = factory_kwargs or {}
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self._blocks = []
+        self._frames = []  # Per source: (slots, height, width, 3) view of its shared ring
+        self._free = []  # Per source: free slot numbers
+        self._requests = []  # Per worker
+        self._processes = []
+        self._results = None
+        self._context = multiprocessing.get_context("spawn")  # No forked copies of camera or model threads
+
+    def start(self):
+        """Allocate the shared frame rings and start the workers"""
+        height, width = self.frame_shape
+        shape = (self.slots, height, width, 3)
+        for _ in range(self.sources):
+            block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+            self._blocks.append(block)
+            self._frames.append(np.ndarray(shape, dtype=np.uint8, buffer=block.buf))
+            self._free.append(deque(range(self.slots)))
+
+        self._results = self._context.Queue()
+        for w in range(self.workers):
+            rings = {source: (self._blocks[source].name, shape) for source in range(w, self.sources, self.workers)}
+            requests = self._context.Queue()
+            process = self._context.Process(
+                target=_worker, args=(rings, requests, self._results, self.hands_factory, self.factory_kwargs),
+                daemon=True)
+            process.start()
+            self._requests.append(requests)
+            self._processes.append(process)
+        return self
+
+    def stop(self, timeout=2.0):
+        """Stop the workers and free the shared memory"""
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._requests = []
+        self._processes = []
+        self._frames = []
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def submit(self, source, frame, seq, timestamp):
+        """Queue a BGR frame for detection; False if the source has no free slot and it was dropped"""
+        free = self._free[source]
+        if not free:
+            self.dropped += 1
+            return False
+        slot = free.popleft()
+        target = self._frames[source][slot]
+        if frame.shape[:2] == self.frame_shape:
+            target[...] = frame
+        else:
+            cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]), dst=target)
+        self._requests[source % self.workers].put((source, slot, seq, timestamp))
+        self.submitted += 1
+        return True
+
+    def in_flight(self, source=None):
+        """Frames submitted and not yet collected, for one source or all of them"""
+        if source is not None:
+            return self.slots - len(self._free[source])
+        return sum(self.slots - len(free) for free in self._free)
+
+    def collect(self, timeout=None):
+        """The next Observation from any worker, or None after `timeout` seconds"""
+        try:
+            slot, observation = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self._free[observation.source].append(slot)
+        self.completed += 1
+        return observation
+
+    def stats(self):
+        """Pool counters, named for export"""
+        return {
+            "multicam_workers": self.workers,
+            "multicam_frames_submitted_total": self.submitted,
+            "multicam_frames_dropped_total": self.dropped,
+            "multicam_frames_in_flight": self.in_flight(),
+        }
+
+
+class HandFusion:
+    """Picks the best view of the hand among the cameras' observations of one moment
+
+    Views are ranked by their quality (see hand_quality). The camera that
+    was picked last time keeps its place unless another's view is at least
+    `switch_margin` better, so the cursor doesn't jump between two views
+    that see the hand about equally well. With `max_hands` 2 the best hand
+    of each handedness is kept, best first.
+    """
+
+    def __init__(self, max_hands=1, switch_margin=SWITCH_MARGIN):
+        self.max_hands = max_hands
+        self.switch_margin = switch_margin
+        self.source = None  # Camera the best hand came from last time
+        self.switches = 0
+
+    def fuse(self, observations, timestamp=None):
+        """FusedResults for the best hands in `observations`; no hands if none saw one"""
+        best = {}  # Handedness label -> (quality, observation, index)
+        for observation in observations:
+            sticky = self.switch_margin if observation.source == self.source else 0.0
+            for i, (label, score) in enumerate(zip(observation.labels, observation.quality)):
+                key = label if self.max_hands > 1 else None
+                if key not in best or score + sticky > best[key][0]:
+                    best[key] = (score + sticky, observation, i)
+        if timestamp is None and observations:
+            timestamp = max(observation.timestamp for observation in observations)
+        if not best:
+            return FusedResults(None, None, None, timestamp)
+
+        chosen = sorted(best.values(), key=lambda entry: -entry[0])[:self.max_hands]
+        source = chosen[0][1].source
+        if source != self.source:
+            if self.source is not None:
+                self.switches += 1
+            self.source = source
+        hands = [HandLandmarks([Landmark(x, y, z) for x, y, z in observation.hands[i].tolist()])
+                 for _, observation, i in chosen]
+        handedness = [Classification([Category(observation.labels[i], observation.scores[i])])
+                      for _, observation, i in chosen]
+        return FusedResults(hands, handedness, source, timestamp)
+
+
+def track_cameras(sources, tracker, workers=None, pace_fps=None, stop=None, hands_factory=mediapipe_hands,
+                  on_frame=None, metrics=None):
+    """Drive `tracker` from several frame sources until they all end or `stop` is set
+
+    Each moment, the latest frame of every camera is detected in the worker
+    pool, the observations are fused and the gesture logic runs here on the
+    result. The first source sets the pace. `on_frame(timestamp)` is called
+    after each moment; returns the pool's stats.
+    """
+    tracker.draw_overlays = False  # Frames stay in the workers
+    captures = [open_frame_source(source) for source in sources]
+    grabbers = [FrameGrabber(cap, pace_fps=pace_fps).start() for cap in captures]
+    pool = HandDetectorPool(len(sources), workers, hands_factory=hands_factory,
+                            factory_kwargs={"max_hands": tracker.max_hands}).start()
+    fusion = HandFusion(tracker.max_hands)
+    canvas = np.zeros(pool.frame_shape + (3,), dtype=np.uint8)  # Only its size is used
+    seq = 0
+    try:
+        while not (stop is not None and stop.is_set()):
+            captured = grabbers[0].slot.get(timeout=1.0)
+            if captured is None and all(grabber.finished for grabber in grabbers):
+                break
+            frames = [captured] + [grabber.slot.get(timeout=0) for grabber in grabbers[1:]]
+            if not any(frames):
+                continue
+            seq += 1
+            submitted = 0
+            for source, frame in enumerate(frames):
+                if frame is not None and pool.submit(source, frame.image, seq, frame.timestamp):
+                    submitted += 1
+
+            observations = []
+            while submitted:
+                observation = pool.collect(timeout=1.0)
+                if observation is None:
+                    break  # A worker is stuck or gone; carry on with what came back
+                if observation.seq == seq:
+                    observations.append(observation)
+                    submitted -= 1
+            timestamp = max(frame.timestamp for frame in frames if frame is not None)
+            started = metrics.now() if metrics else 0.0
+            switches = fusion.switches
+            fused = fusion.fuse(observations, timestamp)
+            if fusion.switches != switches:
+                tracker.reset_motion()  # The new camera sees the hand elsewhere; that is no movement
+            tracker.process_results(canvas, fused, timestamp)
+            if metrics:
+                metrics.lap("frame", started)
+                metrics.frame_done()
+                metrics.frames_dropped = sum(grabber.dropped for grabber in grabbers) + pool.dropped
+            if on_frame is not None:
+                on_frame(timestamp)
+    finally:
+        for grabber in grabbers:
+            grabber.stop()
+        for cap in captures:
+            if hasattr(cap, "release"):
+                cap.release()
+        pool.stop()
+    stats = pool.stats()
+    stats["multicam_camera_switches_total"] = fusion.switches
+    return stats
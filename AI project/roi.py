@@ -0,0 +1,135 @@
+"""Region-of-interest hand detection
+
+Once a hand has been found, the next frame only needs to look around where
+it was. RoiHandDetector wraps a MediaPipe Hands object: while a hand is
+tracked it passes a crop around the last landmark bounding box (plus a
+margin), and when there is no hand it searches the whole frame, optionally
+downscaled since the palm detector works at low resolution anyway. Landmarks
+from a crop are mapped back to full-frame normalized coordinates in place,
+so callers see the same results as from Hands.process().
+
+Tracking `max_hands` hands, the crop covers all of them and is only used
+while all of them are in view; with fewer, every frame is searched so a
+hand coming in anywhere is found.
+"""
+import cv2
+import numpy as np
+
+from framepool import FramePool
+
+DEFAULT_MARGIN = 0.5  # Of the landmark box's longer side, added on every side
+DEFAULT_SEARCH_SCALE = 0.5
+MIN_CROP = 128  # Pixels; smaller crops give the landmark model too little to work with
+
+
+class RoiHandDetector:
+    """Hands.process() on a crop around the tracked hand, full-frame search on loss
+
+    With `enabled` False every frame is processed whole, as before, but the
+    counters are still kept so both modes can be compared.
+    """
+
+    def __init__(self, hands, enabled=True, margin=DEFAULT_MARGIN, search_scale=DEFAULT_SEARCH_SCALE,
+                 metrics=None, pool=None, max_hands=1):
+        self.hands = hands
+        self.max_hands = max_hands
+        self.enabled = enabled
+        self.margin = margin
+        self.search_scale = search_scale
+        self.metrics = metrics
+        self.pool = pool or FramePool()
+        self.box = None  # (x0, y0, x1, y1) crop for the next frame, None to search
+        self.frames = 0
+        self.roi_frames = 0  # Frames processed as a crop
+        self.search_frames = 0  # Full-frame searches, including fallbacks
+        self.losses = 0  # Crops that lost the hand and fell back to a search
+        self.pixels = 0  # Pixels handed to MediaPipe
+        self.full_pixels = 0  # Pixels that full-frame processing would have used
+
+    def process(self, rgb_frame):
+        """Detect hands in an RGB frame; results are in full-frame coordinates"""
+        height, width = rgb_frame.shape[:2]
+        self.frames += 1
+        self.full_pixels += width * height
+
+        if not self.enabled:
+            self.search_frames += 1
+            self.pixels += width * height
+            return self.hands.process(rgb_frame)
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            crop = np.ascontiguousarray(rgb_frame[y0:y1, x0:x1])
+            self.pixels += crop.shape[0] * crop.shape[1]
+            self.roi_frames += 1
+            results = self.hands.process(crop)
+            if results.multi_hand_landmarks and len(results.multi_hand_landmarks) >= self.max_hands:
+                for hand in results.multi_hand_landmarks:
+                    _to_full_frame(hand, x0, y0, x1 - x0, y1 - y0, width, height)
+                self._update_box(results.multi_hand_landmarks, width, height)
+                self._publish()
+                return results
+            # Lost the hand: look for it in the whole frame straight away
+            self.losses += 1
+            self.box = None
+
+        results = self._search(rgb_frame)
+        if results.multi_hand_landmarks and len(results.multi_hand_landmarks) >= self.max_hands:
+            self._update_box(results.multi_hand_landmarks, width, height)
+        self._publish()
+        return results
+
+    def _search(self, rgb_frame):
+        """Full-frame detection, at reduced resolution if configured"""
+        self.search_frames += 1
+        if self.search_scale < 1.0:
+            height, width = rgb_frame.shape[:2]
+            size = (int(width * self.search_scale), int(height * self.search_scale))
+            small = self.pool.get("search", (size[1], size[0], 3))
+            rgb_frame = cv2.resize(rgb_frame, size, dst=small, interpolation=cv2.INTER_AREA)
+        self.pixels += rgb_frame.shape[0] * rgb_frame.shape[1]
+        # Normalized landmarks don't depend on the scale, so nothing to map back
+        return self.hands.process(rgb_frame)
+
+    def _update_box(self, hands, width, height):
+        """Crop for the next frame: the box around the hands' landmarks plus a margin, clipped to the frame"""
+        xs = [lm.x for hand in hands[:self.max_hands] for lm in hand.landmark]
+        ys = [lm.y for hand in hands[:self.max_hands] for lm in hand.landmark]
+        left, right = min(xs) * width, max(xs) * width
+        top, bottom = min(ys) * height, max(ys) * height
+
+        # Square crop so the landmark model sees the hand undistorted
+        side = max(right - left, bottom - top) * (1.0 + 2.0 * self.margin)
+        side = min(max(side, MIN_CROP), width, height)
+        cx, cy = (left + right) / 2.0, (top + bottom) / 2.0
+        x0 = int(min(max(cx - side / 2.0, 0), width - side))
+        y0 = int(min(max(cy - side / 2.0, 0), height - side))
+        self.box = (x0, y0, x0 + int(side), y0 + int(side))
+
+    def reset(self):
+        """Forget the tracked hand so the next frame is searched in full"""
+        self.box = None
+
+    def _publish(self):
+        if self.metrics is not None:
+            self.metrics.gauges.update(self.stats())
+
+    def stats(self):
+        """Tracking counters, named for export"""
+        return {
+            "roi_frames_total": self.roi_frames,
+            "roi_search_frames_total": self.search_frames,
+            "roi_losses_total": self.losses,
+            "roi_loss_rate": self.losses / self.roi_frames if self.roi_frames else 0.0,
+            "roi_pixel_fraction": self.pixels / self.full_pixels if self.full_pixels else 1.0,
+        }
+
+
+def _to_full_frame(hand, x0, y0, crop_width, crop_height, width, height):
+    """Map a hand's crop-normalized landmarks to full-frame normalized ones, in place"""
+    sx, sy = crop_width / width, crop_height / height
+    ox, oy = x0 / width, y0 / height
+    for lm in hand.landmark:
+        lm.x = ox + lm.x * sx
+        lm.y = oy + lm.y * sy
+        lm.z = lm.z * sx  # MediaPipe scales z like x
@@ -0,0 +1,197 @@
+"""Camera-to-screen mapping with calibration profiles
+
+The active region of the camera image (where the fingertip moves) is mapped
+onto a screen rectangle. ScreenMapper turns the profile into per-axis origin,
+scale and offset terms once per frame size, so mapping a point is a
+multiply-add per axis and a clamp; a profile calibrated with four corner points
+uses a homography instead. An optional response curve gives finer control
+near the middle of the region and faster travel towards its edges.
+
+Profiles are stored as JSON, by name, in PROFILE_FILE.
+"""
+import json
+import math
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+PROFILE_FILE = os.path.join(os.path.expanduser("~"), ".gesture_control_profiles.json")
+
+# The original mapping used a 120 px margin on a 640x480 frame
+DEFAULT_REGION = (120 / 640, 120 / 480, 1 - 120 / 640, 1 - 120 / 480)
+
+# region: (left, top, right, bottom) of the active area as fractions of the frame
+# monitor: "primary", "all" (the whole virtual desktop) or a monitor index
+# gamma: response curve exponent, 1.0 for linear
+# corners: optional camera points (fractions) for the screen's top-left,
+#          top-right, bottom-right and bottom-left, used instead of `region`
+Profile = namedtuple("Profile", ["name", "region", "monitor", "gamma", "corners"])
+DEFAULT_PROFILE = Profile("default", DEFAULT_REGION, "primary", 1.0, None)
+
+# A screen rectangle on the virtual desktop
+Monitor = namedtuple("Monitor", ["x", "y", "width", "height"])
+
+CALIBRATION_PERCENTILES = (5, 95)  # Ignore stray points when calibrating the region
+
+
+def list_monitors(fallback_size=None):
+    """Monitors on the virtual desktop, primary first
+
+    Uses the optional `screeninfo` package; without it only the primary
+    screen is known, from `fallback_size`.
+    """
+    try:
+        import screeninfo
+        monitors = screeninfo.get_monitors()
+    except Exception:
+        monitors = []
+    if monitors:
+        monitors.sort(key=lambda m: not getattr(m, "is_primary", False))
+        return [Monitor(m.x, m.y, m.width, m.height) for m in monitors]
+    width, height = fallback_size or (1920, 1080)
+    return [Monitor(0, 0, width, height)]
+
+
+def select_screen(monitors, which="primary"):
+    """The target rectangle for a profile's `monitor` setting"""
+    if which == "all":
+        left = min(m.x for m in monitors)
+        top = min(m.y for m in monitors)
+        right = max(m.x + m.width for m in monitors)
+        bottom = max(m.y + m.height for m in monitors)
+        return Monitor(left, top, right - left, bottom - top)
+    index = 0 if which == "primary" else int(which)
+    return monitors[index] if index < len(monitors) else monitors[0]
+
+
+def load_profiles(path=PROFILE_FILE):
+    """All saved profiles by name; missing or unreadable files give none"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    profiles = {}
+    for name, fields in data.items():
+        corners = fields.get("corners")
+        profiles[name] = Profile(name, tuple(fields["region"]), fields.get("monitor", "primary"),
+                                 float(fields.get("gamma", 1.0)),
+                                 tuple(tuple(c) for c in corners) if corners else None)
+    return profiles
+
+
+def save_profile(profile, path=PROFILE_FILE):
+    """Add or replace a profile in the profile file"""
+    profiles = load_profiles(path)
+    profiles[profile.name] = profile
+    data = {name: {"region": list(p.region), "monitor": p.monitor, "gamma": p.gamma,
+                   "corners": [list(c) for c in p.corners] if p.corners else None}
+            for name, p in profiles.items()}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+class ScreenMapper:
+    """Maps camera pixel coordinates to screen coordinates for a profile"""
+
+    def __init__(self, screen, profile=DEFAULT_PROFILE):
+        self.screen = Monitor(*screen) if len(screen) == 4 else Monitor(0, 0, *screen)
+        self.profile = profile
+        self._shape = None
+        self._samples = None  # Fingertip fractions collected while calibrating
+
+    def set_profile(self, profile, screen=None):
+        """Switch profile (and optionally screen); the transform is rebuilt on the next point"""
+        self.profile = profile
+        if screen is not None:
+            self.screen = Monitor(*screen)
+        self._shape = None
+
+    def _prepare(self, frame_width, frame_height):
+        """Precompute the transform for a frame size"""
+        self._shape = (frame_height, frame_width)
+        s = self.screen
+        self._min_x, self._max_x = float(s.x), float(s.x + s.width)
+        self._min_y, self._max_y = float(s.y), float(s.y + s.height)
+        self._homography = None
+
+        if self.profile.corners:
+            # Camera pixels -> unit square, then the same curve and screen scaling
+            src = np.float32([(cx * frame_width, cy * frame_height) for cx, cy in self.profile.corners])
+            dst = np.float32([(0, 0), (1, 0), (1, 1), (0, 1)])
+            self._homography = cv2.getPerspectiveTransform(src, dst).tolist()
+            return
+
+        left, top, right, bottom = self.profile.region
+        x0, x1 = left * frame_width, right * frame_width
+        y0, y1 = top * frame_height, bottom * frame_height
+        self._x0, self._y0 = x0, y0
+        if self.profile.gamma == 1.0:
+            # Straight to screen pixels, in the same form as np.interp so results match it exactly
+            self._ax, self._bx = s.width / (x1 - x0), float(s.x)
+            self._ay, self._by = s.height / (y1 - y0), float(s.y)
+        else:
+            # To the unit square first, the curve is applied per point
+            self._ax = 1.0 / (x1 - x0)
+            self._ay = 1.0 / (y1 - y0)
+
+    def map(self, x, y, frame_shape):
+        """Screen (x, y) for camera pixel (x, y) in a frame of `frame_shape`"""
+        samples = self._samples  # Read once: the main thread may finish calibrating meanwhile
+        if samples is not None:
+            samples.append((x / frame_shape[1], y / frame_shape[0]))
+        if frame_shape[:2] != self._shape:
+            self._prepare(frame_shape[1], frame_shape[0])
+
+        if self._homography is None and self.profile.gamma == 1.0:
+            sx = (x - self._x0) * self._ax + self._bx
+            sy = (y - self._y0) * self._ay + self._by
+        else:
+            if self._homography is not None:
+                h = self._homography
+                w = h[2][0] * x + h[2][1] * y + h[2][2]
+                u = (h[0][0] * x + h[0][1] * y + h[0][2]) / w
+                v = (h[1][0] * x + h[1][1] * y + h[1][2]) / w
+            else:
+                u = (x - self._x0) * self._ax
+                v = (y - self._y0) * self._ay
+            u = _curve(min(max(u, 0.0), 1.0), self.profile.gamma)
+            v = _curve(min(max(v, 0.0), 1.0), self.profile.gamma)
+            screen = self.screen
+            sx = screen.x + u * screen.width
+            sy = screen.y + v * screen.height
+
+        # Clamp to the target screen, as np.interp did
+        sx = self._min_x if sx < self._min_x else self._max_x if sx > self._max_x else sx
+        sy = self._min_y if sy < self._min_y else self._max_y if sy > self._max_y else sy
+        return sx, sy
+
+    def start_calibration(self):
+        """Start collecting the fingertip positions the user moves through"""
+        self._samples = []
+
+    def finish_calibration(self, name):
+        """Stop collecting and return a profile whose region covers the collected positions
+
+        Returns None if too few positions were collected.
+        """
+        samples, self._samples = self._samples, None
+        samples = list(samples or ())  # The tracking thread may still be appending to it
+        if len(samples) < 10:
+            return None
+        points = np.array(samples)
+        low, high = np.percentile(points, CALIBRATION_PERCENTILES, axis=0)
+        if high[0] - low[0] < 0.05 or high[1] - low[1] < 0.05:
+            return None
+        return self.profile._replace(name=name, region=(float(low[0]), float(low[1]),
+                                                        float(high[0]), float(high[1])), corners=None)
+
+
+def _curve(u, gamma):
+    """Response curve on [0, 1], symmetric about the middle"""
+    if gamma == 1.0:
+        return u
+    d = 2.0 * u - 1.0
+    return 0.5 + 0.5 * math.copysign(abs(d) ** gamma, d)
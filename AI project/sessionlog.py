@@ -0,0 +1,423 @@
+"""Session recording and inference-free replay
+
+A session file captures what the tracker saw and did on every frame: the
+hand landmarks in pixels, handedness, the raw and voted finger counts, the
+mode and the mouse actions it emitted. Records are fixed-size and appended
+in batches, so recording costs a few microseconds per frame, and a file can
+be memory-mapped as one numpy array without parsing.
+
+Replaying a session feeds the recorded landmarks straight into the
+tracker's gesture logic (finger counting, voting, mode switching and mouse
+actions) without a camera or MediaPipe, and reports the first frame where
+the actions differ from the recorded ones. That makes it quick to check a
+change to the gesture logic against hours of real sessions. The settings
+are stored once, so smoothing and the cursor filter can't be changed while
+a session is being recorded.
+
+File layout:
+    header  HEADER_DTYPE, then JSON metadata (screen, profile, filter), padded
+    records RECORD_DTYPE, one per frame, from `header_size` to the end
+"""
+import json
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from metrics import PipelineMetrics
+from screenmap import DEFAULT_PROFILE, Profile, ScreenMapper
+from temporal import TemporalGestures
+from tracker import GestureTracker
+
+MAGIC = b"GVCS"
+VERSION = 1
+DEFAULT_BATCH = 64  # Records buffered before each write, about 2 s at 30 FPS
+MAX_ACTIONS = 4  # Mouse actions kept per frame; more are counted in `actions_dropped`
+MOVE_TOLERANCE = 0.01  # Pixels; cursor positions are stored as float32
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("header_size", "<u4"),  # Fixed header plus metadata, where the records start
+    ("record_size", "<u4"),
+    ("start", "<f8"),  # Wall-clock time of the first frame
+])
+
+# Frame states
+STATE_SKIPPED = 0  # Detection didn't run (idle)
+STATE_NO_HAND = 1
+STATE_HAND = 2
+
+HANDEDNESS = {"Left": 1, "Right": 2}  # 0 when unknown
+
+# Mouse action codes; each action is stored as (code, a, b)
+ACTIONS = ("moveTo", "scroll", "click", "mouseDown", "mouseUp", "rightClick", "doubleClick", "press")
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS, 1)}
+PRESS_KEYS = ("browserback", "browserforward")  # Keys gestures press, stored by index; -1 for any other
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),  # Seconds since `start`
+    ("state", "i1"),
+    ("handedness", "i1"),
+    ("raw_count", "i1"),  # count_fingers() for this frame
+    ("count", "i1"),  # Voted finger count
+    ("mode", "i1"),
+    ("num_actions", "u1"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("score", "<f4"),  # Handedness confidence
+    ("landmarks", "<f4", (21, 3)),  # Pixel landmarks, as the tracker uses them
+    ("actions", "<f4", (MAX_ACTIONS, 3)),
+])
+
+
+class ActionRecorder:
+    """Mouse stand-in that notes each action and passes it on to `mouse` (if any)"""
+
+    def __init__(self, mouse=None):
+        self.mouse = mouse
+        self.pending = []  # (code, a, b) since the last recorded frame
+
+    def moveTo(self, x, y):
+        self.pending.append((1, x, y))
+        if self.mouse is not None:
+            self.mouse.moveTo(x, y)
+
+    def scroll(self, clicks):
+        self.pending.append((2, clicks, 0.0))
+        if self.mouse is not None:
+            self.mouse.scroll(clicks)
+
+    def click(self):
+        self.pending.append((3, 0.0, 0.0))
+        if self.mouse is not None:
+            self.mouse.click()
+
+    def mouseDown(self):
+        self.pending.append((4, 0.0, 0.0))
+        if self.mouse is not None:
+            self.mouse.mouseDown()
+
+    def mouseUp(self):
+        self.pending.append((5, 0.0, 0.0))
+        if self.mouse is not None:
+            self.mouse.mouseUp()
+
+    def rightClick(self):
+        self.pending.append((6, 0.0, 0.0))
+        if self.mouse is not None:
+            self.mouse.rightClick()
+
+    def doubleClick(self):
+        self.pending.append((7, 0.0, 0.0))
+        if self.mouse is not None:
+            self.mouse.doubleClick()
+
+    def press(self, key):
+        self.pending.append((8, PRESS_KEYS.index(key) if key in PRESS_KEYS else -1, 0.0))
+        if self.mouse is not None:
+            self.mouse.press(key)
+
+
+class SessionRecorder:
+    """Appends one record per processed frame to a session file
+
+    Attach it with GestureTracker.set_recorder(). Records are buffered and
+    written `batch` at a time; close() writes the rest. A crash loses at most
+    the buffered records, and a partly written record at the end of a file is
+    ignored when it is read.
+    """
+
+    def __init__(self, path, tracker=None, batch=DEFAULT_BATCH):
+        self.path = path
+        self.batch = batch
+        self.frames = 0
+        self.actions_dropped = 0
+        self.start = None  # Tracker timestamp of the first frame
+        self.started_at = None  # Wall-clock time of the first frame
+        self._file = open(path, "wb")
+        self._buffer = np.zeros(batch, dtype=RECORD_DTYPE)
+        self._fill = 0
+        self._lock = threading.Lock()
+        self._header_written = False
+        self._metadata = session_metadata(tracker) if tracker is not None else {}
+        # Field views, so a record is filled without building a numpy record object
+        self._time = self._buffer["time"]
+        self._state = self._buffer["state"]
+        self._handedness = self._buffer["handedness"]
+        self._raw_count = self._buffer["raw_count"]
+        self._count = self._buffer["count"]
+        self._mode = self._buffer["mode"]
+        self._num_actions = self._buffer["num_actions"]
+        self._width = self._buffer["width"]
+        self._height = self._buffer["height"]
+        self._score = self._buffer["score"]
+        self._landmarks = self._buffer["landmarks"]
+        self._actions = self._buffer["actions"]
+        self.actions = ActionRecorder()
+
+    def wrap(self, mouse):
+        """The mouse the tracker should use while recording"""
+        self.actions.mouse = mouse
+        return self.actions
+
+    def record(self, tracker, results, frame_shape):
+        """Add the frame the tracker just processed; `results` is None if detection was skipped"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self.start is None:
+                self.start = tracker.timestamp
+                self.started_at = time.time()
+                if not self._metadata:
+                    self._metadata = session_metadata(tracker)
+            i = self._fill
+            self._time[i] = tracker.timestamp - self.start
+            self._height[i], self._width[i] = frame_shape[0], frame_shape[1]
+            self._count[i] = tracker.voter.winner
+            self._mode[i] = tracker.mode.value
+            if results is None:
+                self._state[i] = STATE_SKIPPED
+            elif not results.multi_hand_landmarks:
+                self._state[i] = STATE_NO_HAND
+            else:
+                self._state[i] = STATE_HAND
+                self._raw_count[i] = tracker.finger_count
+                self._landmarks[i] = tracker.landmarks
+                handedness = getattr(results, "multi_handedness", None)
+                if handedness:
+                    label = handedness[0].classification[0]
+                    self._handedness[i] = HANDEDNESS.get(label.label, 0)
+                    self._score[i] = label.score
+
+            pending = self.actions.pending
+            if pending:
+                kept = pending[:MAX_ACTIONS]
+                self._actions[i, :len(kept)] = kept
+                self._num_actions[i] = len(kept)
+                self.actions_dropped += len(pending) - len(kept)
+                pending.clear()
+
+            self.frames += 1
+            self._fill += 1
+            if self._fill == self.batch:
+                self._flush()
+
+    def _flush(self):
+        if not self._header_written:
+            self._file.write(encode_header(self.started_at or time.time(), self._metadata))
+            self._header_written = True
+        self._file.write(self._buffer[:self._fill].tobytes())
+        # Hand-only fields aren't written on every frame, so start the next batch clean
+        self._buffer[:self._fill] = 0
+        self._fill = 0
+
+    def close(self):
+        """Write the buffered records and close the file"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        """Recording counters, named for export"""
+        return {
+            "session_frames_total": self.frames,
+            "session_actions_dropped_total": self.actions_dropped,
+        }
+
+
+def session_metadata(tracker):
+    """Settings the replay needs to reproduce the tracker's cursor positions"""
+    return {
+        "screen": list(tracker.mapper.screen),
+        "profile": tracker.mapper.profile._asdict(),
+        "filter": tracker.filter_name,
+        "smoothing": tracker.smoothing,
+        "gestures": tracker.temporal is not None,
+        "recorded": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def encode_header(start, metadata):
+    """Fixed header followed by the JSON metadata, padded to 8 bytes"""
+    text = json.dumps(metadata).encode("utf-8")
+    size = HEADER_DTYPE.itemsize + len(text)
+    size += -size % 8
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["header_size"] = size
+    header["record_size"] = RECORD_DTYPE.itemsize
+    header["start"] = start
+    return (header.tobytes() + text).ljust(size, b" ")
+
+
+def is_session_file(path):
+    """Whether `path` is a session recording"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def open_session(path):
+    """Memory-map a session file; returns (header, metadata, records)"""
+    with open(path, "rb") as f:
+        header = np.frombuffer(f.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        if header["version"] != VERSION or header["record_size"] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} uses an unsupported session format (version {header['version']})")
+        size = int(header["header_size"])
+        metadata = json.loads(f.read(size - HEADER_DTYPE.itemsize).decode("utf-8") or "{}")
+        f.seek(0, 2)
+        count = (f.tell() - size) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return header, metadata, np.zeros(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=size, shape=(count,))
+    return header, metadata, records
+
+
+class _NoInference:
+    """Hands placeholder for replays, which never run detection"""
+
+    def process(self, rgb_frame):
+        raise RuntimeError("session replays don't run hand detection")
+
+    def close(self):
+        pass
+
+
+def _named(action):
+    """(name, args) for a (code, a, b) action, with arguments as the headless replay reports them"""
+    code, a, b = action
+    name = ACTIONS[int(code) - 1]
+    if name == "moveTo":
+        return name, [round(float(a), 2), round(float(b), 2)]
+    if name == "scroll":
+        return name, [int(a)]
+    if name == "press":
+        return name, [PRESS_KEYS[int(a)] if a >= 0 else "?"]
+    return name, []
+
+
+def decode_actions(record):
+    """The (name, args) mouse actions stored in one record"""
+    return [_named(action) for action in record["actions"][:record["num_actions"]]]
+
+
+def _same_actions(recorded, replayed):
+    if len(recorded) != len(replayed):
+        return False
+    for (code, a, b), (new_code, new_a, new_b) in zip(recorded, replayed):
+        if int(code) != new_code:
+            return False
+        if abs(a - new_a) > MOVE_TOLERANCE or abs(b - new_b) > MOVE_TOLERANCE:
+            return False
+    return True
+
+
+def replay_session(path, mouse=None, max_frames=None, log=None, on_mode_change=None):
+    """Drive the gesture logic from a session file and compare with what was recorded
+
+    The tracker is set up with the recorded screen, profile and filter, then
+    each recorded frame is applied without detection: landmarks go through
+    process_landmarks(), frames without a hand through
+    handle_no_hand_detected(), and skipped frames are passed over. Actions go
+    to `mouse` if given. Returns a report with the replay speed, the
+    replayed actions and the first frame, if any, whose actions, finger count
+    or mode differ from the recording.
+    """
+    header, metadata, records = open_session(path)
+    if max_frames is not None:
+        records = records[:max_frames]
+
+    screen = metadata.get("screen", (0, 0, 1920, 1080))
+    tracker = GestureTracker(
+        mouse=ActionRecorder(mouse),
+        screen_size=screen[2:],
+        hands=_NoInference(),
+        log=log,
+        on_mode_change=on_mode_change,
+        metrics=PipelineMetrics(enabled=False),
+        mapper=ScreenMapper(screen, Profile(**metadata["profile"]) if "profile" in metadata else DEFAULT_PROFILE),
+    )
+    if metadata.get("gestures"):
+        tracker.temporal = TemporalGestures()
+    if "filter" in metadata:
+        tracker.set_filter(metadata["filter"])
+    tracker.set_smoothing(metadata.get("smoothing", tracker.smoothing))
+    replayed = tracker.mouse.pending
+
+    # Plain arrays are much faster to index per frame than numpy records
+    times = records["time"].tolist()
+    states = records["state"].tolist()
+    raw_counts = records["raw_count"].tolist()
+    modes = records["mode"].tolist()
+    shapes = list(zip(records["height"].tolist(), records["width"].tolist()))
+    num_actions = records["num_actions"].tolist()
+    landmarks = np.array(records["landmarks"])
+    actions = np.array(records["actions"])
+
+    divergence = None
+    hand_frames = 0
+    emitted = []
+    started = time.perf_counter()
+    for i, state in enumerate(states):
+        tracker.timestamp = times[i]
+        if state == STATE_HAND:
+            hand_frames += 1
+            tracker.process_landmarks(landmarks[i], shapes[i])
+        elif state == STATE_NO_HAND:
+            tracker.handle_no_hand_detected()
+
+        if divergence is None:
+            recorded = actions[i, :num_actions[i]]
+            if not _same_actions(recorded, replayed):
+                divergence = {"frame": i, "field": "actions",
+                              "recorded": decode_actions(records[i]),
+                              "replayed": [_named(action) for action in replayed]}
+            elif state == STATE_HAND and tracker.finger_count != raw_counts[i]:
+                divergence = {"frame": i, "field": "raw_count",
+                              "recorded": raw_counts[i], "replayed": tracker.finger_count}
+            elif tracker.mode.value != modes[i]:
+                divergence = {"frame": i, "field": "mode", "recorded": modes[i], "replayed": tracker.mode.value}
+        if replayed:
+            emitted.extend((i, *_named(action)) for action in replayed)
+            replayed.clear()
+    wall_time = time.perf_counter() - started
+    tracker.release()
+
+    return {
+        "source": str(path),
+        "frames": len(states),
+        "hand_frames": hand_frames,
+        "duration": times[-1] if times else 0.0,
+        "wall_time": wall_time,
+        "fps": len(states) / wall_time if wall_time > 0 else 0.0,
+        "action_counts": dict(Counter(action[1] for action in emitted)),
+        "actions": emitted,
+        "divergence": divergence,
+    }
+
+
+def format_replay(report):
+    """Format a session replay report as text"""
+    lines = [
+        f"Session:      {report['source']}",
+        f"Frames:       {report['frames']} ({report['hand_frames']} with a hand), "
+        f"{report['duration']:.1f} s recorded",
+        f"Replayed in:  {report['wall_time']:.3f} s ({report['fps']:.0f} FPS)",
+    ]
+    divergence = report["divergence"]
+    if divergence is None:
+        lines.append("Matches:      yes, same actions, finger counts and modes")
+    else:
+        lines.append(f"Matches:      no, {divergence['field']} differ from frame {divergence['frame']}: "
+                     f"recorded {divergence['recorded']}, replayed {divergence['replayed']}")
+    return "\n".join(lines)
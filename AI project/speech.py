@@ -0,0 +1,361 @@
+"""Text-to-speech on one long-lived worker, with a cache of synthesised phrases
+
+All speech goes through a SpeechWorker: callers queue text and return at
+once, and a single thread owns the TTS engine, so utterances never overlap
+or race on the engine. The queue is ordered by priority, then age. A new
+message that repeats one already waiting is merged into it, messages with
+the same `key` replace each other, and a message that waited longer than
+its `max_age` is dropped instead of being read out late.
+
+With a cache directory, each phrase is synthesised to a WAV file once,
+keyed by the text and the engine's voice settings, and played from there
+afterwards, so frequent phrases start straight away.
+
+Engines have load(), settings() (a dict for the cache key), say(text) and
+synthesize(text, path); FakeEngine stands in for pyttsx3 in benchmarks.
+The worker loads its engine as soon as it starts, off the caller's thread.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # Pre-synthesis; never read out
+
+DEFAULT_MAX_AGE = 5.0  # Seconds a message may wait before it is too stale to say
+DEFAULT_MAX_PENDING = 8
+DEFAULT_CACHE_ENTRIES = 200
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".gesture_control_tts")
+TIMING_WINDOW = 50
+
+
+class SpeechRequest:
+    """One queued message"""
+
+    __slots__ = ("text", "priority", "key", "created", "max_age", "play", "cancelled")
+
+    def __init__(self, text, priority, key, created, max_age, play):
+        self.text = text
+        self.priority = priority
+        self.key = key
+        self.created = created
+        self.max_age = max_age
+        self.play = play  # False to only synthesise into the cache
+        self.cancelled = False
+
+
+class Pyttsx3Engine:
+    """pyttsx3, created on first use so that it lives on the worker thread"""
+
+    def __init__(self, rate=150, volume=None, voice=None):
+        self.rate = rate
+        self.volume = volume
+        self.voice = voice
+        self._engine = None
+
+    def load(self):
+        """Create the engine; the speech worker does this on its own thread"""
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+            if self.volume is not None:
+                self._engine.setProperty("volume", self.volume)
+            if self.voice is not None:
+                self._engine.setProperty("voice", self.voice)
+        return self._engine
+
+    @property
+    def engine(self):
+        return self._engine or self.load()
+
+    def settings(self):
+        return {"engine": "pyttsx3", "rate": self.rate, "volume": self.volume,
+                "voice": self.voice or self.engine.getProperty("voice")}
+
+    def say(self, text):
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def synthesize(self, text, path):
+        self.engine.save_to_file(text, path)
+        self.engine.runAndWait()
+        if not os.path.exists(path) or not os.path.getsize(path):
+            raise RuntimeError("the TTS driver wrote no audio")
+
+
+class FakeEngine:
+    """Engine stand-in: takes `seconds_per_char` to "synthesise" and writes silent WAV files
+
+    It records what it was asked to do, and the most calls it saw running at once.
+    """
+
+    def __init__(self, seconds_per_char=0.005, rate=150):
+        self.seconds_per_char = seconds_per_char
+        self.rate = rate
+        self.spoken = []
+        self.synthesized = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        pass
+
+    def settings(self):
+        return {"engine": "fake", "rate": self.rate}
+
+    def _busy(self, text):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.seconds_per_char * len(text))
+        with self._lock:
+            self.active -= 1
+
+    def say(self, text):
+        self._busy(text)
+        self.spoken.append(text)
+
+    def synthesize(self, text, path):
+        self._busy(text)
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(bytes(2 * 160 * len(text)))
+        self.synthesized.append(text)
+
+
+def play_wav(path):
+    """Play a sound file and wait for it to finish; False if there is no way to play it here"""
+    if sys.platform == "win32":
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+        return True
+    for player in ("afplay", "paplay", "aplay"):
+        command = shutil.which(player)
+        if command:
+            return subprocess.run([command, path], stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL).returncode == 0
+    return False
+
+
+class SpeechWorker:
+    """Single thread that owns the TTS engine and speaks queued messages by priority
+
+    `player(path)` plays a cached file and returns False if it couldn't, in
+    which case the text is spoken by the engine directly. Without a
+    `cache_dir` every message is spoken by the engine directly.
+    """
+
+    def __init__(self, engine, cache_dir=None, player=play_wav, max_pending=DEFAULT_MAX_PENDING,
+                 cache_entries=DEFAULT_CACHE_ENTRIES, on_error=None):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.player = player
+        self.max_pending = max_pending
+        self.cache_entries = cache_entries
+        self.on_error = on_error
+        self.spoken = 0
+        self.merged = 0
+        self.dropped = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.errors = 0
+        self.synthesis_times = []  # Last TIMING_WINDOW synthesis times, seconds
+        self._heap = []  # (priority, seq, request)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._settings_key = None
+        self._loaded = threading.Event()
+        self.load_error = None
+
+    def start(self):
+        """Start the worker thread"""
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Drop whatever is still queued and stop after the current message"""
+        with self._cond:
+            self._running = False
+            for _, _, request in self._heap:
+                request.cancelled = True
+            self._heap = []
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wait_ready(self, timeout=None):
+        """Wait for the engine to load; raises what stopped it from loading"""
+        if not self._loaded.wait(timeout):
+            raise TimeoutError("the TTS engine is still loading")
+        if self.load_error is not None:
+            raise self.load_error
+
+    def speak(self, text, priority=PRIORITY_NORMAL, key=None, max_age=DEFAULT_MAX_AGE):
+        """Queue text to be spoken; returns immediately
+
+        A message that repeats one still waiting is merged into it, and one
+        with the same `key` as a waiting message replaces it.
+        """
+        self._submit(SpeechRequest(text, priority, key, time.monotonic(), max_age, True))
+
+    def prepare(self, texts):
+        """Synthesise phrases into the cache in the background, without speaking them"""
+        if not self.cache_dir:
+            return
+        for text in texts:
+            self._submit(SpeechRequest(text, PRIORITY_LOW, None, time.monotonic(), None, False))
+
+    def _submit(self, request):
+        with self._cond:
+            for _, _, pending in self._heap:
+                if pending.cancelled:
+                    continue
+                if pending.text == request.text and pending.play == request.play:
+                    if pending.priority <= request.priority:
+                        self.merged += 1
+                        return
+                    pending.cancelled = True  # The new one jumps ahead instead
+                    self.merged += 1
+                elif request.key is not None and pending.key == request.key:
+                    pending.cancelled = True
+                    self.merged += 1
+
+            live = [entry for entry in self._heap if not entry[2].cancelled]
+            if len(live) >= self.max_pending:
+                # Full: drop the least important message, the oldest of those
+                worst = max(live, key=lambda entry: (entry[0], -entry[1]))
+                if request.priority > worst[0]:
+                    self.dropped += 1
+                    return
+                worst[2].cancelled = True
+                self.dropped += 1
+                live.remove(worst)
+            if len(live) != len(self._heap):
+                heapq.heapify(live)
+                self._heap = live
+            heapq.heappush(self._heap, (request.priority, next(self._seq), request))
+            self._cond.notify()
+
+    def _run(self):
+        try:
+            self.engine.load()
+        except Exception as e:
+            self.load_error = e  # Raised by wait_ready()
+        self._loaded.set()
+
+        while True:
+            with self._cond:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, _, request = heapq.heappop(self._heap)
+            if request.cancelled:
+                continue
+            if request.max_age is not None and time.monotonic() - request.created > request.max_age:
+                self.dropped += 1
+                continue
+            try:
+                self._say(request)
+            except Exception as e:
+                self.errors += 1
+                if self.on_error:
+                    self.on_error(f"Speech failed: {e}")
+
+    def _say(self, request):
+        """Play the message from the cache, synthesising it first if needed"""
+        path = self._cache_path(request.text) if self.cache_dir else None
+        if path is not None and os.path.exists(path):
+            if not request.play:
+                return
+            self.cache_hits += 1
+        elif path is not None:
+            self.cache_misses += 1
+            started = time.perf_counter()
+            try:
+                self._synthesize(request.text, path)
+            except Exception:
+                path = None  # This engine can't write files; speak directly
+            else:
+                self._timed(started)
+
+        if not request.play:
+            return
+        if path is None or not self.player(path):
+            started = time.perf_counter()
+            self.engine.say(request.text)
+            if path is None:
+                self._timed(started)
+        self.spoken += 1
+
+    def _synthesize(self, text, path):
+        partial = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            self.engine.synthesize(text, partial)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self._trim_cache()
+
+    def _cache_path(self, text):
+        """Cache file for `text` with the engine's current voice settings"""
+        if self._settings_key is None:
+            self._settings_key = json.dumps(self.engine.settings(), sort_keys=True, default=str)
+        digest = hashlib.sha1(f"{self._settings_key}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".wav")
+
+    def _trim_cache(self):
+        """Remove the least recently written files beyond `cache_entries`"""
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".wav")]
+        if len(files) <= self.cache_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.cache_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _timed(self, started):
+        self.synthesis_times.append(time.perf_counter() - started)
+        del self.synthesis_times[:-TIMING_WINDOW]
+
+    def pending(self):
+        """Messages waiting to be spoken or synthesised"""
+        with self._cond:
+            return sum(not request.cancelled for _, _, request in self._heap)
+
+    def stats(self):
+        """Queue and cache counters, named for export"""
+        times = self.synthesis_times
+        return {
+            "speech_queue_depth": self.pending(),
+            "speech_spoken_total": self.spoken,
+            "speech_merged_total": self.merged,
+            "speech_dropped_total": self.dropped,
+            "speech_errors_total": self.errors,
+            "speech_cache_hits_total": self.cache_hits,
+            "speech_cache_misses_total": self.cache_misses,
+            "speech_synthesis_seconds": sum(times) / len(times) if times else 0.0,
+        }
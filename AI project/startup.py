@@ -0,0 +1,94 @@
+"""Background start-up of the slow subsystems
+
+Opening the camera, loading the hand model, starting the TTS engine and
+opening the microphone each take from a fraction of a second to several
+seconds. Startup runs each loader on its own thread as soon as it is asked
+for, so the window can appear straight away and the subsystems load side
+by side. A subsystem added with `lazy=True` isn't loaded until something
+first needs it.
+
+The UI shows state() for each subsystem; code that needs one waits for it
+with result(), which re-raises whatever stopped it from loading. A
+subsystem that failed stays failed until it is asked for again, which
+retries it.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+STATE_IDLE = "idle"  # Lazy, and not needed yet
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class Startup:
+    """Named subsystems loaded on background threads, with their load times"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.times = {}  # Subsystem or milestone -> seconds since start (or load time)
+        self._loaders = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, loader, lazy=False):
+        """Register a subsystem; unless `lazy`, start loading it now"""
+        self._loaders[name] = loader
+        if not lazy:
+            self.load(name)
+
+    def load(self, name):
+        """Start loading a subsystem unless it is loading or loaded; returns its Future
+
+        A subsystem that failed to load is tried again.
+        """
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._futures[name] = Future()
+                threading.Thread(target=self._run, args=(name, future), daemon=True).start()
+        return future
+
+    def _run(self, name, future):
+        started = time.perf_counter()
+        try:
+            value = self._loaders[name]()
+        except Exception as e:
+            self.times[name] = time.perf_counter() - started
+            future.set_exception(e)
+        else:
+            self.times[name] = time.perf_counter() - started
+            future.set_result(value)
+
+    def result(self, name, timeout=None):
+        """Wait for a subsystem, loading it first if needed, and return what its loader returned"""
+        return self.load(name).result(timeout)
+
+    def state(self, name):
+        future = self._futures.get(name)
+        if future is None:
+            return STATE_IDLE
+        if not future.done():
+            return STATE_LOADING
+        return STATE_FAILED if future.exception() is not None else STATE_READY
+
+    def ready(self, name):
+        return self.state(name) == STATE_READY
+
+    def error(self, name):
+        """Why a subsystem failed to load, or None"""
+        future = self._futures.get(name)
+        return future.exception() if future is not None and future.done() else None
+
+    def loading(self):
+        """Whether anything is still loading"""
+        return any(not future.done() for future in list(self._futures.values()))
+
+    def mark(self, milestone):
+        """Record the time since start of a milestone, the first time it is reached"""
+        self.times.setdefault(milestone, time.perf_counter() - self.started)
+
+    def stats(self):
+        """Load times and milestones in seconds, named for export"""
+        return {f"startup_{name.replace(' ', '_')}_seconds": seconds for name, seconds in list(self.times.items())}
@@ -0,0 +1,120 @@
+"""Synthetic hand landmarks for benchmarks and offline evaluation
+
+Hands are built from a simple skeleton of a mirrored right hand (thumb on
+the right of the image, as the app sees it after flipping), posed with the
+fingers used by each gesture, then scaled, rotated, moved and optionally
+jittered.
+"""
+import math
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+# Skeleton in pixels for scale 1.0, wrist at the origin, y pointing down
+_MCPS = {5: (25.0, -90.0), 9: (5.0, -95.0), 13: (-15.0, -90.0), 17: (-33.0, -80.0)}
+_EXTENDED_SEGMENTS = (35.0, 25.0, 22.0)  # MCP->PIP, PIP->DIP, DIP->TIP
+_THUMB_BASE = ((20.0, -20.0), (40.0, -40.0))  # CMC, MCP
+_THUMB_EXTENDED = ((62.0, -55.0), (85.0, -65.0))  # IP, TIP
+_THUMB_TUCKED = ((35.0, -60.0), (15.0, -70.0))
+
+PINCH = "pinch"  # Index finger and thumb tips together
+
+# Which fingers (thumb, index, middle, ring, pinky) are extended for each gesture
+GESTURE_FINGERS = {
+    0: (False, False, False, False, False),
+    1: (False, True, False, False, False),
+    2: (False, True, True, False, False),
+    3: (False, True, True, True, False),
+    4: (False, True, True, True, True),
+    5: (True, True, True, True, True),
+}
+
+
+def _base_pose(extended):
+    """Hand-local (21, 3) landmarks for the given extended-finger flags"""
+    pose = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    pose[1, :2] = _THUMB_BASE[0]
+    pose[2, :2] = _THUMB_BASE[1]
+    pose[3:5, :2] = _THUMB_EXTENDED if extended[0] else _THUMB_TUCKED
+
+    for finger, (mcp_id, (x, y)) in enumerate(_MCPS.items(), start=1):
+        pose[mcp_id, :2] = (x, y)
+        # Fingers fan out slightly from the middle finger
+        spread = (x - 5.0) * 0.15
+        if extended[finger]:
+            for j, length in enumerate(_EXTENDED_SEGMENTS, start=1):
+                x += spread * length / 35.0
+                y -= length
+                pose[mcp_id + j] = (x, y, -2.0 * j)
+        else:
+            # Curled: up to the PIP, then folded back towards the palm
+            pose[mcp_id + 1] = (x, y - 30.0, -8.0)
+            pose[mcp_id + 2] = (x, y - 12.0, -14.0)
+            pose[mcp_id + 3] = (x, y + 3.0, -10.0)
+    return pose
+
+
+def _pinch_pose():
+    """Index finger reaching out with the thumb tip touching it"""
+    pose = _base_pose(GESTURE_FINGERS[1])
+    tip = pose[8, :2]
+    pose[3, :2] = (pose[2, :2] + tip) / 2.0
+    pose[4, :2] = tip + (4.0, 3.0)
+    return pose
+
+
+_POSES = {count: _base_pose(fingers) for count, fingers in GESTURE_FINGERS.items()}
+_POSES[PINCH] = _pinch_pose()
+
+
+def synthetic_hand(fingers=1, center=(320.0, 300.0), scale=1.0, angle=0.0, noise=0.0, rng=None):
+    """One hand as a (21, 3) float32 array in pixel coordinates
+
+    `fingers` is a gesture finger count (0-5), PINCH or a 5-tuple of extended
+    flags, `angle` rotates the hand in degrees and `noise` adds Gaussian
+    jitter (px).
+    """
+    if isinstance(fingers, str):
+        pose = _POSES[fingers]
+    else:
+        pose = _POSES[int(fingers)] if np.ndim(fingers) == 0 else _base_pose(fingers)
+    rad = math.radians(angle)
+    c, s = math.cos(rad), math.sin(rad)
+    rotation = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]], dtype=np.float32)
+    hand = (pose @ rotation.T) * scale
+    hand[:, 0] += center[0]
+    hand[:, 1] += center[1]
+    if noise:
+        rng = rng or np.random.default_rng()
+        hand += rng.normal(0.0, noise, hand.shape).astype(np.float32)
+    return hand
+
+
+def synthetic_sequence(counts, centers=None, scale=1.0, angle=0.0, noise=0.0, seed=0):
+    """Stack of hands, one per frame, as an (N, 21, 3) float32 array
+
+    `counts` gives the gesture for each frame and `centers` (N, 2) the wrist
+    position; by default the wrist stays put.
+    """
+    rng = np.random.default_rng(seed)
+    counts = list(counts)
+    if centers is None:
+        centers = np.tile((320.0, 300.0), (len(counts), 1))
+    out = np.empty((len(counts), NUM_LANDMARKS, 3), dtype=np.float32)
+    for i, (count, center) in enumerate(zip(counts, centers)):
+        out[i] = synthetic_hand(count, center, scale, angle, noise, rng)
+    return out
+
+
+def random_walk(n, start=(320.0, 300.0), step=6.0, bounds=((140.0, 500.0), (200.0, 420.0)), seed=0):
+    """Smooth random wrist path of n points as an (n, 2) array"""
+    rng = np.random.default_rng(seed)
+    path = np.empty((n, 2))
+    position = np.array(start, dtype=float)
+    velocity = np.zeros(2)
+    for i in range(n):
+        velocity = 0.85 * velocity + rng.normal(0.0, step, 2)
+        position = np.clip(position + velocity, [bounds[0][0], bounds[1][0]], [bounds[0][1], bounds[1][1]])
+        path[i] = position
+    return path
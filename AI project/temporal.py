@@ -0,0 +1,183 @@
+"""Temporal gestures: swipes, pinches and holds over the last moments of hand movement
+
+Finger counting looks at one frame at a time. TemporalGestures keeps a ring
+buffer of the most recent hands and their timestamps and works out, with
+vectorized NumPy over the whole window:
+  - velocity: least-squares slope of the palm centre over the last `span`
+    seconds, in hand lengths per second so it doesn't depend on how far the
+    hand is from the camera,
+  - pinch: the thumb tip to index tip distance, in hand lengths,
+  - dwell: how long the palm has stayed within a radius of where it is now.
+Gestures are declared in GESTURES, with the action each one triggers, and
+fire once; they are armed again when the movement, pinch or stillness that
+fired them is over. The same velocity makes scrolling follow the hand's
+speed instead of a fixed step.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from landmarks import INDEX_MCP, MIDDLE_MCP, NUM_LANDMARKS, THUMB_TIP, WRIST
+
+INDEX_TIP = 8
+PALM = np.array([WRIST, 5, 9, 13, 17])  # Wrist and finger MCPs; their mean barely moves as fingers bend
+DEFAULT_WINDOW = 64  # Frames kept, about two seconds at 30 FPS
+DEFAULT_SPAN = 0.15  # Seconds of movement a velocity is measured over
+MIN_SAMPLES = 3  # Frames needed in the span for a velocity
+# An index tip this close to its own MCP (in hand lengths) is curled into a fist, not pinching
+PINCH_MIN_REACH = 0.35
+
+# Scroll clicks per frame in the scroll modes: a slow hand scrolls gently, a fast one quickly
+SCROLL_MIN_CLICKS = 3
+SCROLL_CLICKS_PER_SPEED = 15  # Added per hand length per second of vertical movement
+SCROLL_MAX_CLICKS = 60
+
+# direction: unit (dx, dy) in image coordinates; min_speed: hand lengths per second along it
+# close/open: thumb-index distances (hand lengths) that start and end a pinch
+# seconds/radius: how long the palm must stay within radius (hand lengths)
+# fingers: finger count (the voted winner) the gesture is recognised with, None for any
+# action: (mouse method, arguments...)
+Swipe = namedtuple("Swipe", ["name", "direction", "min_speed", "fingers", "action"])
+Pinch = namedtuple("Pinch", ["name", "close", "open", "fingers", "action"])
+Hold = namedtuple("Hold", ["name", "seconds", "radius", "fingers", "action"])
+
+# An open hand swipes back and forward, or holds still to grab and drag; a pinch clicks
+GESTURES = (
+    Swipe("swipe_left", (-1.0, 0.0), 3.0, 5, ("press", "browserback")),
+    Swipe("swipe_right", (1.0, 0.0), 3.0, 5, ("press", "browserforward")),
+    Pinch("pinch", 0.25, 0.4, None, ("click",)),
+    Hold("grab", 0.5, 0.1, 5, ("mouseDown",)),
+)
+
+
+def hand_features(landmarks):
+    """Palm centre (x, y), hand length and pinch distance of one hand or a stack of hands
+
+    Accepts (21, 3) or (N, 21, 3) pixel landmarks. The hand length is the
+    wrist to middle MCP distance; the pinch distance is in hand lengths, and
+    infinite when the index finger is curled.
+    """
+    hands = np.asarray(landmarks, dtype=np.float32)[..., :2]
+    palm = hands[..., PALM, :].mean(axis=-2)
+    scale = np.maximum(np.linalg.norm(hands[..., MIDDLE_MCP, :] - hands[..., WRIST, :], axis=-1), 1.0)
+    pinch = np.linalg.norm(hands[..., THUMB_TIP, :] - hands[..., INDEX_TIP, :], axis=-1) / scale
+    reach = np.linalg.norm(hands[..., INDEX_TIP, :] - hands[..., INDEX_MCP, :], axis=-1) / scale
+    return palm, scale, np.where(reach > PINCH_MIN_REACH, pinch, np.inf)
+
+
+def _one_hand_features(hand):
+    """hand_features() for a single hand as plain floats; numpy's per-call cost dominates at this size"""
+    x = hand[:, 0].tolist()
+    y = hand[:, 1].tolist()
+    palm_x = (x[0] + x[5] + x[9] + x[13] + x[17]) / 5.0
+    palm_y = (y[0] + y[5] + y[9] + y[13] + y[17]) / 5.0
+    scale = max(math.hypot(x[MIDDLE_MCP] - x[WRIST], y[MIDDLE_MCP] - y[WRIST]), 1.0)
+    reach = math.hypot(x[INDEX_TIP] - x[INDEX_MCP], y[INDEX_TIP] - y[INDEX_MCP]) / scale
+    pinch = math.hypot(x[THUMB_TIP] - x[INDEX_TIP], y[THUMB_TIP] - y[INDEX_TIP]) / scale
+    return palm_x, palm_y, scale, pinch if reach > PINCH_MIN_REACH else math.inf
+
+
+class TemporalGestures:
+    """Ring buffer of recent hands, and the dynamic gestures they make
+
+    update() takes each frame's hand and returns the gestures that fire on
+    it; reset() when the hand is lost.
+    """
+
+    def __init__(self, gestures=GESTURES, window=DEFAULT_WINDOW, span=DEFAULT_SPAN):
+        self.gestures = tuple(gestures)
+        self.window = window
+        self.span = span
+        self.hands = np.zeros((window, NUM_LANDMARKS, 3), dtype=np.float32)  # Oldest overwritten first
+        # Per frame: time, palm x and y, hand length; never-filled rows have time -inf
+        self.samples = np.zeros((window, 4))
+        self.times = self.samples[:, 0]
+        self._pos = 0
+        self._armed = [True] * len(self.gestures)
+        self._fired = []
+        self.counts = {gesture.name: 0 for gesture in self.gestures}
+        self.reset()
+
+    def reset(self):
+        """Forget the hand, e.g. when it goes out of view"""
+        self.times.fill(-np.inf)
+        self._armed[:] = [True] * len(self.gestures)
+        self.velocity = (0.0, 0.0)  # Hand lengths per second
+        self.pinch = math.inf  # Thumb-index distance, hand lengths
+        self.pinched = False
+
+    def update(self, landmarks, timestamp, fingers=None):
+        """Add this frame's (21, 3) hand; returns the gestures that fire on it
+
+        The returned list is reused on the next call.
+        """
+        i = self._pos
+        self._pos = (i + 1) % self.window
+        hand = self.hands[i]
+        hand[...] = landmarks
+        palm_x, palm_y, scale, self.pinch = _one_hand_features(hand)
+        self.samples[i] = (timestamp, palm_x, palm_y, scale)
+        self.velocity = self._velocity(timestamp)
+
+        fired = self._fired
+        fired.clear()
+        distances = None
+        for k, gesture in enumerate(self.gestures):
+            applies = gesture.fingers is None or gesture.fingers == fingers
+            if isinstance(gesture, Swipe):
+                dx, dy = gesture.direction
+                vx, vy = self.velocity
+                along = vx * dx + vy * dy
+                if self._armed[k]:
+                    # Mostly along the swipe's direction, not a diagonal
+                    active = along >= gesture.min_speed and abs(vx * dy - vy * dx) < along
+                else:
+                    active = along >= 0.5 * gesture.min_speed  # Over once the hand slows down
+            elif isinstance(gesture, Pinch):
+                active = self.pinch < (gesture.close if self._armed[k] else gesture.open)
+                self.pinched = active
+            else:
+                if distances is None:
+                    offsets = self.samples[:, 1:3] - (palm_x, palm_y)
+                    distances = (offsets * offsets).sum(axis=1) / (scale * scale)
+                active = self._still_for(distances, gesture.radius, timestamp) >= gesture.seconds
+
+            if self._armed[k]:
+                if active and applies:
+                    self._armed[k] = False
+                    self.counts[gesture.name] += 1
+                    fired.append(gesture)
+            elif not active:
+                self._armed[k] = True
+        return fired
+
+    def _velocity(self, timestamp):
+        """Least-squares palm velocity over the last `span` seconds, hand lengths per second"""
+        recent = self.samples[self.times > timestamp - self.span]
+        if len(recent) < MIN_SAMPLES:
+            return 0.0, 0.0
+        mean = recent.mean(axis=0)
+        centred = recent - mean
+        t = centred[:, 0]
+        denominator = t @ t
+        if denominator <= 0.0:
+            return 0.0, 0.0
+        vx, vy = (t @ centred[:, 1:3] / (denominator * mean[3])).tolist()
+        return vx, vy
+
+    def _still_for(self, distances, radius, timestamp):
+        """Seconds the palm has stayed within `radius` hand lengths of where it is now"""
+        seen = self.times > -np.inf
+        moved = seen & (distances > radius * radius)
+        since = self.times[moved].max() if moved.any() else self.times[seen].min()
+        return timestamp - since
+
+    def scroll_clicks(self, direction):
+        """Scroll step for this frame, following the hand's vertical speed; `direction` is +1 or -1"""
+        clicks = SCROLL_MIN_CLICKS + SCROLL_CLICKS_PER_SPEED * abs(self.velocity[1])
+        return direction * int(min(clicks, SCROLL_MAX_CLICKS))
+
+    def stats(self):
+        """Gesture counters, named for export"""
+        return {f"gestures_{name}_total": count for name, count in self.counts.items()}
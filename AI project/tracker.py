@@ -0,0 +1,542 @@
+"""Hand gesture pipeline shared by the GUI app and the headless harness
+
+One hand drives everything by default. With `max_hands=2` each hand keeps its
+own HandState, keyed by handedness: the pointer hand (`pointer_hand`, the
+right by default) works exactly as a single hand does, and the other hand
+plays chords with it, clicking or scrolling wherever the pointer hand
+steers.
+
+With `temporal` (a TemporalGestures) the pointer hand's movement counts
+too: swipes, pinches and holds fire their actions, an open hand grabs by
+holding still instead of straight away, and scrolling follows the hand's
+speed.
+"""
+import time
+from enum import Enum
+
+import cv2
+
+from filters import DEFAULT_FILTER, make_filter
+from framepool import FramePool
+from landmarks import count_fingers, count_fingers_upright, landmarks_to_array, new_landmark_array
+from metrics import PipelineMetrics
+from motion import MotionGate
+from roi import RoiHandDetector
+from screenmap import ScreenMapper
+from voting import FingerCountVoter
+
+
+class Mode(Enum):
+    NAVIGATION = 1
+    SCROLL_UP = 2
+    SCROLL_DOWN = 3
+    CLICK = 4
+    DRAG = 5
+
+
+POINTER_HAND = "Right"  # MediaPipe handedness of the hand that steers when two are tracked
+CLICK_COOLDOWN = 10  # Frames between clicks
+# Chords, by the other hand's finger count: clicks happen once as the count is
+# shown, scrolls repeat every frame while it is held
+CHORD_CLICKS = {1: "click", 4: "rightClick"}
+CHORD_SCROLLS = {2: 10, 3: -10}
+
+
+def _ignore(*args):
+    pass
+
+
+class HandState:
+    """Gesture state of one tracked hand
+
+    Slots keep the per-frame attribute access cheap, and a second hand costs
+    one more of these rather than a second tracker.
+    """
+
+    __slots__ = ("label", "mode", "voter", "cursor_filter", "click_cooldown", "is_dragging", "prev_y",
+                 "drag_start_pos", "finger_count", "landmarks", "present")
+
+    def __init__(self, label, cursor_filter=None):
+        self.label = label  # MediaPipe handedness, "Left" or "Right"
+        self.mode = Mode.NAVIGATION
+        self.voter = FingerCountVoter()  # For stabilizing finger count detection and mode changes
+        self.cursor_filter = cursor_filter  # None for a hand that never steers
+        self.click_cooldown = 0
+        self.is_dragging = False
+        self.prev_y = None
+        self.drag_start_pos = None
+        self.finger_count = 0  # Raw count of the last frame with this hand
+        self.landmarks = new_landmark_array()  # Reused (21, 3) pixel-space landmark buffer
+        self.present = False  # Seen on the last frame; only kept up with two hands
+
+
+def _pointer_state(name):
+    """Tracker attribute backed by the pointer hand's state, as it was before there could be two"""
+    return property(lambda self: getattr(self.hand, name),
+                    lambda self, value: setattr(self.hand, name, value))
+
+
+class GestureTracker:
+    """Turns camera frames into finger counts, mode changes and mouse actions
+
+    The tracker has no UI of its own: mouse actions go to `mouse` (the
+    pyautogui module or anything with the same methods) and status changes
+    are reported through the optional callbacks.
+    """
+
+    mode = _pointer_state("mode")
+    voter = _pointer_state("voter")
+    cursor_filter = _pointer_state("cursor_filter")
+    click_cooldown = _pointer_state("click_cooldown")
+    is_dragging = _pointer_state("is_dragging")
+    prev_y = _pointer_state("prev_y")
+    drag_start_pos = _pointer_state("drag_start_pos")
+    finger_count = _pointer_state("finger_count")
+    landmarks = _pointer_state("landmarks")
+
+    def __init__(self, mouse, screen_size, hands=None, on_hand_status=None,
+                 on_mode_change=None, log=None, metrics=None, roi=False, motion_gate=None,
+                 mapper=None, max_hands=1, pointer_hand=POINTER_HAND, temporal=None):
+        self.mouse = mouse
+        self.metrics = metrics or PipelineMetrics()
+        self.screen_width, self.screen_height = screen_size
+        # Camera-to-screen transform; the default profile keeps the original 120 px margins
+        self.mapper = mapper or ScreenMapper(screen_size)
+        self.on_hand_status = on_hand_status or _ignore
+        self.on_mode_change = on_mode_change or _ignore
+        self.log_message = log or _ignore
+
+        # Tracking state
+        self.smoothing = 5
+        self.filter_name = DEFAULT_FILTER
+        self.max_hands = max_hands
+        self.pointer_hand = pointer_hand
+        self.hand = HandState(pointer_hand, make_filter(self.filter_name, self.smoothing))  # Steers the cursor
+        self.chord_hand = None  # The other hand, with two
+        self.hand_states = {pointer_hand: self.hand}
+        if max_hands > 1:
+            self.chord_hand = HandState("Left" if pointer_hand == "Right" else "Right")
+            self.hand_states[self.chord_hand.label] = self.chord_hand
+        self.temporal = temporal  # Optional TemporalGestures for the pointer hand
+        self.timestamp = 0.0  # Time of the frame being processed
+        self.recorder = None  # Optional SessionRecorder
+        self.pool = FramePool()  # Reused RGB frame buffers
+
+        # MediaPipe setup; imported on first use as it takes a while, and replays bring their own `hands`
+        self._mp = None
+        self.model_complexity = 1  # MediaPipe's default, full landmark model
+        self.hands = hands or self.create_hands(self.model_complexity)
+        # Optionally only look around the last known hand position
+        self.detector = RoiHandDetector(self.hands, enabled=roi, metrics=self.metrics, pool=self.pool,
+                                        max_hands=max_hands)
+        # Runs detection at a low rate while nothing moves and no hand is in view
+        self.gate = motion_gate or MotionGate()
+        self.landmark_style = None  # Created with the first overlay
+        self.draw_overlays = True  # Turned off while nobody is looking at the preview
+
+    @property
+    def mp(self):
+        if self._mp is None:
+            import mediapipe
+            self._mp = mediapipe
+        return self._mp
+
+    def create_hands(self, model_complexity):
+        """Create the MediaPipe hand tracker"""
+        return self.mp.solutions.hands.Hands(
+            max_num_hands=self.max_hands,
+            model_complexity=model_complexity,
+            min_detection_confidence=0.6,  # Lower threshold for better detection
+            min_tracking_confidence=0.6    # Lower threshold for better tracking
+        )
+
+    def process_frame(self, frame, timestamp=None):
+        """Run one BGR camera frame through the pipeline and return the annotated RGB frame
+
+        `timestamp` (seconds) drives the mode change dwell time; it defaults to
+        the current time, but replays pass the recording's own clock. The
+        returned frame is a pooled buffer that is overwritten a few frames
+        later, so copy it to keep it.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.timestamp = timestamp
+        metrics = self.metrics
+        start = t = metrics.now()
+
+        # Cheap motion check decides whether hand detection runs on this frame
+        detect = self.gate.should_detect(frame, timestamp)
+        t = metrics.lap("motion", t)
+
+        # Convert to RGB for MediaPipe, into a reused buffer; the preview shows the same frame
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.pool.get("rgb", frame.shape))
+        t = metrics.lap("to_rgb", t)
+
+        # Flip it horizontally, in place, for a more intuitive mirror view
+        cv2.flip(rgb_frame, 1, dst=rgb_frame)
+        t = metrics.lap("flip", t)
+        if not detect:
+            # Idle: nobody there, and the hand state was already reset when it left
+            if self.recorder is not None:
+                self.recorder.record(self, None, rgb_frame.shape)
+            metrics.gauges.update(self.gate.stats())
+            metrics.lap("frame", start)
+            metrics.frame_done()
+            return rgb_frame
+
+        detect_start = time.perf_counter()
+        results = self.detector.process(rgb_frame)
+        self.gate.record(timestamp, bool(results.multi_hand_landmarks), time.perf_counter() - detect_start)
+        metrics.lap("inference", t)
+        metrics.gauges.update(self.gate.stats())
+        self.process_results(rgb_frame, results)
+        metrics.lap("frame", start)
+        metrics.frame_done()
+        return rgb_frame
+
+    def process_results(self, rgb_frame, results, timestamp=None):
+        """Gesture logic for detection results, whether from process_frame() or made elsewhere
+
+        Results from worker processes (see multicam.py) come with their
+        frame's `timestamp`; `rgb_frame` is drawn on and gives the frame size.
+        """
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+        # Check if hand is detected
+        if not results.multi_hand_landmarks:
+            self.handle_no_hand_detected()
+        else:
+            # Hand is detected - process landmarks
+            self.process_hand_landmarks(rgb_frame, results)
+
+        if self.recorder is not None:
+            self.recorder.record(self, results, rgb_frame.shape)
+
+    def handle_no_hand_detected(self):
+        """Handle case when no hand is detected"""
+        self.on_hand_status(False)
+        self.reset_hand(self.hand)
+        if self.chord_hand is not None:
+            self.reset_hand(self.chord_hand)
+
+    def reset_hand(self, hand):
+        """Forget a hand that went out of view"""
+        hand.present = False
+        hand.voter.clear()
+        # Clear pointer smoothing history when hand disappears
+        if hand.cursor_filter is not None:
+            hand.cursor_filter.reset()
+        hand.prev_y = None
+        if hand is self.hand and self.temporal is not None:
+            self.temporal.reset()
+
+        # End dragging if active
+        if hand.is_dragging:
+            self.mouse.mouseUp()
+            hand.is_dragging = False
+            self.log_message("Drag ended (hand lost)")
+
+    def reset_motion(self):
+        """Forget cursor smoothing and movement history, keeping modes and drags
+
+        For when landmarks start coming from another camera, which sees the
+        hand somewhere else in its own frame.
+        """
+        for hand in self.hand_states.values():
+            if hand.cursor_filter is not None:
+                hand.cursor_filter.reset()
+            hand.prev_y = None
+        if self.temporal is not None:
+            self.temporal.reset()
+
+    def process_hand_landmarks(self, frame, results):
+        """Process detected hand landmarks and return any mode transition"""
+        if self.chord_hand is not None:
+            return self.process_two_hands(frame, results)
+
+        # Process only the first detected hand
+        hand_landmarks = results.multi_hand_landmarks[0]
+        self.draw_hand(frame, hand_landmarks)
+
+        # Extract landmark positions
+        landmarks = landmarks_to_array(hand_landmarks, frame.shape[1], frame.shape[0], out=self.hand.landmarks)
+        transition = self.process_landmarks(landmarks, frame.shape)
+
+        # Add finger count text to frame
+        if self.draw_overlays:
+            cv2.putText(frame, f"Fingers: {self.hand.voter.winner}", (50, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        return transition
+
+    def process_two_hands(self, frame, results):
+        """Pointer hand as a single hand, the other hand as chords; returns the pointer's mode transition"""
+        # Match the detected hands to their states by handedness; if both are
+        # given the same label, the second is taken to be the other hand
+        found = {}
+        handedness = results.multi_handedness or ()
+        for index, hand_landmarks in enumerate(results.multi_hand_landmarks[:2]):
+            label = handedness[index].classification[0].label if index < len(handedness) else None
+            hand = self.hand_states.get(label)
+            if hand is None or hand in found:
+                hand = self.chord_hand if self.hand in found else self.hand
+            found[hand] = hand_landmarks
+            self.draw_hand(frame, hand_landmarks)
+
+        transition = None
+        pointer = found.get(self.hand)
+        if pointer is not None:
+            self.hand.present = True
+            landmarks = landmarks_to_array(pointer, frame.shape[1], frame.shape[0], out=self.hand.landmarks)
+            transition = self.process_landmarks(landmarks, frame.shape)
+        elif self.hand.present:
+            self.reset_hand(self.hand)
+
+        chord = found.get(self.chord_hand)
+        if chord is not None:
+            if pointer is None:
+                self.on_hand_status(True)
+            landmarks = landmarks_to_array(chord, frame.shape[1], frame.shape[0], out=self.chord_hand.landmarks)
+            self.process_chord(landmarks)
+        elif self.chord_hand.present:
+            self.reset_hand(self.chord_hand)
+
+        if self.draw_overlays:
+            cv2.putText(frame, f"Fingers: {self.hand.voter.winner} + {self.chord_hand.voter.winner}", (50, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        return transition
+
+    def draw_hand(self, frame, hand_landmarks):
+        """Draw a hand's landmarks on the frame, if overlays are on"""
+        if not self.draw_overlays:
+            return
+        t = self.metrics.now()
+        mp = self.mp.solutions
+        if self.landmark_style is None:
+            # Overlays are drawn on the RGB frame, so MediaPipe's red landmarks are given in RGB order
+            self.landmark_style = mp.drawing_utils.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2)
+        mp.drawing_utils.draw_landmarks(frame, hand_landmarks, mp.hands.HAND_CONNECTIONS, self.landmark_style)
+        self.metrics.lap("draw", t)
+
+    def process_chord(self, landmarks):
+        """The other hand's gesture: click or scroll wherever the pointer hand is steering"""
+        metrics = self.metrics
+        t = metrics.now()
+        hand = self.chord_hand
+        hand.present = True
+        hand.finger_count = self.count_fingers(landmarks)
+        transition = hand.voter.update(hand.finger_count, self.timestamp)
+
+        # Like modes: a chord holds once its count is established and still winning the vote
+        count = hand.voter.stable
+        if count == hand.voter.winner:
+            if count in CHORD_SCROLLS:
+                self.mouse.scroll(CHORD_SCROLLS[count])
+            elif transition is not None and count in CHORD_CLICKS and hand.click_cooldown == 0:
+                getattr(self.mouse, CHORD_CLICKS[count])()
+                hand.click_cooldown = CLICK_COOLDOWN
+                self.log_message(f"Chord: {CHORD_CLICKS[count]}")
+        if hand.click_cooldown > 0:
+            hand.click_cooldown -= 1
+        metrics.lap("chord", t)
+
+    def process_landmarks(self, landmarks, frame_shape):
+        """Gesture logic for one hand's (21, 3) pixel landmarks: count, vote, act and switch modes
+
+        This is everything after inference, so session replays drive it directly.
+        """
+        hand = self.hand
+        metrics = self.metrics
+        t = metrics.now()
+        self.on_hand_status(True)
+
+        # Count extended fingers and stabilize
+        hand.finger_count = self.count_fingers(landmarks)
+        transition = hand.voter.update(hand.finger_count, self.timestamp)
+        t = metrics.lap("fingers", t)
+
+        # Swipes, pinches and holds over the last few frames
+        if self.temporal is not None:
+            for gesture in self.temporal.update(landmarks, self.timestamp, hand.voter.winner):
+                self.run_gesture(gesture)
+            t = metrics.lap("gestures", t)
+
+        # Act on the winning finger count from recent history for stability
+        self.process_current_mode(hand.voter.winner, landmarks, frame_shape)
+        if transition is not None:
+            self.handle_finger_count_change(transition.count)
+
+        # Handle click cooldown
+        if hand.click_cooldown > 0:
+            hand.click_cooldown -= 1
+        metrics.lap("actions", t)
+        return transition
+
+    def process_current_mode(self, finger_count, landmarks, frame_shape):
+        """Process hand gesture based on current mode"""
+        hand = self.hand
+        if hand.mode == Mode.NAVIGATION and finger_count == 1:
+            self.handle_navigation_mode(landmarks, frame_shape)
+        elif hand.mode == Mode.SCROLL_UP and finger_count == 2:
+            # Scroll up with a gentle continuous movement, or as fast as the hand moves
+            self.mouse.scroll(10 if self.temporal is None else self.temporal.scroll_clicks(1))
+        elif hand.mode == Mode.SCROLL_DOWN and finger_count == 3:
+            self.mouse.scroll(-10 if self.temporal is None else self.temporal.scroll_clicks(-1))
+        elif hand.mode == Mode.CLICK and finger_count == 4:
+            if hand.click_cooldown == 0:
+                self.mouse.click()
+                hand.click_cooldown = CLICK_COOLDOWN
+                self.log_message("Click performed")
+        elif hand.mode == Mode.DRAG and finger_count == 5:
+            self.handle_drag_mode(landmarks, frame_shape)
+
+    def run_gesture(self, gesture):
+        """Carry out a temporal gesture's action for the pointer hand"""
+        hand = self.hand
+        if hand.is_dragging:
+            return  # While dragging, the drag is the gesture
+        name, *args = gesture.action
+        if name == "click":
+            if hand.click_cooldown:
+                return
+            hand.click_cooldown = CLICK_COOLDOWN
+        getattr(self.mouse, name)(*args)
+        if name == "mouseDown":
+            hand.is_dragging = True
+        self.log_message(f"Gesture: {gesture.name}")
+        self.metrics.gauges.update(self.temporal.stats())
+
+    def count_fingers(self, landmarks):
+        """Count number of extended fingers"""
+        if self.chord_hand is None:
+            return count_fingers_upright(landmarks)  # One right hand: the original, cheapest rule
+        return count_fingers(landmarks)  # The other hand's thumb points the other way
+
+    def handle_finger_count_change(self, finger_count):
+        """Handle changes in detected finger count"""
+        hand = self.hand
+        # End dragging if it was active and we're switching modes
+        if hand.is_dragging and finger_count != 5:
+            self.mouse.mouseUp()
+            hand.is_dragging = False
+            self.log_message("Drag ended (mode change)")
+
+        if finger_count == 1:
+            self.set_mode(Mode.NAVIGATION)
+            self.log_message("Switched to navigation mode")
+
+        elif finger_count == 2:
+            self.set_mode(Mode.SCROLL_UP)
+            self.log_message("Switched to scroll up mode")
+
+        elif finger_count == 3:
+            self.set_mode(Mode.SCROLL_DOWN)
+            self.log_message("Switched to scroll down mode")
+
+        elif finger_count == 4:
+            self.set_mode(Mode.CLICK)
+            self.log_message("Switched to click mode")
+
+        elif finger_count == 5:
+            self.set_mode(Mode.DRAG)
+            self.log_message("Switched to drag mode")
+            hand.prev_y = None  # Reset drag reference point
+
+    def set_mode(self, mode):
+        """Switch to a new mode and notify the listener"""
+        self.hand.mode = mode
+        self.on_mode_change(mode)
+
+    def handle_navigation_mode(self, landmarks, frame_shape):
+        """Handle mouse pointer control mode"""
+        hand = self.hand
+        # Use index finger tip for cursor control
+        index_tip = landmarks[8]
+
+        # Apply smoothing to cursor movement
+        smoothed = hand.cursor_filter.update(index_tip[0], index_tip[1], self.timestamp)
+
+        # Filters need a few points for stability before the cursor moves
+        if smoothed is not None:
+            # Map camera coordinates to screen coordinates with larger margins
+            # This reduces the need for precise hand positioning
+            screen_x, screen_y = self.map_to_screen(smoothed[0], smoothed[1], frame_shape)
+
+            # Move the mouse cursor with increased smoothing
+            self.mouse.moveTo(screen_x, screen_y)
+
+    def handle_drag_mode(self, landmarks, frame_shape):
+        """Handle drag mode with 5 fingers"""
+        hand = self.hand
+        # Use middle finger for drag reference
+        middle_tip = landmarks[12]
+
+        # Apply smoothing to movement
+        smoothed = hand.cursor_filter.update(middle_tip[0], middle_tip[1], self.timestamp)
+
+        if smoothed is not None:
+            # Map coordinates to screen
+            screen_x, screen_y = self.map_to_screen(smoothed[0], smoothed[1], frame_shape)
+
+            # Start drag if not already dragging; temporal gestures grab by holding still instead
+            if not hand.is_dragging and self.temporal is None:
+                self.mouse.mouseDown()
+                hand.is_dragging = True
+                self.log_message("Started dragging")
+
+            # Move while dragging
+            self.mouse.moveTo(screen_x, screen_y)
+
+    def map_to_screen(self, x, y, frame_shape):
+        """Map camera coordinates to screen coordinates"""
+        return self.mapper.map(float(x), float(y), frame_shape)
+
+    def set_smoothing(self, level):
+        """Change the smoothing level of the cursor filter; it takes effect at the next update"""
+        self._check_not_recording()
+        self.smoothing = level
+        self.hand.cursor_filter.set_smoothing(level)
+
+    def set_model_complexity(self, model_complexity):
+        """Switch between the lite (0) and full (1) landmark models, rebuilding only on a change"""
+        if model_complexity == self.model_complexity:
+            return
+        self.hands.close()
+        self.hands = self.detector.hands = self.create_hands(model_complexity)
+        self.model_complexity = model_complexity
+        self.detector.reset()
+
+    def set_roi(self, enabled):
+        """Turn region-of-interest tracking on or off"""
+        self.detector.enabled = enabled
+        self.detector.reset()
+
+    def set_filter(self, name):
+        """Switch to another cursor filter by its display name"""
+        self._check_not_recording()
+        self.filter_name = name
+        # Build the new filter completely, then swap it in with one assignment, so
+        # the tracking thread sees either the old filter or the new one
+        self.hand.cursor_filter = make_filter(name, self.smoothing)
+
+    def set_recorder(self, recorder):
+        """Start recording the session to a SessionRecorder, or stop with None"""
+        if recorder is not None and self.chord_hand is not None:
+            raise ValueError("session files hold one hand; two-hand tracking can't be recorded")
+        if self.recorder is not None:
+            self.mouse = self.recorder.actions.mouse
+        if recorder is not None:
+            self.mouse = recorder.wrap(self.mouse)
+        self.recorder = recorder
+
+    def _check_not_recording(self):
+        # A session file stores the settings once, so a replay would apply the wrong ones
+        if self.recorder is not None and self.recorder.frames:
+            raise ValueError("cursor settings can't change while a session is being recorded")
+
+    def release(self):
+        """Release the mouse button if a drag is in progress"""
+        for hand in self.hand_states.values():
+            if hand.is_dragging:
+                self.mouse.mouseUp()
+                hand.is_dragging = False
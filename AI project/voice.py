@@ -0,0 +1,503 @@
+"""Streaming voice command pipeline
+
+Listening and recognition run side by side. A capture thread reads the
+microphone in small chunks without stopping, and an energy-based voice
+activity detector cuts the stream into utterances, which go on a queue. A
+pool of worker threads recognises them with a pluggable backend and
+delivers the transcripts in the order they were spoken, so recognising
+one utterance never makes the microphone miss the next.
+
+The detector's threshold follows the background noise level as it goes,
+so no separate ambient-noise calibration holds up startup. The level
+reached is saved per microphone (save_noise_floor) and the next session
+starts from it, so it is right from the first chunk.
+
+Audio sources have `sample_rate`, `sample_width` and `chunk_frames`, plus
+open(), read() (bytes, or None at the end) and close(). Backends have
+recognize(utterance), which returns the transcript (or a list of
+alternative transcripts, best first), returns None when nothing was
+understood, or raises RecognitionError.
+"""
+import json
+import math
+import os
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+
+import numpy as np
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUE = 4  # Utterances waiting for a worker; older ones are dropped past this
+DEFAULT_MIN_ENERGY = 300.0  # RMS of 16-bit samples; speech_recognition's default threshold
+DEFAULT_SPEECH_RATIO = 3.0  # Speech must be this many times the noise floor
+DEFAULT_START_TIME = 0.1  # Seconds over the threshold before an utterance starts
+DEFAULT_END_SILENCE = 0.5  # Seconds under the threshold that end an utterance
+DEFAULT_PRE_ROLL = 0.3  # Seconds of audio kept from before the start
+DEFAULT_PHRASE_LIMIT = 5.0  # Longest utterance, as with listen(phrase_time_limit=5)
+DEFAULT_MIN_SPEECH = 0.15  # Shorter bursts (clicks, knocks) are ignored
+NOISE_ADAPT_TIME = 0.5  # Time constant of the noise floor between utterances
+SLOW_ADAPT_TIME = 10.0  # ...and while over the threshold, so steady noise isn't speech for long
+LATENCY_WINDOW = 100
+NOISE_FLOOR_FILE = os.path.join(os.path.expanduser("~"), ".gesture_control_noise.json")
+
+STATE_LISTENING = "listening"
+STATE_PROCESSING = "processing"
+
+# seq: order the utterance was spoken in
+# started / speech_end: monotonic times of the first and last chunk over the threshold
+# label: what the source was playing, for sources that know (WavFileSource)
+Utterance = namedtuple("Utterance", ["seq", "audio", "sample_rate", "sample_width", "started", "speech_end", "label"])
+
+
+class RecognitionError(Exception):
+    """The backend could not be reached or failed; the utterance is lost"""
+
+
+def rms(chunk):
+    """Root-mean-square level of 16-bit little-endian PCM"""
+    samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32)
+    return math.sqrt(float(samples.dot(samples)) / len(samples)) if len(samples) else 0.0
+
+
+class VoiceActivityDetector:
+    """Cuts a stream of audio chunks into utterances by their energy
+
+    The noise floor is a moving average of the chunk energy while nobody
+    speaks; a chunk counts as speech when it is over both `min_energy` and
+    `ratio` times the floor. Without a starting `noise_floor` it starts
+    from the first chunk's energy.
+    """
+
+    def __init__(self, sample_rate, sample_width=2, min_energy=DEFAULT_MIN_ENERGY, ratio=DEFAULT_SPEECH_RATIO,
+                 start_time=DEFAULT_START_TIME, end_silence=DEFAULT_END_SILENCE, pre_roll=DEFAULT_PRE_ROLL,
+                 phrase_limit=DEFAULT_PHRASE_LIMIT, min_speech=DEFAULT_MIN_SPEECH, noise_floor=None):
+        if sample_width != 2:
+            raise ValueError("only 16-bit audio is supported")
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.min_energy = min_energy
+        self.ratio = ratio
+        self.start_time = start_time
+        self.end_silence = end_silence
+        self.pre_roll = pre_roll
+        self.phrase_limit = phrase_limit
+        self.min_speech = min_speech
+        self.noise_floor = noise_floor
+        self.energy = 0.0
+        self.in_speech = False
+        self.discarded = 0  # Bursts too short to be speech
+        self.label = None
+        self._pre = deque()  # Chunks before the start, up to `pre_roll`
+        self._pre_duration = 0.0
+        self._chunks = []
+        self._run = 0.0  # Seconds over the threshold while waiting for speech
+        self._silence = 0.0
+        self._length = 0.0
+        self._speech_start = self._speech_end = 0.0
+
+    def threshold(self):
+        """Energy a chunk must exceed to count as speech"""
+        return max(self.min_energy, (self.noise_floor or 0.0) * self.ratio)
+
+    def feed(self, chunk, timestamp, label=None):
+        """Add a chunk that ended at `timestamp`; return an Utterance when one is complete"""
+        duration = self._duration(chunk)
+        self.energy = energy = rms(chunk)
+        voiced = energy > self.threshold()
+
+        # Follow the background level, slowly while it is over the threshold
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        else:
+            adapt = NOISE_ADAPT_TIME if not (voiced or self.in_speech) else SLOW_ADAPT_TIME
+            self.noise_floor += min(1.0, duration / adapt) * (energy - self.noise_floor)
+
+        if not self.in_speech:
+            self._pre.append(chunk)
+            self._pre_duration += duration
+            while len(self._pre) > 1 and self._pre_duration - self._duration(self._pre[0]) >= self.pre_roll:
+                self._pre_duration -= self._duration(self._pre.popleft())
+            self._run = self._run + duration if voiced else 0.0
+            if self._run >= self.start_time:
+                self.in_speech = True
+                self.label = label
+                self._chunks = list(self._pre)
+                self._length = self._pre_duration
+                self._speech_start = timestamp - self._run
+                self._speech_end = timestamp
+                self._silence = 0.0
+                self._pre.clear()
+                self._pre_duration = 0.0
+            return None
+
+        self._chunks.append(chunk)
+        self._length += duration
+        if voiced:
+            self._silence = 0.0
+            self._speech_end = timestamp
+        else:
+            self._silence += duration
+        if self._silence >= self.end_silence or self._length >= self.phrase_limit:
+            return self.flush()
+        return None
+
+    def _duration(self, chunk):
+        return len(chunk) / (self.sample_width * self.sample_rate)
+
+    def flush(self):
+        """End the current utterance, if any, and return it"""
+        if not self.in_speech:
+            return None
+        self.in_speech = False
+        self._run = 0.0
+        chunks, self._chunks = self._chunks, []
+        if self._speech_end - self._speech_start < self.min_speech:
+            self.discarded += 1
+            return None
+        return Utterance(None, b"".join(chunks), self.sample_rate, self.sample_width,
+                         self._speech_start, self._speech_end, self.label)
+
+
+class VoicePipeline:
+    """Continuous capture, a queue of utterances and a pool of recognition workers
+
+    `on_result(text, utterance)` is called for every recognised utterance,
+    one at a time and in the order they were spoken; `on_error(message)`
+    for backend failures; `on_state(state)` with STATE_LISTENING or
+    STATE_PROCESSING as recognition starts and finishes. Latency is
+    measured from the end of speech to the return of `on_result`, so it
+    covers the end-of-speech silence, queueing, recognition and acting on
+    the command.
+    """
+
+    def __init__(self, source, backend, workers=DEFAULT_WORKERS, on_result=None, on_error=None, on_state=None,
+                 max_queue=DEFAULT_MAX_QUEUE, **vad_options):
+        self.source = source
+        self.backend = backend
+        self.workers = workers
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_state = on_state
+        self.max_queue = max_queue
+        self.vad_options = vad_options
+        self.vad = None
+        self.utterances = 0
+        self.recognized = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = 0  # Workers recognising right now
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.recognition_times = deque(maxlen=LATENCY_WINDOW)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+        self._capture_thread = None
+        self._next_seq = 0  # Next utterance to deliver
+        self._finished = {}  # seq -> (text, utterance) waiting for earlier ones, None if dropped
+        self._deliver_lock = threading.Lock()
+
+    def start(self):
+        """Start the capture thread and the workers"""
+        self._running = True
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._capture_thread = threading.Thread(target=self._capture, daemon=True)
+        self._capture_thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Stop capturing; utterances already queued are still recognised"""
+        self._running = False
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout)
+        self._close_queue()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wait(self, timeout=None):
+        """Wait for a finite source to run out and for all of it to be recognised"""
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout)
+        self._close_queue()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def capturing(self):
+        """Whether the capture thread is still running, and so may still hold the source open"""
+        return self._capture_thread is not None and self._capture_thread.is_alive()
+
+    def _close_queue(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def submit(self, utterance):
+        """Queue an utterance for recognition, dropping the oldest waiting one if the queue is full"""
+        with self._cond:
+            utterance = utterance._replace(seq=self.utterances)
+            self.utterances += 1
+            if len(self._queue) >= self.max_queue:
+                # Skipped when its turn to be delivered comes; capture never waits on delivery
+                self._finished[self._queue.popleft().seq] = None
+                self.dropped += 1
+            self._queue.append(utterance)
+            self._cond.notify()
+
+    def _capture(self):
+        """Capture thread: read chunks without pause and queue each utterance"""
+        source = self.source
+        try:
+            source.open()
+            self.vad = VoiceActivityDetector(source.sample_rate, source.sample_width, **self.vad_options)
+            while self._running:
+                chunk = source.read()
+                if chunk is None:
+                    break
+                utterance = self.vad.feed(chunk, time.monotonic(), getattr(source, "label", None))
+                if utterance is not None:
+                    self.submit(utterance)
+            utterance = self.vad.flush()
+            if utterance is not None:
+                self.submit(utterance)
+        except Exception as e:
+            self.errors += 1
+            if self.on_error:
+                self.on_error(f"Audio capture failed: {e}")
+        finally:
+            source.close()
+
+    def _work(self):
+        """Worker thread: recognise queued utterances until stopped and the queue is empty"""
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                utterance = self._queue.popleft()
+                self.busy += 1
+            self._set_state(STATE_PROCESSING)
+
+            text = None
+            started = time.monotonic()
+            try:
+                text = self.backend.recognize(utterance)
+            except RecognitionError as e:
+                self.errors += 1
+                if self.on_error:
+                    self.on_error(str(e))
+            except Exception as e:
+                self.errors += 1
+                if self.on_error:
+                    self.on_error(f"Voice error: {e}")
+            self.recognition_times.append(time.monotonic() - started)
+
+            with self._cond:
+                self.busy -= 1
+                idle = not self.busy
+            self._deliver(utterance.seq, text, utterance)
+            if idle:
+                self._set_state(STATE_LISTENING)
+
+    def _deliver(self, seq, text, utterance):
+        """Pass on results in the order they were spoken, holding back any that finish early"""
+        with self._deliver_lock:
+            self._finished[seq] = (text, utterance)
+            while self._next_seq in self._finished:
+                result = self._finished.pop(self._next_seq)
+                self._next_seq += 1
+                if result is None or not result[0]:
+                    continue
+                text, utterance = result
+                self.recognized += 1
+                if self.on_result:
+                    self.on_result(text, utterance)
+                self.latencies.append(time.monotonic() - utterance.speech_end)
+
+    def _set_state(self, state):
+        if self.on_state:
+            self.on_state(state)
+
+    def stats(self):
+        """Pipeline counters and latencies, named for export"""
+        latencies = sorted(self.latencies)
+        recognition = list(self.recognition_times)
+        vad = self.vad
+        return {
+            "voice_utterances_total": self.utterances,
+            "voice_recognized_total": self.recognized,
+            "voice_dropped_total": self.dropped,
+            "voice_errors_total": self.errors,
+            "voice_queue_depth": len(self._queue),
+            "voice_busy_workers": self.busy,
+            "voice_latency_p50_seconds": latencies[len(latencies) // 2] if latencies else 0.0,
+            "voice_latency_p95_seconds": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "voice_recognition_seconds": sum(recognition) / len(recognition) if recognition else 0.0,
+            "voice_noise_floor": (vad.noise_floor or 0.0) if vad else 0.0,
+        }
+
+
+def load_noise_floor(device, path=NOISE_FLOOR_FILE):
+    """Noise floor last measured on `device`, or None"""
+    try:
+        with open(path) as f:
+            return float(json.load(f)[device])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_noise_floor(device, level, path=NOISE_FLOOR_FILE):
+    """Remember the noise floor measured on `device` for its next session"""
+    try:
+        with open(path) as f:
+            levels = json.load(f)
+    except (OSError, ValueError):
+        levels = {}
+    levels[device] = round(float(level), 1)
+    with open(path, "w") as f:
+        json.dump(levels, f, indent=2)
+
+
+class MicrophoneSource:
+    """Reads chunks from a speech_recognition Microphone, which stays open while capturing"""
+
+    def __init__(self, microphone):
+        self.microphone = microphone
+        index = getattr(microphone, "device_index", None)
+        self.device = f"microphone:{'default' if index is None else index}"  # Key for the saved noise floor
+        self._source = None
+
+    def open(self):
+        self._source = self.microphone.__enter__()
+        self.sample_rate = self._source.SAMPLE_RATE
+        self.sample_width = self._source.SAMPLE_WIDTH
+        self.chunk_frames = self._source.CHUNK
+
+    def read(self):
+        return self._source.stream.read(self.chunk_frames)
+
+    def close(self):
+        if self._source is not None:
+            self.microphone.__exit__(None, None, None)
+            self._source = None
+
+
+class WavFileSource:
+    """Plays 16-bit mono WAV files as if from a microphone, with silence between them
+
+    With `realtime` the chunks come at the rate they would from a
+    microphone, so latencies are meaningful; `label` is the file playing.
+    """
+
+    def __init__(self, paths, gap=1.0, chunk_frames=480, realtime=True):
+        self.paths = list(paths)
+        self.gap = gap
+        self.chunk_frames = chunk_frames
+        self.realtime = realtime
+        self.label = None
+        with wave.open(self.paths[0], "rb") as f:
+            self.sample_rate = f.getframerate()
+            self.sample_width = f.getsampwidth()
+        self._chunks = None
+        self._due = 0.0
+
+    def open(self):
+        self._chunks = self._generate()
+        self._due = time.monotonic()
+
+    def _generate(self):
+        silence = bytes(self.chunk_frames * self.sample_width)
+        size = self.chunk_frames * self.sample_width
+        gap_chunks = int(self.gap * self.sample_rate / self.chunk_frames)
+        for path in self.paths:
+            self.label = path
+            with wave.open(path, "rb") as f:
+                if f.getnchannels() != 1 or f.getsampwidth() != self.sample_width \
+                        or f.getframerate() != self.sample_rate:
+                    raise ValueError(f"{path}: all files must be mono with the same format")
+                data = f.readframes(f.getnframes())
+            for i in range(0, len(data), size):
+                yield data[i:i + size].ljust(size, b"\0")
+            for _ in range(gap_chunks):
+                yield silence
+
+    def read(self):
+        chunk = next(self._chunks, None)
+        if chunk is not None and self.realtime:
+            # A microphone delivers each chunk once it has been recorded
+            self._due += self.chunk_frames / self.sample_rate
+            delay = self._due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk
+
+    def skip_to_now(self):
+        """Drop the audio that played while nobody was reading, as a closed microphone would"""
+        now = time.monotonic()
+        while self._due < now and next(self._chunks, None) is not None:
+            self._due += self.chunk_frames / self.sample_rate
+
+    def close(self):
+        self._chunks = None
+
+
+def transcript_for(path):
+    """Expected transcript of a WAV file: a .txt file next to it, else its name ("scroll_up.wav" -> "scroll up")"""
+    text_path = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(text_path):
+        with open(text_path) as f:
+            return f.read().strip()
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.split("-", 1)[-1].replace("_", " ")
+
+
+class TranscriptBackend:
+    """Offline stand-in for a recogniser, for WavFileSource: the transcript of the file that was playing
+
+    `delay` simulates recognition time, e.g. a network round trip.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def recognize(self, utterance):
+        if self.delay:
+            time.sleep(self.delay)
+        return transcript_for(utterance.label) if utterance.label else None
+
+
+class SpeechRecognitionBackend:
+    """Any of speech_recognition's recognisers: "google" (online), "sphinx" or "whisper" (offline)
+
+    The offline engines need the pocketsphinx or openai-whisper package.
+    """
+
+    def __init__(self, engine="google", recognizer=None, **options):
+        import speech_recognition as sr
+        self.sr = sr
+        self.engine = engine
+        self.recognizer = recognizer or sr.Recognizer()
+        self._recognize = getattr(self.recognizer, "recognize_" + engine)
+        self.options = options
+
+    def recognize(self, utterance):
+        audio = self.sr.AudioData(utterance.audio, utterance.sample_rate, utterance.sample_width)
+        try:
+            if self.engine == "google":
+                # All of Google's alternatives, so the command grammar can pick the one that fits
+                response = self._recognize(audio, show_all=True, **self.options)
+                alternatives = [a["transcript"].lower() for a in response.get("alternative", ())
+                                if a.get("transcript")] if response else []
+                return alternatives or None
+            return self._recognize(audio, **self.options).lower()
+        except self.sr.UnknownValueError:
+            return None
+        except self.sr.RequestError as e:
+            raise RecognitionError(f"Could not request results from {self.engine} speech recognition: {e}")
@@ -0,0 +1,234 @@
+"""Voice command grammar compiled into lookup tables
+
+Commands are declared once, in VOICE_COMMANDS, as one of three kinds:
+  - ExactCommand: the whole transcript is one of the phrases,
+  - KeywordCommand: the transcript contains the keyword and the word,
+  - PrefixCommand: the transcript starts with the prefix; the rest is the argument.
+CommandRegistry compiles them into a hash map of exact phrases, a small
+keyword table and a character trie of prefixes. When several commands match,
+the one declared first wins, which is the order the original if/elif chain
+tested them in.
+
+A transcript that matches nothing is compared with the command phrases by
+how they sound (a rough phonetic key), so "clique" still clicks and "scroll
+app" still scrolls up. These fuzzy results are kept in a bounded LRU cache,
+since the same misheard phrases come back again and again.
+"""
+import functools
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+DEFAULT_FUZZY_CUTOFF = 0.85  # Least similarity of the phonetic keys for a fuzzy match
+DEFAULT_CACHE_SIZE = 1024
+ALTERNATIVE_DECAY = 0.9  # Each lower-ranked alternative transcript counts this much less
+FUZZY_WEIGHT = 0.85  # A fuzzy match counts this much less than an exact one
+
+# action: (handler name, fixed arguments...); a PrefixCommand's argument is appended
+# message: logged when the command runs, formatted with the argument; None to stay quiet
+ExactCommand = namedtuple("ExactCommand", ["name", "phrases", "action", "message"])
+KeywordCommand = namedtuple("KeywordCommand", ["name", "keyword", "word", "action", "message"])
+PrefixCommand = namedtuple("PrefixCommand", ["name", "prefix", "action", "message", "arguments"])
+
+# Spoken key names for "press ..."; anything else is pressed as spoken
+SPECIAL_KEYS = {
+    "enter": "enter", "space": "space", "tab": "tab",
+    "escape": "escape", "esc": "escape",
+    "up": "up", "down": "down", "left": "left", "right": "right",
+    "backspace": "backspace", "delete": "delete",
+    "home": "home", "end": "end",
+    "page up": "pageup", "page down": "pagedown"
+}
+
+GREETING = "Hello, I'm listening to your commands"
+
+VOICE_COMMANDS = (
+    ExactCommand("click", ("click", "click mouse", "left click"), ("click",), "Left click"),
+    ExactCommand("right_click", ("right click", "right mouse"), ("rightClick",), "Right click"),
+    ExactCommand("double_click", ("double click", "double"), ("doubleClick",), "Double click"),
+    KeywordCommand("scroll_up", "scroll", "up", ("scroll", 300), "Scrolling up"),
+    KeywordCommand("scroll_down", "scroll", "down", ("scroll", -300), "Scrolling down"),
+    PrefixCommand("type", "type ", ("write",), "Typing: {}", None),
+    PrefixCommand("press", "press ", ("press",), "Pressed {} key", SPECIAL_KEYS),
+    ExactCommand("greet", ("hello", "hi there", "hey"), ("speak", GREETING), None),
+)
+
+# command: the matched declaration; argument: text after a prefix, else None
+# score: 1.0 for a match as declared, the phonetic similarity times FUZZY_WEIGHT
+#        for a fuzzy one, scaled down for lower-ranked alternative transcripts
+# fuzzy: whether the transcript only sounds like the command
+Match = namedtuple("Match", ["command", "argument", "transcript", "score", "fuzzy"])
+
+# Spellings that sound alike, rewritten in this order before comparing
+_PHONETIC_RULES = (
+    ("ph", "f"), ("ght", "t"), ("wr", "r"), ("ck", "k"), ("que", "k"), ("qu", "kw"),
+    ("ce", "se"), ("ci", "si"), ("cy", "si"), ("c", "k"), ("x", "ks"), ("z", "s"),
+    ("ee", "i"), ("ea", "i"), ("oo", "u"), ("y", "i"),
+)
+
+
+def phonetic_key(text):
+    """Rough spelling of how `text` sounds: alike-sounding letters merged, doubles and silent final e dropped"""
+    text = text.lower()
+    for spelling, sound in _PHONETIC_RULES:
+        text = text.replace(spelling, sound)
+    words = []
+    for word in text.split():
+        if len(word) > 2 and word.endswith("e"):
+            word = word[:-1]
+        collapsed = word[:1]
+        for letter in word[1:]:
+            if letter != collapsed[-1]:
+                collapsed += letter
+        words.append(collapsed)
+    return " ".join(words)
+
+
+def similarity(a, b):
+    """Similarity of two phonetic keys, 0.0 to 1.0"""
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class CommandRegistry:
+    """Compiled voice commands: exact phrases, keywords and prefixes, plus cached fuzzy matching"""
+
+    def __init__(self, commands=VOICE_COMMANDS, handlers=None, fuzzy_cutoff=DEFAULT_FUZZY_CUTOFF,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        self.commands = tuple(commands)
+        self.handlers = handlers or {}
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._exact = {}  # phrase -> (priority, Match)
+        self._keywords = {}  # keyword -> [(priority, word, command)], keywords in priority order
+        self._trie = {}  # char -> node; a node's None key holds (priority, command) for a whole prefix
+        self._fuzzy_phrases = []  # (phonetic key, priority, command) for whole-phrase fuzzy matches
+        self._fuzzy_prefixes = []  # (phonetic key of the prefix word, priority, command)
+        self._compile()
+        # Exact phrases declared before every keyword and prefix command need no further checks
+        self._first_pattern = min([entries[0][0] for entries in self._keywords.values()] +
+                                  [priority for _, priority, _ in self._fuzzy_prefixes] + [len(self.commands)])
+        self._fuzzy = functools.lru_cache(maxsize=cache_size)(self._fuzzy_match)
+
+    def _compile(self):
+        for priority, command in enumerate(self.commands):
+            if isinstance(command, ExactCommand):
+                for phrase in command.phrases:
+                    self._exact.setdefault(phrase, (priority, Match(command, None, phrase, 1.0, False)))
+                    self._fuzzy_phrases.append((phonetic_key(phrase), priority, command))
+            elif isinstance(command, KeywordCommand):
+                self._keywords.setdefault(command.keyword, []).append((priority, command.word, command))
+                self._fuzzy_phrases.append((phonetic_key(f"{command.keyword} {command.word}"), priority, command))
+            elif isinstance(command, PrefixCommand):
+                node = self._trie
+                for char in command.prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, (priority, command))
+                self._fuzzy_prefixes.append((phonetic_key(command.prefix), priority, command))
+            else:
+                raise TypeError(f"unknown command type: {command!r}")
+
+    def resolve(self, transcript):
+        """Match for the command a transcript names exactly, or None"""
+        exact = self._exact.get(transcript)
+        if exact is not None:
+            if exact[0] < self._first_pattern:
+                return exact[1]
+            best = (exact[0], exact[1].command, None)
+        else:
+            best = None
+
+        # Keywords: the first word found in the transcript picks the command. A keyword
+        # without any of its words still takes the transcript, so later commands don't apply
+        stop = None
+        for keyword, entries in self._keywords.items():
+            if best is not None and best[0] < entries[0][0]:
+                break
+            if keyword in transcript:
+                for priority, word, command in entries:
+                    if word in transcript:
+                        if best is None or priority < best[0]:
+                            best = (priority, command, None)
+                        break
+                else:
+                    stop = entries[0][0]
+                break
+
+        # Prefixes: walk the trie along the transcript, keeping the first-declared complete prefix
+        node = self._trie
+        for i, char in enumerate(transcript):
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(None)
+            if found is not None and (best is None or found[0] < best[0]):
+                best = (found[0], found[1], transcript[i + 1:])
+
+        if best is None or (stop is not None and best[0] > stop):
+            return None
+        if exact is not None and best[0] == exact[0]:
+            return exact[1]
+        return Match(best[1], best[2], transcript, 1.0, False)
+
+    def _fuzzy_match(self, transcript):
+        """Closest-sounding command for a transcript that matched nothing, or None"""
+        key = phonetic_key(transcript)
+        if not key:
+            return None
+        best = None
+        best_score = self.fuzzy_cutoff
+        for phrase_key, priority, command in self._fuzzy_phrases:
+            score = similarity(key, phrase_key)
+            if score > best_score or (score == best_score and best is None):
+                best, best_score = (command, None), score
+
+        # A misheard first word of a parameterised command, e.g. "pressed enter"
+        first, _, rest = transcript.partition(" ")
+        if rest:
+            first_key = phonetic_key(first)
+            for prefix_key, priority, command in self._fuzzy_prefixes:
+                score = similarity(first_key, prefix_key)
+                if score >= best_score:
+                    best, best_score = (command, rest), score
+        if best is None:
+            return None
+        return Match(best[0], best[1], transcript, best_score * FUZZY_WEIGHT, True)
+
+    def match(self, transcripts):
+        """Best Match for a transcript, or for alternative transcripts (best first); None if nothing fits
+
+        Alternatives are scored in one pass: an exact match scores 1.0 and a
+        fuzzy one its similarity times FUZZY_WEIGHT, scaled by
+        ALTERNATIVE_DECAY per rank, so a lower-ranked alternative that names a
+        command exactly beats a fuzzy reading of the top one.
+        """
+        if isinstance(transcripts, str):
+            return self.resolve(transcripts) or self._fuzzy(transcripts)
+        best = None
+        weight = 1.0
+        for transcript in transcripts:
+            if best is not None and best.score >= weight:
+                break  # Nothing further down can score higher
+            found = self.resolve(transcript) or self._fuzzy(transcript)
+            if found is not None and (best is None or found.score * weight > best.score):
+                best = found if weight == 1.0 else found._replace(score=found.score * weight)
+            weight *= ALTERNATIVE_DECAY
+        return best
+
+    def execute(self, match):
+        """Run a match's action with the registry's handlers; returns the message to log, or None"""
+        command = match.command
+        name, *args = command.action
+        argument = match.argument
+        if isinstance(command, PrefixCommand):
+            args.append(command.arguments.get(argument, argument) if command.arguments else argument)
+        self.handlers[name](*args)
+        if command.message is None:
+            return None
+        return command.message.format(argument)
+
+    def stats(self):
+        """Fuzzy-match cache counters, named for export"""
+        info = self._fuzzy.cache_info()
+        return {
+            "voice_commands_fuzzy_cache_hits_total": info.hits,
+            "voice_commands_fuzzy_cache_misses_total": info.misses,
+            "voice_commands_fuzzy_cache_size": info.currsize,
+        }
@@ -0,0 +1,79 @@
+"""Finger-count voting with hysteresis
+
+Per-frame finger counts are noisy, so the tracker acts on the count that won
+a vote over the last few frames and only switches modes when that winner is
+clearly established. FingerCountVoter keeps the vote tallies incrementally
+(constant work per frame) and returns at most one ModeTransition per frame.
+"""
+from collections import namedtuple
+
+MAX_FINGERS = 5
+
+# Emitted when the stable finger count changes
+ModeTransition = namedtuple("ModeTransition", ["previous", "count", "timestamp", "confidence"])
+
+
+class FingerCountVoter:
+    """Sliding-window vote over finger counts with enter/exit hysteresis
+
+    A new count takes over from the current stable one when
+      - it holds at least `enter_threshold` of the votes in the window,
+      - the stable count has fallen below `exit_threshold` of the votes, and
+      - at least `min_dwell` seconds have passed since the last transition.
+    Ties in the vote go to the smaller count, as with the original
+    most-common-count rule.
+    """
+
+    def __init__(self, window=5, enter_threshold=0.5, exit_threshold=0.5, min_dwell=0.5):
+        self.window = window
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_dwell = min_dwell
+        self.stable = 0  # Count the current mode was chosen for
+        self.last_transition_time = None  # None allows an immediate transition
+        self.clear()
+
+    def clear(self):
+        """Drop all votes, e.g. when the hand is lost; the stable count is kept"""
+        self.votes = [0] * (MAX_FINGERS + 1)
+        self._ring = [0] * self.window
+        self._pos = 0
+        self.filled = 0
+        self.winner = 0
+
+    def update(self, count, timestamp):
+        """Add this frame's count; return a ModeTransition if the stable count changes"""
+        count = min(max(int(count), 0), MAX_FINGERS)
+        votes = self.votes
+
+        # Slide the window: the oldest vote leaves, the new one enters
+        if self.filled == self.window:
+            votes[self._ring[self._pos]] -= 1
+        else:
+            self.filled += 1
+        self._ring[self._pos] = count
+        self._pos = (self._pos + 1) % self.window
+        votes[count] += 1
+
+        # Winner over the six possible counts; strict > keeps the smaller count on ties
+        winner = 0
+        for candidate in range(1, MAX_FINGERS + 1):
+            if votes[candidate] > votes[winner]:
+                winner = candidate
+        self.winner = winner
+
+        if winner == self.stable:
+            return None
+        confidence = votes[winner] / self.filled
+        if confidence < self.enter_threshold:
+            return None
+        if votes[self.stable] / self.filled >= self.exit_threshold:
+            return None
+        if (self.last_transition_time is not None
+                and timestamp - self.last_transition_time <= self.min_dwell):
+            return None
+
+        transition = ModeTransition(self.stable, winner, timestamp, confidence)
+        self.stable = winner
+        self.last_transition_time = timestamp
+        return transition